@@ -0,0 +1,114 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from fastmcp.server.dependencies import get_http_headers
+
+from auth.server import AuthServer
+
+DEFAULT_TENANT = 'default'
+
+
+class CredentialManager:
+    """Per-tenant auth servers, so one server process can serve many Google accounts
+
+    Serving several accounts is opt-in: when TENANT_HEADER names a request
+    header, e.g. a user identity set by a trusted proxy, or `mcp-session-id`
+    to give every MCP session its own account, the tenant of a tool call is
+    read from it and calls without it are refused. Tenants then keep their
+    token in their own directory next to TOKEN_PATH. When TENANT_HEADER is
+    unset, every call belongs to the default tenant whose token lives at
+    TOKEN_PATH.
+
+    Auth servers are kept in an LRU of at most `maxsize` tenants; an evicted
+    tenant is loaded again from its token file on its next call. A background
+    thread refreshes the tokens of loaded tenants shortly before they expire,
+    checking every `refresh_interval` seconds.
+
+    When a sign-in replaces the credentials of a tenant, `on_replace` is
+    called with the old credentials.
+    """
+
+    def __init__(self, token_file=None, header=None, maxsize=None, refresh_interval=None, on_replace=None):
+        self.token_file = token_file or os.getenv("TOKEN_PATH")
+        self.header = (header or os.getenv("TENANT_HEADER") or '').lower() or None
+        self.maxsize = maxsize or int(os.getenv("TENANT_CACHE_SIZE", "64"))
+        self.refresh_interval = refresh_interval or float(os.getenv("TOKEN_REFRESH_INTERVAL", "60"))
+        self._servers = OrderedDict()
+        self._lock = threading.Lock()
+        self._refresher = None
+        self._wake = threading.Event()
+        self.on_replace = on_replace
+
+    def tenant(self):
+        """Identify the tenant of the current request"""
+        if self.header is None:
+            return DEFAULT_TENANT
+        tenant = get_http_headers(include_all=True).get(self.header)
+        if not tenant:
+            raise Exception(f"Missing the {self.header} header naming the account of this request")
+        return tenant
+
+    def token_path(self, tenant):
+        """Token file of a tenant; tenant names are hashed so they are safe as paths
+
+        With several accounts, even a tenant named like the default one gets its
+        own directory, so no header value reaches the token at TOKEN_PATH.
+        """
+        if tenant == DEFAULT_TENANT and self.header is None:
+            return self.token_file
+        digest = hashlib.sha256(tenant.encode()).hexdigest()[:32]
+        return os.path.join(os.path.dirname(self.token_file), 'tenants', digest, 'token.json')
+
+    def get(self, tenant=None):
+        """Get the auth server of a tenant, by default the one of the current request"""
+        if tenant is None:
+            tenant = self.tenant()
+
+        with self._lock:
+            server = self._servers.get(tenant)
+            if server is not None:
+                self._servers.move_to_end(tenant)
+                return server
+
+        server = AuthServer(token_file=self.token_path(tenant), on_replace=self._replaced)
+        server.credentials = server.read_saved_credentials()
+
+        with self._lock:
+            server = self._servers.setdefault(tenant, server)
+            self._servers.move_to_end(tenant)
+            while len(self._servers) > self.maxsize:
+                self._servers.popitem(last=False)
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._refresh_loop, name="token-refresher", daemon=True)
+                self._refresher.start()
+
+        # A newly loaded token may already be close to expiry
+        self._wake.set()
+        return server
+
+    def _replaced(self, credentials):
+        if self.on_replace is not None:
+            self.on_replace(credentials)
+
+    def servers(self):
+        """Snapshot of the loaded auth servers"""
+        with self._lock:
+            return list(self._servers.values())
+
+    def refresh_expiring(self):
+        """Refresh every loaded token that expires soon"""
+        for server in self.servers():
+            if not server.needs_refresh():
+                continue
+            try:
+                server.refresh_credentials()
+            except Exception as e:
+                print(f"⚠️ Error refreshing credentials: {e}")
+
+    def _refresh_loop(self):
+        while True:
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+            self.refresh_expiring()
@@ -1,37 +1,65 @@
 import os
 import json
+import time
+import asyncio
+import tempfile
 import webbrowser
 import http.server
 import socketserver
 import urllib.parse
-from threading import Thread
-import socket
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
+from datetime import datetime, timedelta, timezone
+from threading import Lock, Thread
+
+# The Google auth libraries are imported where they are used, so the server
+# can list its tools without loading them
+
+# Tokens are refreshed this long before they expire
+REFRESH_MARGIN = timedelta(seconds=int(os.getenv("TOKEN_REFRESH_MARGIN", "300")))
+# Seconds a consent flow waits for its OAuth callback
+AUTH_TIMEOUT = float(os.getenv("AUTH_TIMEOUT", "300"))
 
 class AuthServer:
-    def __init__(self):
+    def __init__(self, token_file=None, on_replace=None):
         self.credentials_file = os.getenv("SECRET_PATH")
-        self.token_file = os.getenv("TOKEN_PATH")
+        self.token_file = token_file or os.getenv("TOKEN_PATH")
         self.scopes = ['https://www.googleapis.com/auth/calendar', 'https://www.googleapis.com/auth/tasks']
         self.port_range = (3500, 3510)
         self.server = None
         self.credentials = None
         self.auth_completed = False
+        self.auth_url = None
+        self.auth_error = None
+        self.on_replace = on_replace
+        self._refresh_lock = Lock()
+        self._flow_lock = Lock()
         
+    def read_saved_credentials(self):
+        """Read the saved credentials without validating or refreshing them"""
+        if not os.path.exists(self.token_file):
+            return None
+
+        from google.oauth2.credentials import Credentials
+
+        try:
+            return Credentials.from_authorized_user_file(self.token_file, self.scopes)
+        except Exception as e:
+            print(f"⚠️ Error reading saved credentials: {e}")
+            return None
+
     def load_existing_credentials(self):
         """Load and validate existing credentials"""
         if not os.path.exists(self.token_file):
             return None
             
         try:
-            creds = Credentials.from_authorized_user_file(self.token_file, self.scopes)
+            creds = self.read_saved_credentials()
             
             if creds and creds.valid:
                 return creds
                 
             if creds and creds.expired and creds.refresh_token:
+                from google.auth.transport.requests import Request
+
                 creds.refresh(Request())
                 self.save_credentials(creds)
                 return creds
@@ -42,20 +70,74 @@ class AuthServer:
         return None
     
     def save_credentials(self, credentials):
-        """Save credentials to file"""
+        """Save credentials to file
+
+        The token is written to a temporary file that then replaces the token
+        file, so a crash or a concurrent reader never sees a partial token.
+        """
+        token_dir = os.path.dirname(self.token_file) or '.'
+        os.makedirs(token_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=token_dir, prefix='.token-', suffix='.tmp')
         try:
-            with open(self.token_file, 'w') as token:
+            with os.fdopen(fd, 'w') as token:
                 token.write(credentials.to_json())
-        except Exception as e:
+                token.flush()
+                os.fsync(token.fileno())
+            os.replace(temp_path, self.token_file)
+        except Exception:
+            os.unlink(temp_path)
             raise
+
+    def replace_credentials(self, credentials):
+        """Switch to new credentials, reporting the old ones to `on_replace`"""
+        previous = self.credentials
+        self.credentials = credentials
+        if previous is not None and previous is not credentials and self.on_replace:
+            self.on_replace(previous)
+
+    def needs_refresh(self, margin=REFRESH_MARGIN):
+        """Check if the token is missing or expires within `margin` and can be refreshed"""
+        creds = self.credentials
+        if not creds or not creds.refresh_token:
+            return False
+        if not creds.token:
+            return True
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return creds.expiry is not None and creds.expiry - now < margin
+
+    def refresh_credentials(self, margin=REFRESH_MARGIN):
+        """Refresh the token if it expires within `margin` and save it
+
+        Refreshes are single-flight: concurrent callers wait for the refresh in
+        progress and then find the token fresh instead of refreshing it again.
+        """
+        with self._refresh_lock:
+            if self.needs_refresh(margin):
+                from google.auth.transport.requests import Request
+
+                self.credentials.refresh(Request())
+                self.save_credentials(self.credentials)
+            return self.credentials
+
+    async def get_valid_credentials(self):
+        """Get the credentials, first refreshing a token that is about to expire
+
+        Tokens are normally refreshed in the background ahead of time, so this
+        only waits for a refresh when the background refresher fell behind.
+        """
+        if self.needs_refresh():
+            await asyncio.to_thread(self.refresh_credentials)
+        return self.credentials
     
-    def find_available_port(self):
-        """Find an available port in the specified range"""
+    def bind_callback_server(self):
+        """Bind an OAuth callback server to the first free port in the port range
+
+        Binding directly, rather than probing for a free port first, lets
+        flows of several users claim ports concurrently without colliding.
+        """
         for port in range(*self.port_range):
             try:
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.bind(('localhost', port))
-                    return port
+                return socketserver.TCPServer(("localhost", port), None)
             except OSError:
                 continue
         return None
@@ -105,6 +187,8 @@ class AuthServer:
                     error = query_params.get('error')
                     
                     if error:
+                        # Google only redirects here once per consent, so the flow is over
+                        auth_server.auth_error = f"Google returned an error: {error[0]}"
                         self.send_error_response(f"Authentication error: {error[0]}")
                         return
                         
@@ -117,7 +201,7 @@ class AuthServer:
                         credentials = flow.credentials
                         
                         auth_server.save_credentials(credentials)
-                        auth_server.credentials = credentials
+                        auth_server.replace_credentials(credentials)
                         auth_server.auth_completed = True
                         
                         self.send_success_response()
@@ -198,46 +282,77 @@ class AuthServer:
         return AuthHandler
     
     def authenticate(self, open_browser=True):
-        """Main authentication method"""
+        """Main authentication method
+
+        Returns True when saved credentials can be used. Otherwise a consent
+        flow is started, or the one already pending is reused, and False is
+        returned right away with the flow's URL in `auth_url`; its callback is
+        served in the background until the user finishes or AUTH_TIMEOUT
+        passes. When no flow can be started, `auth_error` says why.
+        """
         
         existing_creds = self.load_existing_credentials()
         if existing_creds:
-            self.credentials = existing_creds
+            self.replace_credentials(existing_creds)
             return True
         
-        if not os.path.exists(self.credentials_file):
-            return False
+        with self._flow_lock:
+            if self.auth_url:
+                return False
+
+            self.auth_error = None
+            if not os.path.exists(self.credentials_file):
+                self.auth_error = "Client secrets file not found."
+                return False
+            
+            httpd = self.bind_callback_server()
+            if not httpd:
+                self.auth_error = "No free port for the OAuth callback, too many sign-ins are in progress."
+                return False
+            
+            try:
+                from google_auth_oauthlib.flow import Flow
+
+                port = httpd.server_address[1]
+                flow = Flow.from_client_secrets_file(
+                    self.credentials_file,
+                    scopes=self.scopes,
+                    redirect_uri=f'http://localhost:{port}/oauth2callback'
+                )
+                httpd.RequestHandlerClass = self.create_request_handler(flow)
+                auth_url, _ = flow.authorization_url(prompt='consent')
+            except Exception as e:
+                httpd.server_close()
+                self.auth_error = str(e)
+                return False
+
+            self.server = httpd
+            self.auth_url = auth_url
+            self.auth_completed = False
+            Thread(target=self.serve_callback, args=(httpd,), name="oauth-callback", daemon=True).start()
         
-        port = self.find_available_port()
-        if not port:
-            return False
+        if open_browser:
+            try:
+                webbrowser.open(auth_url)
+            except Exception:
+                print("⚠️ Could not open browser automatically")
         
+        return False
+
+    def serve_callback(self, httpd):
+        """Serve OAuth callback requests until the flow completes, fails or times out"""
+        deadline = time.monotonic() + AUTH_TIMEOUT
+        httpd.timeout = 1
         try:
-            flow = Flow.from_client_secrets_file(
-                self.credentials_file,
-                scopes=self.scopes,
-                redirect_uri=f'http://localhost:{port}/oauth2callback'
-            )
-            
-            handler = self.create_request_handler(flow)
-            with socketserver.TCPServer(("localhost", port), handler) as httpd:
-                self.server = httpd
-                
-                auth_url, _ = flow.authorization_url(prompt='consent')
-                
-                if open_browser:
-                    try:
-                        webbrowser.open(auth_url)
-                    except Exception:
-                        print("⚠️ Could not open browser automatically")
-                
-                while not self.auth_completed:
-                    httpd.handle_request()
-                
-                return True
-                
-        except Exception as e:
-            return False
+            while not self.auth_completed and not self.auth_error and time.monotonic() < deadline:
+                httpd.handle_request()
+            if not self.auth_completed and not self.auth_error:
+                self.auth_error = f"Sign-in was not completed within {AUTH_TIMEOUT:g} seconds."
+        finally:
+            httpd.server_close()
+            with self._flow_lock:
+                self.server = None
+                self.auth_url = None
     
     def get_credentials(self):
         """Get the authenticated credentials"""
@@ -0,0 +1,524 @@
+"""Local stand-in for the Google Calendar and Tasks REST endpoints used by the tools
+
+Serves calendarList.list/get, events.list/insert/delete, freebusy.query,
+tasklists.list, tasks.list/insert/patch/update/delete and batch requests from
+an in-memory account of configurable size, with configurable latency, page
+size and error rate.
+Recurring events are expanded into occurrences when listed with singleEvents.
+The primary calendar can also be named by the account's address, PRIMARY_ADDRESS.
+Sync tokens return the events inserted or deleted since they were issued, and
+unknown ones are answered with 410 Gone. Deleted and hidden tasks are only
+listed with showDeleted and showHidden.
+Calendars can be watched with events.watch: inserting an event then posts a
+notification to every channel on its calendar, as Google does.
+As in Google, list responses carry an etag, partial-response selectors
+drop every field they do not name, and reads sent with a matching
+If-None-Match are answered with 304 Not Modified.
+Point the server at it with GOOGLE_API_ROOT_URL.
+"""
+import email.parser
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dateutil.rrule import rrulestr
+
+EPOCH = datetime(2025, 1, 6, tzinfo=timezone.utc)
+# Occurrences of recurring events are generated up to this long after EPOCH when no timeMax is given
+RECURRENCE_HORIZON = timedelta(days=730)
+# Recurrence rules of the generated recurring events, used in turn
+RECURRENCE_RULES = ['RRULE:FREQ=DAILY', 'RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR', 'RRULE:FREQ=MONTHLY;BYDAY=1TU']
+
+# Address of the fake account, which names its primary calendar too
+PRIMARY_ADDRESS = 'me@example.com'
+
+# Largest page each list method returns, as in the real APIs
+MAX_PAGE_SIZES = {'calendarList': 250, 'events': 2500, 'tasklists': 100, 'tasks': 100}
+
+
+def timestamp(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def parse_time(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone(timezone.utc)
+
+
+class FakeGoogle:
+    """In-memory Google account served over HTTP
+
+    Args:
+        calendars: Number of calendars besides 'primary'.
+        events: Events per calendar, one every few hours from 2025-01-06.
+        recurring: Recurring events per calendar, open-ended and starting 2025-01-06.
+        tasklists: Number of task lists.
+        tasks: Tasks per list, every third one completed.
+        latency: Seconds each HTTP request takes, batch requests counting once.
+        jitter: Extra random seconds added to the latency, up to this much.
+        page_size: Largest page returned by any list method (optional).
+        error_rate: Fraction of calls answered with `error_status`.
+        error_status: HTTP status of injected errors, e.g. 503 or 429.
+        seed: Seed for the generated account and injected errors.
+    """
+
+    def __init__(self, calendars=2, events=500, tasklists=3, tasks=200, latency=0.05, jitter=0.0,
+                 page_size=None, error_rate=0.0, error_status=503, seed=1, recurring=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = page_size
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+        self.server = None
+        self.channels = {}
+        self.changes = 0
+
+        self.calendars = {}
+        for index, calendar_id in enumerate(['primary'] + [f'calendar{n}@example.com' for n in range(calendars)]):
+            start = EPOCH + timedelta(minutes=30 * index)
+            self.calendars[calendar_id] = {
+                'summary': 'Primary' if calendar_id == 'primary' else f'Calendar {index}',
+                'events': [
+                    self.new_event(f'{index}e{n}', start + timedelta(hours=5 * n), timedelta(minutes=60))
+                    for n in range(events)
+                ],
+                'changes': [],
+                'synced_events': {},
+                'series': [
+                    self.new_series(f'{index}r{n}', start + timedelta(hours=n), RECURRENCE_RULES[n % len(RECURRENCE_RULES)])
+                    for n in range(recurring)
+                ],
+            }
+
+        self.tasklists = {}
+        for index in range(tasklists):
+            tasklist_id = f'list{index}'
+            self.tasklists[tasklist_id] = {
+                'title': f'List {index}',
+                'tasks': [
+                    {
+                        'id': f'{tasklist_id}t{n}',
+                        'etag': '"1"',
+                        'title': f'Task {n} of list {index}',
+                        'notes': self.random.choice(['call back', 'review draft', 'pay invoice', 'plan trip']),
+                        'status': 'completed' if n % 3 == 0 else 'needsAction',
+                        'due': (EPOCH + timedelta(days=n % 60)).strftime('%Y-%m-%dT00:00:00.000Z'),
+                        'updated': timestamp(EPOCH - timedelta(hours=n)),
+                        'position': f'{n:020d}',
+                    }
+                    for n in range(tasks)
+                ],
+            }
+
+    def new_event(self, event_id, start, duration):
+        return {
+            'id': event_id,
+            'etag': '"1"',
+            'status': 'confirmed',
+            'summary': f'Event {event_id}',
+            'description': 'Benchmark event',
+            'updated': timestamp(EPOCH),
+            'start': {'dateTime': timestamp(start)},
+            'end': {'dateTime': timestamp(start + duration)},
+        }
+
+    def new_series(self, event_id, start, rule):
+        event = self.new_event(event_id, start, timedelta(minutes=30))
+        event['start']['timeZone'] = event['end']['timeZone'] = 'UTC'
+        event['recurrence'] = [rule]
+        return event
+
+    def instances(self, series, time_min, time_max):
+        """Expand recurring events into their occurrences in a time range, as singleEvents=true does"""
+        instances = []
+        for event in series:
+            fields = {key: value for key, value in event.items() if key != 'recurrence'}
+            first = parse_time(event['start']['dateTime'])
+            duration = parse_time(event['end']['dateTime']) - first
+            rules = rrulestr('\n'.join(event['recurrence']), dtstart=first, forceset=True)
+            rules.rdate(first)
+            for start in rules.between(time_min - duration, time_max):
+                end = start + duration
+                instances.append(dict(
+                    fields,
+                    id=f"{event['id']}_{start.strftime('%Y%m%dT%H%M%SZ')}",
+                    recurringEventId=event['id'],
+                    originalStartTime={'dateTime': timestamp(start), 'timeZone': 'UTC'},
+                    start={'dateTime': timestamp(start), 'timeZone': 'UTC'},
+                    end={'dateTime': timestamp(end), 'timeZone': 'UTC'},
+                ))
+        return instances
+
+    # Serving
+
+    def start(self, port=0):
+        """Serve in a background thread and return the root URL"""
+        fake = self
+
+        class Handler(FakeHandler):
+            google = fake
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name='fake-google', daemon=True).start()
+        return f'http://127.0.0.1:{self.server.server_port}/'
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def inject_error(self):
+        with self.lock:
+            return self.error_rate and self.random.random() < self.error_rate
+
+    def delay(self):
+        time.sleep(self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0))
+
+    # Routing
+
+    def handle(self, method, path, headers, body):
+        """Answer one API call with (status, response body)"""
+        with self.lock:
+            self.requests += 1
+        if self.inject_error():
+            reason = 'rateLimitExceeded' if self.error_status in (403, 429) else 'backendError'
+            return error(self.error_status, 'Injected error', reason)
+
+        url = urllib.parse.urlsplit(path)
+        query = {key: values[-1] for key, values in urllib.parse.parse_qs(url.query).items()}
+        route = urllib.parse.unquote(url.path).replace(f'/calendars/{PRIMARY_ADDRESS}/', '/calendars/primary/')
+        status, response = self.route(method, route, query, headers, body)
+        if status == 200 and 'fields' in query:
+            response = apply_fields(response, query['fields'])
+        return status, response
+
+    def route(self, method, route, query, headers, body):
+
+        if route == '/calendar/v3/users/me/calendarList':
+            items = [{'id': calendar_id, 'summary': calendar['summary']} for calendar_id, calendar in self.calendars.items()]
+            return 200, self.page(items, query, 'calendarList')
+
+        match = re.fullmatch(r'/calendar/v3/users/me/calendarList/([^/]+)', route)
+        if match:
+            calendar_id = 'primary' if match.group(1) == PRIMARY_ADDRESS else match.group(1)
+            calendar = self.calendars.get(calendar_id)
+            if calendar is None:
+                return error(404, 'Not Found', 'notFound')
+            if calendar_id == 'primary':
+                return 200, {'id': PRIMARY_ADDRESS, 'summary': calendar['summary'], 'primary': True}
+            return 200, {'id': calendar_id, 'summary': calendar['summary']}
+
+        if route == '/calendar/v3/freeBusy':
+            return 200, self.freebusy(body)
+
+        match = re.fullmatch(r'/calendar/v3/calendars/([^/]+)/events/watch', route)
+        if match:
+            if match.group(1) not in self.calendars:
+                return error(404, 'Not Found', 'notFound')
+            return 200, self.watch(match.group(1), body)
+
+        if route == '/calendar/v3/channels/stop':
+            with self.lock:
+                channel = self.channels.pop(body.get('id'), None)
+            if channel is None or channel['resourceId'] != body.get('resourceId'):
+                return error(404, f"Channel '{body.get('id')}' not found", 'notFound')
+            return 200, {}
+
+        match = re.fullmatch(r'/calendar/v3/calendars/([^/]+)/events/([^/]+)', route)
+        if match and method == 'DELETE':
+            calendar = self.calendars.get(match.group(1))
+            with self.lock:
+                event = next((event for event in calendar['events'] if event['id'] == match.group(2)), None) if calendar else None
+                if event is None:
+                    return error(404, 'Not Found', 'notFound')
+                calendar['events'].remove(event)
+                calendar['changes'].append({'id': event['id'], 'etag': '"2"', 'status': 'cancelled'})
+                self.changes += 1
+            self.notify(match.group(1), 'exists')
+            return 204, None
+
+        match = re.fullmatch(r'/calendar/v3/calendars/([^/]+)/events', route)
+        if match:
+            calendar = self.calendars.get(match.group(1))
+            if calendar is None:
+                return error(404, 'Not Found', 'notFound')
+            if method == 'POST':
+                with self.lock:
+                    event = dict(body, id=uuid.uuid4().hex, etag='"1"', status='confirmed', updated=timestamp(datetime.now(timezone.utc)))
+                    calendar['events'].append(event)
+                    calendar['changes'].append(event)
+                    self.changes += 1
+                self.notify(match.group(1), 'exists')
+                return 200, event
+            return self.list_events(calendar, query)
+
+        if route == '/tasks/v1/users/@me/lists':
+            items = [{'id': tasklist_id, 'title': tasklist['title']} for tasklist_id, tasklist in self.tasklists.items()]
+            return 200, self.page(items, query, 'tasklists')
+
+        match = re.fullmatch(r'/tasks/v1/lists/([^/]+)/tasks(?:/([^/]+))?', route)
+        if match:
+            tasklist = self.tasklists.get(match.group(1))
+            if tasklist is None:
+                return error(404, 'Not Found', 'notFound')
+            if match.group(2):
+                return self.write_task(tasklist, match.group(2), method, headers, body)
+            if method == 'POST':
+                with self.lock:
+                    task = dict(body, id=uuid.uuid4().hex, etag='"1"', status=body.get('status', 'needsAction'),
+                                updated=timestamp(datetime.now(timezone.utc)), position=f'{len(tasklist["tasks"]):020d}')
+                    tasklist['tasks'].append(task)
+                return 200, task
+            return 200, self.list_tasks(tasklist['tasks'], query)
+
+        return error(404, f'No route for {route}', 'notFound')
+
+    def page(self, items, query, kind):
+        """Slice a page out of a list response; the page token is the offset"""
+        limits = [MAX_PAGE_SIZES[kind], int(query.get('maxResults', MAX_PAGE_SIZES[kind]))]
+        if self.page_size:
+            limits.append(self.page_size)
+        size = min(limits)
+        offset = int(query.get('pageToken', 0))
+        response = {'kind': kind, 'items': items[offset:offset + size]}
+        if offset + size < len(items):
+            response['nextPageToken'] = str(offset + size)
+        # Like Google, every list response carries an etag of its content
+        response['etag'] = '"%s"' % hashlib.md5(json.dumps(response, sort_keys=True).encode()).hexdigest()
+        return response
+
+    def list_events(self, calendar, query):
+        # Sync tokens are the number of event changes in the account when they were issued
+        if 'syncToken' in query:
+            if query['syncToken'] not in calendar['synced_events']:
+                return error(410, 'Sync token is no longer valid, a full sync is required.', 'fullSyncRequired')
+            changed = calendar['changes'][calendar['synced_events'][query['syncToken']]:]
+            return 200, {'items': changed, 'nextSyncToken': self.sync_token(calendar)}
+        time_min = parse_time(query['timeMin']) if 'timeMin' in query else EPOCH
+        time_max = parse_time(query['timeMax']) if 'timeMax' in query else EPOCH + RECURRENCE_HORIZON
+        events = [
+            event for event in calendar['events']
+            if parse_time(event['end']['dateTime']) > time_min and parse_time(event['start']['dateTime']) < time_max
+        ]
+        if query.get('singleEvents') == 'true':
+            events += self.instances(calendar['series'], time_min, time_max)
+        else:
+            events += [event for event in calendar['series'] if parse_time(event['start']['dateTime']) < time_max]
+        if query.get('orderBy') == 'startTime':
+            events = sorted(events, key=lambda event: parse_time(event['start']['dateTime']))
+        response = self.page(events, query, 'events')
+        if 'nextPageToken' not in response:
+            response['nextSyncToken'] = self.sync_token(calendar)
+        return 200, response
+
+    def sync_token(self, calendar):
+        with self.lock:
+            token = str(self.changes)
+            calendar['synced_events'][token] = len(calendar['changes'])
+        return token
+
+    def watch(self, calendar_id, body):
+        ttl = int(body.get('params', {}).get('ttl', 604800))
+        channel = {
+            'kind': 'api#channel',
+            'id': body['id'],
+            'resourceId': hashlib.sha1(calendar_id.encode()).hexdigest(),
+            'resourceUri': f'https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events',
+            'token': body.get('token'),
+            'expiration': str(int((time.time() + min(ttl, 2592000)) * 1000)),
+        }
+        with self.lock:
+            self.channels[channel['id']] = dict(channel, address=body['address'], calendar_id=calendar_id, messages=0)
+        self.notify(calendar_id, 'sync', channel_id=channel['id'])
+        return channel
+
+    def notify(self, calendar_id, state, channel_id=None):
+        """Post a notification to the channels on a calendar from a background thread"""
+        with self.lock:
+            channels = [
+                channel for channel in self.channels.values()
+                if channel['calendar_id'] == calendar_id and channel_id in (None, channel['id'])
+            ]
+            for channel in channels:
+                channel['messages'] += 1
+            messages = [(channel, channel['messages']) for channel in channels]
+
+        def send():
+            for channel, number in messages:
+                headers = {
+                    'X-Goog-Channel-ID': channel['id'],
+                    'X-Goog-Channel-Expiration': time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(int(channel['expiration']) / 1000)),
+                    'X-Goog-Resource-ID': channel['resourceId'],
+                    'X-Goog-Resource-URI': channel['resourceUri'],
+                    'X-Goog-Resource-State': state,
+                    'X-Goog-Message-Number': str(number),
+                }
+                if channel['token']:
+                    headers['X-Goog-Channel-Token'] = channel['token']
+                try:
+                    urllib.request.urlopen(urllib.request.Request(channel['address'], data=b'', headers=headers), timeout=5)
+                except Exception:
+                    pass
+
+        threading.Thread(target=send, name='fake-google-notify', daemon=True).start()
+
+    def list_tasks(self, tasks, query):
+        if query.get('showDeleted') != 'true':
+            tasks = [task for task in tasks if not task.get('deleted')]
+        if query.get('showHidden') != 'true':
+            tasks = [task for task in tasks if not task.get('hidden')]
+        if query.get('showCompleted') == 'false':
+            tasks = [task for task in tasks if task['status'] != 'completed']
+        if 'dueMin' in query:
+            due_min = parse_time(query['dueMin'])
+            tasks = [task for task in tasks if task.get('due') and parse_time(task['due']) >= due_min]
+        if 'dueMax' in query:
+            due_max = parse_time(query['dueMax'])
+            tasks = [task for task in tasks if task.get('due') and parse_time(task['due']) < due_max]
+        if 'updatedMin' in query:
+            updated_min = parse_time(query['updatedMin'])
+            tasks = [task for task in tasks if parse_time(task['updated']) >= updated_min]
+        return self.page(tasks, query, 'tasks')
+
+    def write_task(self, tasklist, task_id, method, headers, body):
+        with self.lock:
+            task = next((task for task in tasklist['tasks'] if task['id'] == task_id), None)
+            if task is None:
+                return error(404, 'Not Found', 'notFound')
+            if method == 'GET':
+                return 200, task
+            if method == 'DELETE':
+                task.update(deleted=True, etag='"%s"' % uuid.uuid4().hex[:8], updated=timestamp(datetime.now(timezone.utc)))
+                return 204, None
+            if_match = headers.get('if-match')
+            if if_match and if_match != task['etag']:
+                return error(412, 'Precondition Failed', 'conditionNotMet')
+            if method == 'PUT':
+                kept = {key: task[key] for key in ('id', 'position')}
+                task.clear()
+                task.update(kept)
+            task.update(body)
+            task['etag'] = '"%s"' % uuid.uuid4().hex[:8]
+            task['updated'] = timestamp(datetime.now(timezone.utc))
+            return 200, task
+
+    def freebusy(self, body):
+        time_min = parse_time(body['timeMin'])
+        time_max = parse_time(body['timeMax'])
+        calendars = {}
+        for item in body.get('items', []):
+            calendar = self.calendars.get(item['id'])
+            if calendar is None:
+                calendars[item['id']] = {'errors': [{'domain': 'global', 'reason': 'notFound'}], 'busy': []}
+                continue
+            calendars[item['id']] = {'busy': [
+                {'start': event['start']['dateTime'], 'end': event['end']['dateTime']}
+                for event in calendar['events'] + self.instances(calendar['series'], time_min, time_max)
+                if parse_time(event['start']['dateTime']) < time_max and parse_time(event['end']['dateTime']) > time_min
+            ]}
+        return {'kind': 'calendar#freeBusy', 'timeMin': body['timeMin'], 'timeMax': body['timeMax'], 'calendars': calendars}
+
+
+def error(status, message, reason):
+    return status, {'error': {'code': status, 'message': message, 'errors': [{'reason': reason, 'message': message}]}}
+
+
+def apply_fields(response, fields):
+    """Honour a partial-response fields selector: the top-level fields it names and those inside items(...)"""
+    selected = {}
+    for name, item_fields in re.findall(r'(\w+)(?:\(([^)]*)\))?', fields):
+        if name not in response:
+            continue
+        if name == 'items' and item_fields:
+            keep = set(item_fields.split(','))
+            selected[name] = [{key: value for key, value in item.items() if key in keep} for item in response['items']]
+        else:
+            selected[name] = response[name]
+    return selected
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    google = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, data, content_type='application/json', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def handle_method(self, method):
+        self.google.delay()
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        if self.path.startswith('/batch'):
+            return self.handle_batch(raw)
+
+        headers = {name.lower(): value for name, value in self.headers.items()}
+        status, body = self.google.handle(method, self.path, headers, json.loads(raw) if raw else None)
+        data = json.dumps(body).encode() if body is not None else b''
+        if method == 'GET' and status == 200:
+            etag = body.get('etag') or '"%s"' % hashlib.md5(data).hexdigest()
+            if headers.get('if-none-match') == etag:
+                with self.google.lock:
+                    self.google.not_modified += 1
+                return self.send_body(304, b'', headers={'ETag': etag})
+            return self.send_body(status, data, headers={'ETag': etag})
+        self.send_body(status, data)
+
+    def handle_batch(self, raw):
+        message = email.parser.BytesParser().parsebytes(
+            b'Content-Type: ' + self.headers['Content-Type'].encode() + b'\r\n\r\n' + raw
+        )
+        boundary = 'batch_' + uuid.uuid4().hex
+        parts = []
+        for part in message.get_payload():
+            payload = part.get_payload()
+            separator = '\r\n\r\n' if '\r\n\r\n' in payload else '\n\n'
+            head, _, body = payload.partition(separator)
+            lines = head.splitlines()
+            method, path, _ = lines[0].split(' ', 2)
+            headers = {name.lower(): value for name, value in (line.split(': ', 1) for line in lines[1:] if ': ' in line)}
+            status, response = self.google.handle(method, path, headers, json.loads(body) if body.strip() else None)
+            data = json.dumps(response)
+            parts.append(
+                f'--{boundary}\r\nContent-Type: application/http\r\n'
+                f'Content-ID: <response-{part["Content-ID"][1:-1]}>\r\n\r\n'
+                f'HTTP/1.1 {status} Fake\r\nContent-Type: application/json\r\n'
+                f'Content-Length: {len(data)}\r\n\r\n{data}\r\n'
+            )
+        parts.append(f'--{boundary}--\r\n')
+        self.send_body(200, ''.join(parts).encode(), f'multipart/mixed; boundary={boundary}')
+
+    def do_GET(self):
+        self.handle_method('GET')
+
+    def do_POST(self):
+        self.handle_method('POST')
+
+    def do_PUT(self):
+        self.handle_method('PUT')
+
+    def do_PATCH(self):
+        self.handle_method('PATCH')
+
+    def do_DELETE(self):
+        self.handle_method('DELETE')
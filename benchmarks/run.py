@@ -0,0 +1,225 @@
+"""Benchmark the MCP tools against a local stand-in for the Google APIs
+
+Runs each tool scenario through an in-memory MCP client, so timings include
+argument validation and result serialization, at several concurrency levels.
+No network access or Google account is needed.
+
+Usage (from the repository root):
+    uv run python -m benchmarks.run
+    uv run python -m benchmarks.run --concurrency 1,16,64 --requests 400 --latency 0.1
+    uv run python -m benchmarks.run --scenarios get_events,get_tasks --error-rate 0.05 --json results.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_google import FakeGoogle
+
+WINDOW = {'start_date': '2025-01-06T00:00:00Z', 'end_date': '2025-02-06T00:00:00Z'}
+YEAR = {'start_date': '2025-01-06T00:00:00Z', 'end_date': '2026-01-06T00:00:00Z'}
+
+# Scenario name -> (tool, arguments)
+SCENARIOS = {
+    'get_all_calendars': ('get_all_calendars', {}),
+    'get_events': ('get_events', dict(WINDOW)),
+    'get_events_all': ('get_events', dict(WINDOW, calendar_ids='all')),
+    'get_events_json': ('get_events', dict(WINDOW, calendar_ids='all', output_format='json', fields=['id', 'summary'])),
+    'get_events_year': ('get_events', dict(YEAR, calendar_ids='all', limit=2500)),
+    'get_events_year_series': ('get_events', dict(YEAR, calendar_ids='all', limit=2500, recurring='series')),
+    'find_free_slots': ('find_free_slots', dict(WINDOW, calendar_ids='all', duration_minutes=60)),
+    'get_tasks': ('get_tasks', {}),
+    'get_tasks_filtered': ('get_tasks', {'status': 'needsAction', 'query': 'invoice'}),
+    'create_event': ('create_event', {
+        'summary': 'Benchmark', 'description': 'Created by the benchmark',
+        'start_date': '2025-01-07T10:00:00+05:30', 'end_date': '2025-01-07T11:00:00+05:30'
+    }),
+    'add_task': ('add_task', {'title': 'Benchmark task'}),
+    'add_tasks_bulk': ('add_tasks_bulk', {'tasks': [{'title': f'Benchmark task {n}'} for n in range(20)]}),
+    'update_task': ('update_task', {'task_id': 'list0t1', 'tasklist_id': 'list0', 'status': 'completed'}),
+    'update_tasks_bulk': ('update_tasks_bulk', {
+        'updates': [{'task_id': f'list0t{n}', 'status': 'completed'} for n in range(50)], 'tasklist_id': 'list0'
+    }),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma-separated scenarios to run')
+    parser.add_argument('--concurrency', default='1,8,32', help='Comma-separated concurrency levels')
+    parser.add_argument('--requests', type=int, default=100, help='Tool calls per scenario and concurrency level')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds each fake API request takes')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Random extra latency, up to this many seconds')
+    parser.add_argument('--page-size', type=int, default=None, help='Largest page the fake API returns')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of fake API calls that fail')
+    parser.add_argument('--error-status', type=int, default=503, help='HTTP status of injected failures')
+    parser.add_argument('--calendars', type=int, default=2, help='Calendars besides primary')
+    parser.add_argument('--events', type=int, default=500, help='Events per calendar')
+    parser.add_argument('--recurring', type=int, default=5, help='Recurring events per calendar')
+    parser.add_argument('--tasklists', type=int, default=3, help='Task lists')
+    parser.add_argument('--tasks', type=int, default=200, help='Tasks per list')
+    parser.add_argument('--no-cache', action='store_true', help='Treat cached reads as stale at once, so each is revalidated with Google')
+    parser.add_argument('--json', dest='json_path', help='Also write the results to this JSON file')
+    args = parser.parse_args(argv)
+
+    unknown = set(args.scenarios.split(',')) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def configure(root_url, args):
+    """Point the server at the fake API; must run before the tools are imported"""
+    os.environ['GOOGLE_API_ROOT_URL'] = root_url
+    os.environ.setdefault('TOKEN_PATH', os.path.join(tempfile.mkdtemp(prefix='syncmcp-bench-'), 'token.json'))
+    # The client-side rate limits would otherwise cap throughput at a few calls per second
+    os.environ.setdefault('API_RATE_LIMIT', '1000000')
+    os.environ.setdefault('API_USER_RATE_LIMIT', '1000000')
+    if args.no_cache:
+        for namespace in ('CALENDARS', 'EVENTS', 'TASKLISTS', 'TASKS'):
+            os.environ[f'CACHE_TTL_{namespace}'] = '0'
+
+
+def build_server():
+    """Build the MCP server the way main.py does, signed in with a dummy token"""
+    from google.oauth2.credentials import Credentials
+
+    from tools.auth import register_auth_tools
+    from tools.google_calendar import register_google_calendar_tools
+    from tools.google_tasks import register_google_tasks_tools
+    from tools.metrics import MeteredFastMCP, register_metrics
+    from tools.shared import credential_manager
+    from tools.watch import register_watch_tools
+
+    mcp = MeteredFastMCP("gcalender-benchmark")
+    register_auth_tools(mcp)
+    register_google_calendar_tools(mcp)
+    register_google_tasks_tools(mcp)
+    register_watch_tools(mcp)
+    register_metrics(mcp)
+    credential_manager.get().credentials = Credentials(token='benchmark')
+    return mcp
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+def measure_service_build():
+    """Seconds to build the Calendar and Tasks services from their discovery documents"""
+    from google.oauth2.credentials import Credentials
+
+    from tools.shared import ServiceRegistry, credential_manager
+
+    registry = ServiceRegistry(credential_manager, root_url=os.environ['GOOGLE_API_ROOT_URL'])
+    credentials = Credentials(token='benchmark')
+    start = time.perf_counter()
+    registry.get('calendar', 'v3', credentials)
+    registry.get('tasks', 'v1', credentials)
+    return time.perf_counter() - start
+
+
+async def run_level(client, fake, tool, arguments, concurrency, requests):
+    """Make `requests` calls of a tool with `concurrency` calls in flight"""
+    from tools.metrics import is_error_result
+
+    latencies = []
+    errors = 0
+    output_bytes = 0
+    calls = iter(range(requests))
+
+    async def worker():
+        nonlocal errors, output_bytes
+        for _ in calls:
+            start = time.perf_counter()
+            result = await client.call_tool(tool, arguments)
+            latencies.append(time.perf_counter() - start)
+            output_bytes += sum(len(getattr(content, 'text', '').encode()) for content in result)
+            if is_error_result(result):
+                errors += 1
+
+    api_requests = fake.requests
+    not_modified = fake.not_modified
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': errors,
+        'throughput': requests / elapsed,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'api_calls_per_request': (fake.requests - api_requests) / requests,
+        'revalidated_per_request': (fake.not_modified - not_modified) / requests,
+        'output_kb_per_request': output_bytes / requests / 1024,
+    }
+
+
+async def run(args, fake):
+    from fastmcp import Client
+
+    mcp = build_server()
+    levels = [int(level) for level in args.concurrency.split(',')]
+    results = {'service_build_ms': measure_service_build() * 1000, 'scenarios': {}}
+    print(f"Service build: {results['service_build_ms']:.1f} ms")
+
+    async with Client(mcp) as client:
+        for scenario in args.scenarios.split(','):
+            tool, arguments = SCENARIOS[scenario]
+            start = time.perf_counter()
+            await client.call_tool(tool, arguments)
+            cold_ms = (time.perf_counter() - start) * 1000
+
+            print(f"\n{scenario} (first call {cold_ms:.1f} ms)")
+            print(f"{'concurrency':>11} {'calls/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7} {'API/call':>9} {'304/call':>9} {'KB/call':>9}")
+            levels_results = []
+            for concurrency in levels:
+                level = await run_level(client, fake, tool, arguments, concurrency, args.requests)
+                levels_results.append(level)
+                print(
+                    f"{concurrency:>11} {level['throughput']:>9.1f} {level['p50_ms']:>9.1f} "
+                    f"{level['p99_ms']:>9.1f} {level['errors']:>7} {level['api_calls_per_request']:>9.2f} "
+                    f"{level['revalidated_per_request']:>9.2f} {level['output_kb_per_request']:>9.1f}"
+                )
+            results['scenarios'][scenario] = {'first_call_ms': cold_ms, 'levels': levels_results}
+    return results
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    fake = FakeGoogle(
+        calendars=args.calendars,
+        events=args.events,
+        recurring=args.recurring,
+        tasklists=args.tasklists,
+        tasks=args.tasks,
+        latency=args.latency,
+        jitter=args.jitter,
+        page_size=args.page_size,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+    )
+    configure(fake.start(), args)
+    try:
+        results = asyncio.run(run(args, fake))
+    finally:
+        fake.stop()
+
+    if args.json_path:
+        with open(args.json_path, 'w') as output:
+            json.dump(dict(results, settings=vars(args)), output, indent=2)
+        print(f"\nResults written to {args.json_path}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Measure server startup: time until a client can list the tools
+
+Each run starts a fresh Python process that imports main.py, lists the tools
+through an in-memory MCP client, then makes one tool call against a local
+stand-in for the Google APIs. Three startup modes are compared:
+
+    eager    Google client libraries imported before the server, as before
+    lazy     Google client libraries imported on first use
+    preload  imported on first use or by a background warm-up, the default
+
+Usage (from the repository root):
+    uv run python -m benchmarks.startup
+    uv run python -m benchmarks.startup --runs 10 --pause 0 --json startup.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_google import FakeGoogle
+
+MODES = ('eager', 'lazy', 'preload')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated startup modes to compare')
+    parser.add_argument('--runs', type=int, default=5, help='Server processes started per mode')
+    parser.add_argument('--pause', type=float, default=0.5, help='Seconds between listing tools and the first call')
+    parser.add_argument('--json', dest='json_path', help='Also write the results to this JSON file')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    unknown = set(args.modes.split(',')) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+    return args
+
+
+async def child(mode, pause):
+    """Start the server in this process and report its timings on stdout"""
+    start = time.perf_counter()
+    if mode == 'eager':
+        import importlib
+
+        from tools.shared import GOOGLE_MODULES
+
+        for module in GOOGLE_MODULES:
+            importlib.import_module(module)
+
+    import main
+    from fastmcp import Client
+    from tools.shared import GOOGLE_MODULES, credential_manager
+
+    imported = time.perf_counter()
+    async with Client(main.mcp) as client:
+        tools = await client.list_tools()
+        listed = time.perf_counter()
+        print('listed', flush=True)
+        loaded = [module for module in GOOGLE_MODULES if module in sys.modules]
+
+        await asyncio.sleep(pause)
+        from google.oauth2.credentials import Credentials
+
+        called = time.perf_counter()
+        credential_manager.get().credentials = Credentials(token='benchmark')
+        await client.call_tool('get_all_calendars', {})
+        done = time.perf_counter()
+
+    print(json.dumps({
+        'import_ms': (imported - start) * 1000,
+        'list_tools_ms': (listed - start) * 1000,
+        'first_call_ms': (done - called) * 1000,
+        'tools': len(tools),
+        'google_modules_loaded': loaded,
+    }), flush=True)
+
+
+def run_once(mode, pause):
+    """Start one server process; returns its timings plus the wall time until it listed the tools"""
+    env = dict(os.environ, PRELOAD_GOOGLE_CLIENTS='true' if mode == 'preload' else 'false')
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.startup', '--child', mode, '--pause', str(pause)],
+        env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    process_ms = None
+    result = None
+    for line in process.stdout:
+        if line.strip() == 'listed':
+            process_ms = (time.perf_counter() - start) * 1000
+        elif line.startswith('{'):
+            result = json.loads(line)
+    if process.wait() != 0 or result is None:
+        raise RuntimeError(f"Server process failed in {mode} mode")
+    return dict(result, process_ms=process_ms)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        asyncio.run(child(args.child, args.pause))
+        return
+
+    fake = FakeGoogle(latency=0)
+    os.environ['GOOGLE_API_ROOT_URL'] = fake.start()
+    os.environ['TOKEN_PATH'] = os.path.join(tempfile.mkdtemp(prefix='syncmcp-startup-'), 'token.json')
+    results = {}
+    try:
+        print(f"{'mode':>8} {'process ms':>11} {'import ms':>10} {'list ms':>9} {'1st call ms':>12}  Google modules at list_tools")
+        for mode in args.modes.split(','):
+            runs = [run_once(mode, args.pause) for _ in range(args.runs)]
+            summary = {
+                key: statistics.median(run[key] for run in runs)
+                for key in ('process_ms', 'import_ms', 'list_tools_ms', 'first_call_ms')
+            }
+            summary['google_modules_loaded'] = runs[-1]['google_modules_loaded']
+            results[mode] = dict(summary, runs=runs)
+            print(
+                f"{mode:>8} {summary['process_ms']:>11.1f} {summary['import_ms']:>10.1f} "
+                f"{summary['list_tools_ms']:>9.1f} {summary['first_call_ms']:>12.1f}  "
+                f"{len(summary['google_modules_loaded'])}"
+            )
+    finally:
+        fake.stop()
+
+    if args.json_path:
+        with open(args.json_path, 'w') as output:
+            json.dump(dict(results, settings=vars(args)), output, indent=2)
+        print(f"\nResults written to {args.json_path}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,23 +1,42 @@
 import sys
-from fastmcp import FastMCP
 from dotenv import load_dotenv
 import os
 from datetime import datetime, timedelta
+from threading import Thread
+
+from starlette.middleware import Middleware
+
+load_dotenv()
 
 from tools.auth import register_auth_tools
 from tools.google_calendar import register_google_calendar_tools
 from tools.google_tasks import register_google_tasks_tools
-
-load_dotenv()
+from tools.metrics import MeteredFastMCP, register_metrics
+from tools.shared import services
+from tools.watch import WatchStartup, register_watch_tools
 
 print("Starting gcalender MCP HTTP server...", file=sys.stderr, flush=True)
 
-mcp = FastMCP("gcalender")
+mcp = MeteredFastMCP("gcalender")
 
 register_auth_tools(mcp)
 register_google_calendar_tools(mcp)
 register_google_tasks_tools(mcp)
+register_watch_tools(mcp)
+register_metrics(mcp)
+
+# Tools are listed without the Google client libraries; load them in the
+# background so the first tool call does not wait for them either
+if os.getenv("PRELOAD_GOOGLE_CLIENTS", "true").lower() == "true":
+    Thread(target=services.warm_up, name="google-warm-up", daemon=True).start()
 
 if __name__ == "__main__":
     print("About to start HTTP MCP server on http://127.0.0.1:8000/mcp", file=sys.stderr, flush=True)
-    mcp.run(transport="streamable-http", host="127.0.0.1", port=8000, path="/mcp")
\ No newline at end of file
+    # Saved watch channels are renewed from startup on, not from the first call
+    mcp.run(
+        transport="streamable-http",
+        host="127.0.0.1",
+        port=8000,
+        path="/mcp",
+        middleware=[Middleware(WatchStartup)]
+    )
\ No newline at end of file
@@ -0,0 +1,189 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+
+def normalize_time(value):
+    """Convert an RFC3339 timestamp or an all-day date to a sortable UTC string"""
+    if value is None:
+        return None
+    if len(value) == 10:
+        value += 'T00:00:00+00:00'
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+# Stores older than this version dropped hidden tasks and sync their task lists afresh
+SCHEMA_VERSION = 1
+
+
+class SyncStore:
+    """Local SQLite copy of calendar events and tasks kept current by incremental sync"""
+
+    def __init__(self, path=None):
+        if path is None:
+            token_dir = os.path.dirname(os.getenv("TOKEN_PATH") or "") or "."
+            path = os.path.join(token_dir, "sync.db")
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS events (
+                    calendar_id TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    start TEXT,
+                    end TEXT,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (calendar_id, id)
+                );
+                CREATE INDEX IF NOT EXISTS events_by_start ON events (calendar_id, start);
+                CREATE TABLE IF NOT EXISTS tasklists (
+                    id TEXT PRIMARY KEY,
+                    position INTEGER NOT NULL,
+                    data TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS tasks (
+                    tasklist_id TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    position TEXT,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (tasklist_id, id)
+                );
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    resource TEXT PRIMARY KEY,
+                    token TEXT,
+                    synced_at REAL NOT NULL
+                );
+            """)
+            version, = self._connection.execute("PRAGMA user_version").fetchone()
+            if version < SCHEMA_VERSION:
+                with self._connection:
+                    self._connection.execute("DELETE FROM sync_state WHERE resource LIKE 'tasks%'")
+                    self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        return self._connection
+
+    def get_state(self, resource):
+        """Get the (token, synced_at) pair recorded for a resource, or (None, None)"""
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT token, synced_at FROM sync_state WHERE resource = ?", (resource,)
+            ).fetchone()
+        return row if row else (None, None)
+
+    def set_state(self, resource, token, synced_at=None):
+        """Record the sync token for a resource once a sync has finished"""
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sync_state (resource, token, synced_at) VALUES (?, ?, ?)",
+                (resource, token, synced_at if synced_at is not None else time.time())
+            )
+
+    def clear_state(self, resource=None):
+        """Forget the sync state of one resource, or of all of them, forcing a fresh sync"""
+        with self._lock, self.connection:
+            if resource is None:
+                self.connection.execute("DELETE FROM sync_state")
+            else:
+                self.connection.execute("DELETE FROM sync_state WHERE resource = ?", (resource,))
+
+    def apply_events(self, calendar_id, events, replace=False):
+        """Upsert changed events and drop cancelled ones
+
+        With replace=True every stored event of the calendar is removed first, as
+        required at the start of a full resync.
+        """
+        with self._lock, self.connection:
+            if replace:
+                self.connection.execute("DELETE FROM events WHERE calendar_id = ?", (calendar_id,))
+            for event in events:
+                if event.get('status') == 'cancelled':
+                    self.connection.execute(
+                        "DELETE FROM events WHERE calendar_id = ? AND id = ?", (calendar_id, event['id'])
+                    )
+                    continue
+                start = event.get('start', {})
+                end = event.get('end', {})
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO events (calendar_id, id, start, end, data) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        calendar_id,
+                        event['id'],
+                        normalize_time(start.get('dateTime', start.get('date'))),
+                        normalize_time(end.get('dateTime', end.get('date'))),
+                        json.dumps(event)
+                    )
+                )
+
+    def events(self, calendar_id, start_date, end_date, limit=None, offset=0):
+        """Get stored events overlapping a time range, ordered by start time"""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT data FROM events WHERE calendar_id = ? AND start < ? AND end > ? "
+                "ORDER BY start, id LIMIT ? OFFSET ?",
+                (calendar_id, normalize_time(end_date), normalize_time(start_date),
+                 -1 if limit is None else limit, offset)
+            ).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def apply_tasks(self, tasklist_id, tasks, replace=False):
+        """Upsert changed tasks and drop deleted ones
+
+        Hidden tasks, such as those completed in Google's own apps, are kept
+        and only returned by tasks() when asked for.
+        """
+        with self._lock, self.connection:
+            if replace:
+                self.connection.execute("DELETE FROM tasks WHERE tasklist_id = ?", (tasklist_id,))
+            for task in tasks:
+                if task.get('deleted'):
+                    self.connection.execute(
+                        "DELETE FROM tasks WHERE tasklist_id = ? AND id = ?", (tasklist_id, task['id'])
+                    )
+                    continue
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO tasks (tasklist_id, id, position, data) VALUES (?, ?, ?, ?)",
+                    (tasklist_id, task['id'], task.get('position'), json.dumps(task))
+                )
+
+    def set_tasklists(self, task_lists):
+        """Replace the stored task lists, dropping tasks and sync state of removed lists"""
+        tasklist_ids = tuple(task_list['id'] for task_list in task_lists)
+        placeholders = ", ".join("?" for _ in tasklist_ids)
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM tasklists")
+            self.connection.executemany(
+                "INSERT INTO tasklists (id, position, data) VALUES (?, ?, ?)",
+                [(task_list['id'], position, json.dumps(task_list)) for position, task_list in enumerate(task_lists)]
+            )
+            self.connection.execute(f"DELETE FROM tasks WHERE tasklist_id NOT IN ({placeholders})", tasklist_ids)
+            self.connection.execute(
+                f"DELETE FROM sync_state WHERE resource LIKE 'tasks:%' AND substr(resource, 7) NOT IN ({placeholders})",
+                tasklist_ids
+            )
+
+    def tasklists(self):
+        """Get the stored task lists in their original order"""
+        with self._lock:
+            rows = self.connection.execute("SELECT data FROM tasklists ORDER BY position").fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def tasks(self, tasklist_id, limit=None, offset=0, include_hidden=False):
+        """Get stored tasks of a list in list order, hidden ones only with include_hidden"""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT data FROM tasks WHERE tasklist_id = ? AND (? OR json_extract(data, '$.hidden') IS NOT 1) "
+                "ORDER BY position, id LIMIT ? OFFSET ?",
+                (tasklist_id, include_hidden, -1 if limit is None else limit, offset)
+            ).fetchall()
+        return [json.loads(data) for data, in rows]
@@ -0,0 +1,21 @@
+import os
+import tempfile
+
+import pytest
+
+from benchmarks.fake_google import FakeGoogle
+
+# The tools read their settings when imported, so the server is pointed at a
+# local stand-in for the Google APIs before any test module imports them
+fake = FakeGoogle(latency=0)
+os.environ['GOOGLE_API_ROOT_URL'] = fake.start()
+os.environ['TOKEN_PATH'] = os.path.join(tempfile.mkdtemp(prefix='syncmcp-test-'), 'token.json')
+os.environ['API_RATE_LIMIT'] = '1000000'
+os.environ['API_USER_RATE_LIMIT'] = '1000000'
+os.environ['PRELOAD_GOOGLE_CLIENTS'] = 'false'
+
+
+@pytest.fixture(scope='session')
+def fake_google():
+    yield fake
+    fake.stop()
@@ -0,0 +1,30 @@
+import time
+import urllib.error
+import urllib.request
+from threading import Thread
+
+import pytest
+
+from auth.server import AuthServer
+
+
+def test_denied_consent_ends_the_flow(tmp_path):
+    auth_server = AuthServer(token_file=str(tmp_path / 'token.json'))
+    httpd = auth_server.bind_callback_server()
+    httpd.RequestHandlerClass = auth_server.create_request_handler(flow=None)
+    auth_server.auth_url = 'https://accounts.google.com/o/oauth2/auth'
+    thread = Thread(target=auth_server.serve_callback, args=(httpd,), daemon=True)
+    thread.start()
+
+    port = httpd.server_address[1]
+    start = time.monotonic()
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        urllib.request.urlopen(f'http://localhost:{port}/oauth2callback?error=access_denied')
+    assert excinfo.value.code == 400
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert time.monotonic() - start < 5
+    assert 'access_denied' in auth_server.auth_error
+    assert auth_server.auth_url is None
+    assert not auth_server.is_authenticated()
@@ -0,0 +1,156 @@
+import asyncio
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from fastmcp import Client
+from google.oauth2.credentials import Credentials
+
+import tools.executor
+import tools.google_calendar
+from benchmarks.fake_google import FakeGoogle
+from tools.availability import free_slots, merge_intervals, working_windows
+from tools.executor import MAX_RETRIES
+from tools.google_calendar import register_google_calendar_tools
+from tools.metrics import MeteredFastMCP
+from tools.shared import ServiceRegistry, credential_manager
+
+BERLIN = ZoneInfo('Europe/Berlin')
+HOUR = timedelta(hours=1)
+
+
+def at(day, hour, minute=0, zone=timezone.utc):
+    return datetime(2025, 1, day, hour, minute, tzinfo=zone)
+
+
+@pytest.mark.parametrize('intervals, expected', [
+    ([], []),
+    ([(1, 3)], [(1, 3)]),
+    ([(5, 6), (1, 2)], [(1, 2), (5, 6)]),
+    ([(1, 3), (2, 4)], [(1, 4)]),
+    ([(1, 2), (2, 3)], [(1, 3)]),
+    ([(1, 10), (2, 3), (4, 5)], [(1, 10)]),
+    ([(3, 4), (1, 2), (2, 3), (6, 7)], [(1, 4), (6, 7)]),
+])
+def test_merge_intervals(intervals, expected):
+    assert merge_intervals(intervals) == expected
+
+
+@pytest.mark.parametrize('busy, windows, duration, expected', [
+    # No busy time leaves the whole window free
+    ([], [(at(6, 9), at(6, 17))], HOUR, [(at(6, 9), at(6, 17))]),
+    # Busy time touching the window edges
+    ([(at(6, 8), at(6, 9)), (at(6, 16), at(6, 18))], [(at(6, 9), at(6, 17))], HOUR, [(at(6, 9), at(6, 16))]),
+    # A gap of exactly the duration is kept, a shorter one dropped
+    (
+        [(at(6, 9), at(6, 10)), (at(6, 11), at(6, 12)), (at(6, 12, 30), at(6, 17))],
+        [(at(6, 9), at(6, 17))], HOUR,
+        [(at(6, 10), at(6, 11))]
+    ),
+    # An all-day busy block covers every window of its day
+    (
+        [(at(6, 0), at(7, 0))],
+        [(at(6, 9), at(6, 17)), (at(7, 9), at(7, 17))], HOUR,
+        [(at(7, 9), at(7, 17))]
+    ),
+    # Busy time spanning two windows, and busy time between windows
+    (
+        [(at(6, 16), at(7, 10)), (at(7, 20), at(7, 22))],
+        [(at(6, 9), at(6, 17)), (at(7, 9), at(7, 17))], HOUR,
+        [(at(6, 9), at(6, 16)), (at(7, 10), at(7, 17))]
+    ),
+    # A long busy interval that starts inside one slot does not hide later windows
+    (
+        [(at(6, 12), at(6, 13))],
+        [(at(6, 9), at(6, 17)), (at(8, 9), at(8, 10))], 2 * HOUR,
+        [(at(6, 9), at(6, 12)), (at(6, 13), at(6, 17))]
+    ),
+])
+def test_free_slots(busy, windows, duration, expected):
+    assert free_slots(busy, windows, duration) == expected
+
+
+@pytest.mark.parametrize('start, end, hours, include_weekends, expected', [
+    # Without working hours the range is one window
+    (at(6, 5), at(8, 5), (None, None), True, [(at(6, 5), at(8, 5))]),
+    # Windows are clipped to the range
+    (
+        at(6, 12, zone=BERLIN), at(7, 10, zone=BERLIN), (time(9), time(17)), True,
+        [(at(6, 12, zone=BERLIN), at(6, 17, zone=BERLIN)), (at(7, 9, zone=BERLIN), at(7, 10, zone=BERLIN))]
+    ),
+    # Saturday 11 and Sunday 12 January are skipped
+    (
+        at(10, 0, zone=BERLIN), at(14, 0, zone=BERLIN), (time(9), time(17)), False,
+        [(at(10, 9, zone=BERLIN), at(10, 17, zone=BERLIN)), (at(13, 9, zone=BERLIN), at(13, 17, zone=BERLIN))]
+    ),
+    # Overnight hours, with the range starting inside the window opened the evening before
+    (
+        at(7, 2, zone=BERLIN), at(7, 23, zone=BERLIN), (time(22), time(6)), True,
+        [(at(7, 2, zone=BERLIN), at(7, 6, zone=BERLIN)), (at(7, 22, zone=BERLIN), at(7, 23, zone=BERLIN))]
+    ),
+])
+def test_working_windows(start, end, hours, include_weekends, expected):
+    assert working_windows(start, end, BERLIN, *hours, include_weekends=include_weekends) == expected
+
+
+def test_working_windows_across_spring_forward():
+    # Clocks in Berlin go from 02:00 to 03:00 on 30 March 2025
+    start = datetime(2025, 3, 29, tzinfo=timezone.utc)
+    end = datetime(2025, 4, 1, tzinfo=timezone.utc)
+    windows = working_windows(start, end, BERLIN, time(9), time(17))
+    assert [window_start.astimezone(timezone.utc).hour for window_start, _ in windows] == [8, 7, 7]
+    assert all(window_end - window_start == 8 * HOUR for window_start, window_end in windows)
+
+
+def test_overnight_window_across_fall_back():
+    # Clocks in Berlin go from 03:00 back to 02:00 on 26 October 2025
+    start = datetime(2025, 10, 25, 12, tzinfo=timezone.utc)
+    end = datetime(2025, 10, 26, 12, tzinfo=timezone.utc)
+    [(window_start, window_end)] = working_windows(start, end, BERLIN, time(22), time(6))
+    assert window_start == datetime(2025, 10, 25, 20, tzinfo=timezone.utc)
+    assert window_end == datetime(2025, 10, 26, 5, tzinfo=timezone.utc)
+    assert window_end - window_start == 9 * HOUR
+    assert free_slots([], [(window_start, window_end)], 9 * HOUR) == [(window_start, window_end)]
+
+
+RANGE = {'start_date': '2025-01-06T00:00:00Z', 'end_date': '2025-01-08T00:00:00Z', 'time_zone': 'UTC'}
+
+
+def find_free_slots(**arguments):
+    mcp = MeteredFastMCP('availability-test')
+    register_google_calendar_tools(mcp)
+
+    async def call():
+        async with Client(mcp) as client:
+            return (await client.call_tool('find_free_slots', dict(RANGE, **arguments)))[0].text
+
+    return asyncio.run(call())
+
+
+@pytest.mark.parametrize('hours, error', [
+    ({'working_hours_start': None}, 'Set both working_hours_start and working_hours_end'),
+    ({'working_hours_end': None}, 'Set both working_hours_start and working_hours_end'),
+    ({'working_hours_start': '09:00', 'working_hours_end': '09:00'}, 'must differ'),
+])
+def test_find_free_slots_rejects_partial_or_empty_working_hours(fake_google, monkeypatch, hours, error):
+    monkeypatch.setattr(credential_manager.get(), 'credentials', Credentials(token='free-slots'))
+    assert error in find_free_slots(**hours)
+
+
+def test_find_free_slots_searches_all_day_without_working_hours(fake_google, monkeypatch):
+    monkeypatch.setattr(credential_manager.get(), 'credentials', Credentials(token='free-slots'))
+    assert find_free_slots(working_hours_start=None, working_hours_end=None).startswith('Found')
+
+
+def test_freebusy_queries_are_retried_on_server_errors(monkeypatch):
+    fake = FakeGoogle(latency=0, calendars=0, events=5, tasklists=0, error_rate=1.0, error_status=503)
+    registry = ServiceRegistry(credential_manager, root_url=fake.start())
+    monkeypatch.setattr(tools.google_calendar, 'services', registry)
+    monkeypatch.setattr(tools.executor, 'backoff_delay', lambda attempt: 0)
+    monkeypatch.setattr(credential_manager.get(), 'credentials', Credentials(token='free-slots-retry'))
+    try:
+        result = find_free_slots()
+    finally:
+        fake.stop()
+    assert result.startswith('Error fetching availability')
+    assert fake.requests == MAX_RETRIES + 1
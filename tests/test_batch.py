@@ -0,0 +1,93 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httplib2
+from fastmcp import Client
+from google.oauth2.credentials import Credentials
+from googleapiclient.errors import HttpError
+
+import tools.batch
+import tools.google_tasks
+from benchmarks.fake_google import FakeGoogle
+from tools.batch import BATCH_SIZE, MAX_ATTEMPTS, execute_bulk
+from tools.google_tasks import register_google_tasks_tools
+from tools.metrics import MeteredFastMCP
+from tools.shared import ServiceRegistry, credential_manager
+
+
+def http_error(status):
+    return HttpError(httplib2.Response({'status': status}), b'{}', uri='https://example.com')
+
+
+def request(index, method='POST'):
+    return SimpleNamespace(index=index, method=method, methodId='tasks.tasks.insert')
+
+
+def run_bulk(monkeypatch, factories, answers):
+    """Run execute_bulk with each batch answered by answers(index, attempt) per request"""
+    batches = []
+    attempts = {}
+
+    async def execute_batch(service, requests):
+        batches.append([request.index for request in requests])
+        for request in requests:
+            attempts[request.index] = attempts.get(request.index, 0) + 1
+        return [answers(request.index, attempts[request.index]) for request in requests]
+
+    monkeypatch.setattr(tools.batch, 'execute_batch', execute_batch)
+    monkeypatch.setattr(tools.batch, 'backoff_delay', lambda attempt: 0)
+    return asyncio.run(execute_bulk(None, factories)), batches
+
+
+def test_requests_are_sent_in_batches_of_batch_size(monkeypatch):
+    count = 2 * BATCH_SIZE + 1
+    results, batches = run_bulk(
+        monkeypatch, [lambda index=index: request(index) for index in range(count)],
+        lambda index, attempt: ({'id': index}, None)
+    )
+    assert [len(batch) for batch in batches] == [BATCH_SIZE, BATCH_SIZE, 1]
+    assert results == [({'id': index}, None) for index in range(count)]
+
+
+def test_only_retryable_failures_are_sent_again(monkeypatch):
+    rate_limited, server_error, failing = http_error(429), http_error(503), http_error(429)
+
+    def answers(index, attempt):
+        if index == 1 and attempt == 1:
+            return None, rate_limited
+        if index == 2:
+            # Inserts may have taken effect, so a server error is final
+            return None, server_error
+        if index == 3:
+            return None, failing
+        return {'id': index}, None
+
+    results, batches = run_bulk(monkeypatch, [lambda index=index: request(index) for index in range(4)], answers)
+    assert batches == [[0, 1, 2, 3], [1, 3]] + [[3]] * (MAX_ATTEMPTS - 2)
+    assert results == [({'id': 0}, None), ({'id': 1}, None), (None, server_error), (None, failing)]
+
+
+def test_add_tasks_bulk_reports_a_result_per_task(monkeypatch):
+    fake = FakeGoogle(latency=0, calendars=0, events=0, tasklists=1, tasks=0)
+    monkeypatch.setattr(tools.google_tasks, 'services', ServiceRegistry(credential_manager, root_url=fake.start()))
+    monkeypatch.setattr(credential_manager.get(), 'credentials', Credentials(token='bulk'))
+    mcp = MeteredFastMCP('tasks-test')
+    register_google_tasks_tools(mcp)
+    titles = [f'Bulk {n}' for n in range(BATCH_SIZE + 5)]
+
+    async def call(tasklist_id):
+        async with Client(mcp) as client:
+            arguments = {'tasks': [{'title': title} for title in titles], 'tasklist_id': tasklist_id, 'output_format': 'json'}
+            return json.loads((await client.call_tool('add_tasks_bulk', arguments))[0].text)
+
+    try:
+        added = asyncio.run(call('list0'))
+        missing = asyncio.run(call('missing'))
+    finally:
+        fake.stop()
+    assert added['added'] == len(titles)
+    assert [task['title'] for task in added['results']] == titles
+    assert [task['title'] for task in fake.tasklists['list0']['tasks']] == titles
+    assert missing['added'] == 0
+    assert all('404' in result['error'] for result in missing['results'])
@@ -0,0 +1,47 @@
+import asyncio
+import json
+
+from fastmcp import Client
+from google.oauth2.credentials import Credentials
+
+import tools.google_tasks
+from benchmarks.fake_google import FakeGoogle
+from tools.cache import TTLCache
+from tools.google_tasks import register_google_tasks_tools
+from tools.metrics import MeteredFastMCP
+from tools.shared import ServiceRegistry, credential_manager
+
+
+def add_tasks(titles):
+    mcp = MeteredFastMCP('tasks-test')
+    register_google_tasks_tools(mcp)
+
+    async def calls():
+        async with Client(mcp) as client:
+            return [
+                json.loads((await client.call_tool('add_task', {'title': title, 'output_format': 'json'}))[0].text)
+                for title in titles
+            ]
+
+    return asyncio.run(calls())
+
+
+def test_default_tasklist_is_looked_up_once_and_again_after_it_is_deleted(monkeypatch):
+    fake = FakeGoogle(latency=0, calendars=0, events=0, tasklists=2, tasks=0)
+    monkeypatch.setattr(tools.google_tasks, 'services', ServiceRegistry(credential_manager, root_url=fake.start()))
+    monkeypatch.setattr(tools.google_tasks, 'default_tasklists', TTLCache(ttl=300))
+    monkeypatch.setattr(credential_manager.get(), 'credentials', Credentials(token='default-tasklist'))
+    try:
+        added = add_tasks(['First', 'Second', 'Third'])
+        # One task list lookup, then one insert per task
+        assert fake.requests == 4
+        assert {task['tasklist_id'] for task in added} == {'list0'}
+
+        del fake.tasklists['list0']
+        [moved] = add_tasks(['Fourth'])
+        # The insert into the deleted list, a fresh lookup and the retried insert
+        assert fake.requests == 7
+        assert moved['tasklist_id'] == 'list1'
+        assert [task['title'] for task in fake.tasklists['list1']['tasks']] == ['Fourth']
+    finally:
+        fake.stop()
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import threading
+import time
+
+import httplib2
+import pytest
+from google.oauth2.credentials import Credentials
+from googleapiclient.errors import HttpError
+
+import tools.executor
+import tools.ratelimit
+from benchmarks.fake_google import FakeGoogle
+from tools.executor import MAX_CONCURRENCY, MAX_RETRIES, execute, is_retryable, retry_delay, run_blocking
+from tools.ratelimit import TokenBucket
+from tools.shared import ServiceRegistry, credential_manager
+
+
+def http_error(status, errors=None, details=None, headers=None):
+    """An HttpError as googleapiclient raises it for a JSON error body"""
+    body = {'error': {'code': status, 'message': 'Fabricated'}}
+    if errors is not None:
+        body['error']['errors'] = [{'reason': reason, 'domain': 'usageLimits'} for reason in errors]
+    if details is not None:
+        body['error']['details'] = [
+            {'@type': 'type.googleapis.com/google.rpc.ErrorInfo', 'reason': reason, 'domain': 'googleapis.com'}
+            for reason in details
+        ]
+    return HttpError(httplib2.Response(dict(headers or {}, status=status)), json.dumps(body).encode(), uri='https://example.com')
+
+
+@pytest.mark.parametrize('error, idempotent, retryable', [
+    (http_error(429), False, True),
+    (http_error(500), True, True),
+    (http_error(503), True, True),
+    (http_error(503), False, False),
+    (http_error(403, errors=['rateLimitExceeded']), False, True),
+    (http_error(403, errors=['userRateLimitExceeded']), True, True),
+    (http_error(403, errors=['rateLimitExceeded'], details=['RATE_LIMIT_EXCEEDED']), True, True),
+    (http_error(403, details=['RATE_LIMIT_EXCEEDED']), True, True),
+    (http_error(403, details=['USER_RATE_LIMIT_EXCEEDED']), False, True),
+    (http_error(403, errors=['forbidden']), True, False),
+    (http_error(403, details=['ACCESS_TOKEN_SCOPE_INSUFFICIENT']), True, False),
+    (http_error(403), True, False),
+    (http_error(404, errors=['notFound']), True, False),
+    (http_error(412, errors=['conditionNotMet']), True, False),
+    (ConnectionError(), True, True),
+    (ConnectionError(), False, False),
+    (ValueError(), True, False),
+])
+def test_is_retryable(error, idempotent, retryable):
+    assert is_retryable(error, idempotent) == retryable
+
+
+@pytest.mark.parametrize('error, attempt, low, high', [
+    (http_error(503), 1, 0, 0.5),
+    (http_error(503), 3, 0, 2),
+    (http_error(503), 10, 0, 16),
+    (http_error(429, headers={'retry-after': '5'}), 1, 5, 5),
+    (http_error(429, headers={'retry-after': '1'}), 10, 1, 16),
+    # Only delays in seconds are honoured
+    (http_error(429, headers={'retry-after': 'Wed, 21 Oct 2026 07:28:00 GMT'}), 1, 0, 0.5),
+    (ConnectionError(), 2, 0, 1),
+])
+def test_retry_delay(error, attempt, low, high):
+    for _ in range(20):
+        assert low <= retry_delay(error, attempt) <= high
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.mark.parametrize('rate, capacity, steps', [
+    # (seconds passed, tokens taken, expected wait)
+    (2, None, [(0, 1, 0), (0, 1, 0), (0, 1, 0.5), (0, 1, 1.0), (1, 1, 0.5)]),
+    (2, None, [(0, 2, 0), (10, 2, 0), (0, 1, 0.5)]),
+    (10, 5, [(0, 5, 0), (0, 5, 0.5), (0.25, 1, 0.35)]),
+    (0.5, None, [(0, 1, 0), (0, 1, 2), (1, 1, 3)]),
+])
+def test_token_bucket(monkeypatch, rate, capacity, steps):
+    clock = Clock()
+    monkeypatch.setattr(tools.ratelimit, 'time', clock)
+    bucket = TokenBucket(rate, capacity)
+    for elapsed, count, wait in steps:
+        clock.now += elapsed
+        assert bucket.reserve(count) == pytest.approx(wait)
+
+
+@pytest.fixture
+def failing_google(monkeypatch):
+    fake = FakeGoogle(latency=0, calendars=0, events=5, tasklists=0, error_rate=1.0, error_status=503)
+    registry = ServiceRegistry(credential_manager, root_url=fake.start())
+    monkeypatch.setattr(tools.executor, 'backoff_delay', lambda attempt: 0)
+    yield fake, registry.get('calendar', 'v3', Credentials(token='failing'))
+    fake.stop()
+
+
+def test_reads_are_retried_on_server_errors(failing_google):
+    fake, service = failing_google
+    with pytest.raises(HttpError):
+        asyncio.run(execute(service.events().list(calendarId='primary')))
+    assert fake.requests == MAX_RETRIES + 1
+
+
+def test_inserts_are_not_retried_on_server_errors(failing_google):
+    fake, service = failing_google
+    body = {'summary': 'Once', 'start': {'dateTime': '2025-01-06T09:00:00Z'}, 'end': {'dateTime': '2025-01-06T10:00:00Z'}}
+    with pytest.raises(HttpError):
+        asyncio.run(execute(service.events().insert(calendarId='primary', body=body)))
+    assert fake.requests == 1
+
+
+def test_identical_reads_in_flight_are_coalesced():
+    fake = FakeGoogle(latency=0.2, calendars=0, events=5, tasklists=0)
+    registry = ServiceRegistry(credential_manager, root_url=fake.start())
+    service = registry.get('calendar', 'v3', Credentials(token='coalesce'))
+
+    async def scenario():
+        return await asyncio.gather(*(execute(service.events().list(calendarId='primary')) for _ in range(5)))
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        fake.stop()
+    assert fake.requests == 1
+    assert all(result == results[0] for result in results)
+
+
+def test_blocking_calls_are_bounded_and_leave_the_event_loop_free():
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.pop()
+
+    async def scenario():
+        ticks = 0
+        calls = asyncio.ensure_future(asyncio.gather(*(run_blocking(call) for _ in range(2 * MAX_CONCURRENCY))))
+        while not calls.done():
+            ticks += 1
+            await asyncio.sleep(0.005)
+        return ticks
+
+    ticks = asyncio.run(scenario())
+    assert max(peak) == MAX_CONCURRENCY
+    # The loop went on serving other work while every worker was busy
+    assert ticks >= 4
+
+
+def test_blocking_call_timeout():
+    with pytest.raises(TimeoutError, match='timed out after 0.01 seconds'):
+        asyncio.run(run_blocking(time.sleep, 0.2, timeout=0.01))
@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+import pytest
+from fastmcp import Client
+from google.oauth2.credentials import Credentials
+
+from tools.google_calendar import register_google_calendar_tools
+from tools.metrics import MeteredFastMCP
+from tools.shared import credential_manager
+
+
+@pytest.mark.parametrize('output_format', ['text', 'json'])
+def test_progress_is_reported_after_each_page(fake_google, monkeypatch, output_format):
+    monkeypatch.setattr(credential_manager.get(), 'credentials', Credentials(token='get-events'))
+    mcp = MeteredFastMCP('events-test')
+    register_google_calendar_tools(mcp)
+    reported = []
+
+    async def progress(progress, total, message):
+        reported.append((progress, total))
+
+    async def call():
+        async with Client(mcp) as client:
+            arguments = {
+                'start_date': '2025-01-06T00:00:00Z', 'end_date': '2025-03-01T00:00:00Z',
+                'limit': 30, 'max_results': 10, 'output_format': output_format
+            }
+            await client.call_tool('get_events', arguments, progress_handler=progress)
+
+    asyncio.run(call())
+    assert reported == [(10, 30), (20, 30), (30, 30)]
+
+
+def test_cursor_resumes_the_calendars_that_did_not_fail(fake_google, monkeypatch):
+    monkeypatch.setattr(credential_manager.get(), 'credentials', Credentials(token='get-events'))
+    mcp = MeteredFastMCP('events-test')
+    register_google_calendar_tools(mcp)
+    start_date, end_date = '2025-01-06T00:00:00Z', '2025-01-13T00:00:00Z'
+
+    async def read_all():
+        pages = []
+        page_token = None
+        async with Client(mcp) as client:
+            while True:
+                arguments = {
+                    'start_date': start_date, 'end_date': end_date,
+                    'calendar_ids': ['primary', 'calendar0@example.com', 'missing@example.com'],
+                    'limit': 7, 'max_results': 3, 'fields': ['id', 'start'],
+                    'output_format': 'json', 'page_token': page_token
+                }
+                result = json.loads((await client.call_tool('get_events', arguments))[0].text)
+                pages.append(result)
+                page_token = result['next_page_token']
+                if not page_token or len(pages) > 20:
+                    return pages
+
+    pages = asyncio.run(read_all())
+    events = [event for page in pages for event in page['events']]
+    expected = [
+        event['id']
+        for calendar_id in ('primary', 'calendar0@example.com')
+        for event in fake_google.calendars[calendar_id]['events']
+        if event['end']['dateTime'] > start_date and event['start']['dateTime'] < end_date
+    ]
+    assert len(pages) > 2
+    # The failed calendar is reported once and left out of the cursor
+    assert list(pages[0]['failures']) == ['missing@example.com']
+    assert all(page['failures'] == {} for page in pages[1:])
+    assert all(len(page['events']) == 7 for page in pages[:-1])
+    assert sorted(event['id'] for event in events) == sorted(expected)
+    starts = [event['start']['dateTime'] for event in events]
+    assert starts == sorted(starts)
+    assert {event['calendar_id'] for event in events} == {'primary', 'calendar0@example.com'}
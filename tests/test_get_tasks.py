@@ -0,0 +1,40 @@
+import asyncio
+import json
+
+import pytest
+from fastmcp import Client
+from google.oauth2.credentials import Credentials
+
+from tools.google_tasks import register_google_tasks_tools
+from tools.metrics import MeteredFastMCP
+from tools.shared import credential_manager
+
+
+@pytest.mark.parametrize('arguments, expected', [
+    ({}, lambda task: True),
+    ({'status': 'needsAction'}, lambda task: task['status'] == 'needsAction'),
+    ({'status': 'completed'}, lambda task: task['status'] == 'completed'),
+    ({'query': 'invoice'}, lambda task: 'invoice' in task['notes']),
+])
+@pytest.mark.parametrize('limit', [70, 250, 1000])
+def test_limit_caps_the_total_and_the_cursor_resumes_across_lists(fake_google, monkeypatch, arguments, expected, limit):
+    monkeypatch.setattr(credential_manager.get(), 'credentials', Credentials(token='get-tasks'))
+    mcp = MeteredFastMCP('tasks-test')
+    register_google_tasks_tools(mcp)
+
+    async def read_all():
+        pages = []
+        page_token = None
+        async with Client(mcp) as client:
+            while True:
+                call = dict(arguments, limit=limit, fields=['id'], output_format='json', page_token=page_token)
+                result = json.loads((await client.call_tool('get_tasks', call))[0].text)
+                pages.append([task['id'] for task in result['tasks']])
+                page_token = result['next_page_token']
+                if not page_token or len(pages) > 20:
+                    return pages
+
+    pages = asyncio.run(read_all())
+    tasks = [task for tasklist in fake_google.tasklists.values() for task in tasklist['tasks'] if expected(task)]
+    assert all(len(page) <= limit for page in pages)
+    assert [task_id for page in pages for task_id in page] == [task['id'] for task in tasks]
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from fastmcp import Client
+from google.oauth2.credentials import Credentials
+
+import tools.executor
+import tools.google_tasks
+from benchmarks.fake_google import FakeGoogle
+from tools.executor import MAX_RETRIES
+from tools.google_tasks import register_google_tasks_tools
+from tools.metrics import MeteredFastMCP, Metrics, metrics
+from tools.shared import ServiceRegistry, credential_manager
+
+
+def test_histogram_buckets_are_cumulative_with_inclusive_upper_bounds():
+    histogram = Metrics(buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 1, 5):
+        histogram.observe('mcp_tool_duration_seconds', value, tool='get_tasks')
+
+    lines = histogram.render().splitlines()
+    assert 'mcp_tool_duration_seconds_bucket{tool="get_tasks",le="0.1"} 2' in lines
+    assert 'mcp_tool_duration_seconds_bucket{tool="get_tasks",le="1"} 4' in lines
+    assert 'mcp_tool_duration_seconds_bucket{tool="get_tasks",le="+Inf"} 5' in lines
+    assert 'mcp_tool_duration_seconds_sum{tool="get_tasks"} 6.65' in lines
+    assert 'mcp_tool_duration_seconds_count{tool="get_tasks"} 5' in lines
+    assert '# TYPE mcp_tool_duration_seconds histogram' in lines
+
+
+@pytest.mark.parametrize('counts, q, expected', [
+    ([2, 2, 0], 0.5, 0.1),
+    ([2, 2, 0], 0.99, 1),
+    ([0, 1, 3], 0.5, None),
+])
+def test_quantile_is_the_upper_bound_of_its_bucket(counts, q, expected):
+    assert Metrics(buckets=(0.1, 1)).quantile(counts, q) == expected
+
+
+def test_counter_labels_are_escaped():
+    counter = Metrics()
+    counter.inc('google_api_errors_total', error='Bad "quote"\\n', method='m', tool='t')
+    counter.inc('google_api_errors_total', 2, error='Bad "quote"\\n', method='m', tool='t')
+    assert 'google_api_errors_total{error="Bad \\"quote\\"\\\\n",method="m",tool="t"} 3' in counter.render().splitlines()
+
+
+def test_failed_calls_are_counted_once_per_tool_call_and_per_api_error(monkeypatch):
+    fake = FakeGoogle(latency=0, calendars=0, events=0, tasklists=1, error_rate=1.0, error_status=503)
+    monkeypatch.setattr(tools.google_tasks, 'services', ServiceRegistry(credential_manager, root_url=fake.start()))
+    monkeypatch.setattr(tools.executor, 'backoff_delay', lambda attempt: 0)
+    monkeypatch.setattr(credential_manager.get(), 'credentials', Credentials(token='metrics'))
+    mcp = MeteredFastMCP('metrics-test')
+    register_google_tasks_tools(mcp)
+    labels = {
+        'mcp_tool_calls_total': (('outcome', 'error'), ('tool', 'get_tasks')),
+        'google_api_calls_total': (('method', 'tasks.tasklists.list'), ('tool', 'get_tasks')),
+        'google_api_retries_total': (('method', 'tasks.tasklists.list'), ('tool', 'get_tasks')),
+        'google_api_errors_total': (('error', 'http_503'), ('method', 'tasks.tasklists.list'), ('tool', 'get_tasks')),
+    }
+    before = {name: metrics.counters(name).get(key, 0) for name, key in labels.items()}
+
+    async def call():
+        async with Client(mcp) as client:
+            return (await client.call_tool('get_tasks', {}))[0].text
+
+    try:
+        assert asyncio.run(call()).startswith('Error')
+    finally:
+        fake.stop()
+    after = {name: metrics.counters(name).get(key, 0) for name, key in labels.items()}
+    assert {name: after[name] - before[name] for name in labels} == {
+        'mcp_tool_calls_total': 1,
+        'google_api_calls_total': MAX_RETRIES + 1,
+        'google_api_retries_total': MAX_RETRIES,
+        'google_api_errors_total': 1,
+    }
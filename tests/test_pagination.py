@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from tools.pagination import SortedMerge, decode_cursor, encode_cursor
+
+
+async def stream(items, fail_after=None):
+    for index, item in enumerate(items):
+        if index == fail_after:
+            raise Exception(f"Stream failed after {index} items")
+        await asyncio.sleep(0)
+        yield item
+
+
+def merged(streams, take=None):
+    async def run():
+        merge = SortedMerge(streams, key=lambda item: item)
+        pairs = []
+        try:
+            async for pair in merge.items():
+                pairs.append(pair)
+                if len(pairs) == take:
+                    break
+            return pairs, merge.heads(), merge.failures
+        finally:
+            await merge.aclose()
+
+    return asyncio.run(run())
+
+
+def test_sorted_merge_yields_items_in_key_order():
+    pairs, heads, failures = merged([stream([1, 4, 7]), stream([]), stream([2, 2, 9, 10]), stream([3])])
+    assert [item for _, item in pairs] == [1, 2, 2, 3, 4, 7, 9, 10]
+    # Equal keys come out in stream order, then each stream in its own order
+    assert pairs[:4] == [(0, 1), (2, 2), (2, 2), (3, 3)]
+    assert heads == []
+    assert failures == {}
+
+
+def test_sorted_merge_heads_hold_the_next_item_of_every_live_stream():
+    pairs, heads, _ = merged([stream([1, 4, 7]), stream([2, 5]), stream([3])], take=3)
+    assert [item for _, item in pairs] == [1, 2, 3]
+    assert sorted(heads) == [(0, 4), (1, 5)]
+
+
+def test_sorted_merge_keeps_going_without_failed_streams():
+    pairs, _, failures = merged([stream([1, 3, 5]), stream([2, 4, 6], fail_after=2), stream([0], fail_after=0)])
+    assert [item for _, item in pairs] == [1, 2, 3, 4, 5]
+    assert sorted(failures) == [1, 2]
+    assert 'after 2 items' in str(failures[1])
+
+
+@pytest.mark.parametrize('cursor', [
+    {'page_size': 250, 'positions': {'primary': [None, 0], 'team@example.com': ['CiAKGjBp', 17]}},
+    {'page_size': 100, 'positions': {'@default': ['token', 3]}, 'recurring': 'series'},
+    {'positions': {'ünïcode/list?': [None, 99]}},
+])
+def test_cursor_round_trip(cursor):
+    encoded = encode_cursor(cursor)
+    assert encoded.isascii()
+    assert decode_cursor(encoded) == cursor
+
+
+def test_invalid_cursor_is_refused():
+    with pytest.raises(Exception, match='Invalid page_token'):
+        decode_cursor('not a cursor')
@@ -0,0 +1,144 @@
+import itertools
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from dateutil.rrule import rruleset, rrulestr
+
+from tools.google_calendar import MAX_COUNTED, expand_series, series_starts, summarize_series
+
+END = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+
+def timed_event(start, zone, *recurrence):
+    start = datetime.fromisoformat(start).replace(tzinfo=ZoneInfo(zone))
+    return {
+        'id': 'series',
+        'start': {'dateTime': start.isoformat(), 'timeZone': zone},
+        'end': {'dateTime': (start + timedelta(hours=1)).isoformat(), 'timeZone': zone},
+        'recurrence': list(recurrence),
+    }
+
+
+def reference_starts(event, end=END):
+    """Occurrence starts of a timed event as computed by dateutil"""
+    zone = ZoneInfo(event['start']['timeZone'])
+    dtstart = datetime.fromisoformat(event['start']['dateTime']).astimezone(zone)
+    rules = rruleset()
+    # dateutil leaves DTSTART out unless the rules generate it, RFC 5545 always counts it
+    rules.rdate(dtstart)
+    for line in event['recurrence']:
+        kind, _, values = line.partition(':')
+        if kind == 'RRULE':
+            rules.rrule(rrulestr(line, dtstart=dtstart))
+            continue
+        # dateutil does not parse TZID parameters on RDATE and EXDATE
+        times = [
+            datetime.strptime(value.rstrip('Z'), '%Y%m%dT%H%M%S').replace(tzinfo=timezone.utc if value.endswith('Z') else zone)
+            for value in values.split(',')
+        ]
+        for value in times:
+            (rules.rdate if kind.startswith('RDATE') else rules.exdate)(value)
+    return list(itertools.takewhile(lambda start: start < end, rules))
+
+
+# Each rule exercises a part of the glue around dateutil: UNTIL, RDATE and
+# EXDATE parsing, DTSTART handling, several rules and DST changes
+RULES = [
+    ('2025-01-06T09:00:00', 'UTC', ['RRULE:FREQ=DAILY;INTERVAL=3;UNTIL=20250301T090000Z']),
+    ('2025-01-06T09:00:00', 'Europe/Berlin', ['RRULE:FREQ=WEEKLY;BYDAY=MO,TU;UNTIL=20250601T000000Z']),
+    # DTSTART on a Wednesday is an occurrence although the rule only makes Mondays
+    ('2025-01-08T09:00:00', 'UTC', ['RRULE:FREQ=WEEKLY;BYDAY=MO;COUNT=5']),
+    # Crosses both DST changes, keeping the local time of day
+    ('2025-03-01T09:30:00', 'America/New_York', ['RRULE:FREQ=DAILY;COUNT=300']),
+    ('2025-03-28T01:30:00', 'Europe/Berlin', ['RRULE:FREQ=WEEKLY;UNTIL=20251231T000000Z']),
+    (
+        '2025-03-03T09:00:00', 'America/New_York',
+        ['RRULE:FREQ=WEEKLY;BYDAY=MO,TH;COUNT=10', 'EXDATE;TZID=America/New_York:20250306T090000,20250313T090000',
+         'RDATE;TZID=America/New_York:20250308T120000']
+    ),
+    ('2025-03-03T09:00:00', 'Europe/Berlin', ['RRULE:FREQ=DAILY;COUNT=10', 'EXDATE:20250305T080000Z']),
+    ('2025-01-06T09:00:00', 'UTC', ['RRULE:FREQ=DAILY;COUNT=3', 'RRULE:FREQ=WEEKLY;COUNT=3;BYDAY=FR']),
+]
+
+
+@pytest.mark.parametrize('start, zone, recurrence', RULES)
+def test_series_starts_match_dateutil(start, zone, recurrence):
+    event = timed_event(start, zone, *recurrence)
+    starts = list(itertools.takewhile(lambda value: value < END, series_starts(event)))
+    assert starts == reference_starts(event)
+    assert all(value.tzinfo == ZoneInfo(zone) for value in starts)
+
+
+@pytest.mark.parametrize('start, zone, recurrence', RULES)
+def test_expand_series_matches_dateutil_in_a_range(start, zone, recurrence):
+    event = timed_event(start, zone, *recurrence)
+    range_start = datetime(2025, 3, 5, 14, tzinfo=timezone.utc)
+    range_end = datetime(2025, 11, 20, tzinfo=timezone.utc)
+    expected = [
+        value for value in reference_starts(event)
+        if value + timedelta(hours=1) > range_start and value < range_end
+    ]
+    assert [start for start, _ in expand_series(event, {}, range_start, range_end)] == expected
+
+
+def test_dtstart_outside_the_rule_is_an_occurrence():
+    event = timed_event('2025-01-08T09:00:00', 'UTC', 'RRULE:FREQ=WEEKLY;BYDAY=MO;COUNT=2', 'EXDATE:20250113')
+    assert [value.isoformat() for value in series_starts(event)] == [
+        '2025-01-08T09:00:00+00:00',
+        '2025-01-20T09:00:00+00:00',
+    ]
+
+
+def test_all_day_series_matches_dateutil():
+    event = {
+        'id': 'series',
+        'start': {'date': '2025-01-31'},
+        'end': {'date': '2025-02-01'},
+        'recurrence': ['RRULE:FREQ=MONTHLY;BYMONTHDAY=-1;UNTIL=20251231', 'EXDATE;VALUE=DATE:20250430'],
+    }
+    rules = rrulestr('\n'.join(event['recurrence']), dtstart=datetime(2025, 1, 31), forceset=True)
+    assert list(series_starts(event)) == [value.date() for value in rules]
+
+
+def test_summarize_series():
+    series = timed_event('2025-01-06T09:00:00', 'UTC', 'RRULE:FREQ=DAILY;COUNT=10')
+    moved = {
+        'id': 'series_20250107T090000Z',
+        'recurringEventId': 'series',
+        'originalStartTime': {'dateTime': '2025-01-07T09:00:00+00:00'},
+        'start': {'dateTime': '2025-01-30T09:00:00+00:00'},
+        'end': {'dateTime': '2025-01-30T10:00:00+00:00'},
+    }
+    cancelled = {
+        'id': 'series_20250108T090000Z',
+        'recurringEventId': 'series',
+        'status': 'cancelled',
+        'originalStartTime': {'dateTime': '2025-01-08T09:00:00+00:00'},
+    }
+    single = {'id': 'single', 'start': {'dateTime': '2025-01-06T12:00:00+00:00'}}
+    range_start = datetime(2025, 1, 6, tzinfo=timezone.utc)
+    range_end = datetime(2025, 1, 10, tzinfo=timezone.utc)
+
+    items = summarize_series([series, moved, cancelled, single], range_start, range_end, max_instances=2)
+
+    assert [item['id'] for item in items] == ['series', 'single']
+    # 6, 7 (moved out of the range), 8 (cancelled) and 9 January
+    assert items[0]['instances'] == {
+        'count': 2,
+        'starts': ['2025-01-06T09:00:00+00:00', '2025-01-09T09:00:00+00:00'],
+    }
+
+
+def test_summarize_series_bounds_the_count():
+    series = timed_event('2025-01-01T00:00:00', 'UTC', 'RRULE:FREQ=DAILY')
+    series['end']['dateTime'] = '2025-01-01T00:01:00+00:00'
+    series['recurrence'] = ['RRULE:FREQ=MINUTELY']
+    [item] = summarize_series([series], datetime(2025, 1, 1, tzinfo=timezone.utc), END, max_instances=1)
+    assert item['instances']['error'].startswith('Unsupported recurrence frequency')
+
+    series['recurrence'] = ['RRULE:FREQ=DAILY']
+    range_end = datetime(2060, 1, 1, tzinfo=timezone.utc)
+    [item] = summarize_series([series], datetime(2025, 1, 1, tzinfo=timezone.utc), range_end, max_instances=1)
+    assert item['instances']['count'] == MAX_COUNTED
+    assert item['instances']['count_is_lower_bound']
@@ -0,0 +1,69 @@
+import asyncio
+
+from google.oauth2.credentials import Credentials
+
+from tools.executor import execute, invalidate_cache
+from tools.metrics import metrics
+from tools.pagination import Pager
+from tools.shared import services
+
+
+def cache_results(namespace):
+    """Cacheable reads of a namespace counted so far, by result"""
+    results = {}
+    for labels, value in metrics.counters('response_cache_requests_total').items():
+        labels = dict(labels)
+        if labels['namespace'] == namespace:
+            results[labels['result']] = results.get(labels['result'], 0) + value
+    return results
+
+
+def test_stale_masked_read_is_revalidated(fake_google):
+    credentials = Credentials(token='revalidate-read')
+    service = services.get('calendar', 'v3', credentials)
+
+    async def read():
+        return await execute(service.calendarList().list(fields='items(id)'), cache='calendars')
+
+    async def scenario():
+        first = await read()
+        invalidate_cache(credentials, 'calendars')
+        before = cache_results('calendars')
+        second = await read()
+        return first, second, before
+
+    first, second, before = asyncio.run(scenario())
+    after = cache_results('calendars')
+    assert second == first
+    assert after.get('revalidated', 0) == before.get('revalidated', 0) + 1
+    assert after.get('miss', 0) == before.get('miss', 0)
+
+
+def test_stale_pager_page_is_revalidated(fake_google):
+    credentials = Credentials(token='revalidate-pages')
+    service = services.get('calendar', 'v3', credentials)
+
+    async def read():
+        pager = Pager(
+            service.events().list,
+            page_size=20,
+            fields='id,summary',
+            cache='events',
+            calendarId='primary',
+            timeMin='2025-01-06T00:00:00Z',
+            timeMax='2025-01-16T00:00:00Z'
+        )
+        return [page async for page in pager.pages()]
+
+    async def scenario():
+        first = await read()
+        invalidate_cache(credentials, 'events')
+        before = cache_results('events')
+        second = await read()
+        return first, second, before
+
+    first, second, before = asyncio.run(scenario())
+    after = cache_results('events')
+    assert len(first) > 1 and second == first
+    assert after.get('revalidated', 0) - before.get('revalidated', 0) == len(first)
+    assert after.get('miss', 0) == before.get('miss', 0)
@@ -0,0 +1,38 @@
+from google.oauth2.credentials import Credentials
+
+from auth.manager import CredentialManager
+from tools.shared import ServiceRegistry
+
+
+def registry_and_server(tmp_path):
+    manager = CredentialManager(token_file=str(tmp_path / 'token.json'))
+    registry = ServiceRegistry(manager, root_url='http://127.0.0.1:9')
+    manager.on_replace = registry.invalidate
+    auth_server = manager.get()
+    auth_server.replace_credentials(Credentials(token='old'))
+    return registry, auth_server
+
+
+def test_services_are_reused_for_the_same_credentials(tmp_path):
+    registry, auth_server = registry_and_server(tmp_path)
+    service = registry.get('tasks', 'v1')
+    assert registry.get('tasks', 'v1') is service
+    assert registry.get('calendar', 'v3') is not service
+
+    # A token refreshed in place keeps the service, whose session wraps the same object
+    auth_server.credentials.token = 'refreshed'
+    assert registry.get('tasks', 'v1') is service
+    assert service._http.credentials is auth_server.credentials
+
+
+def test_replaced_credentials_get_new_services(tmp_path):
+    registry, auth_server = registry_and_server(tmp_path)
+    old = auth_server.credentials
+    old_service = registry.get('tasks', 'v1')
+
+    auth_server.replace_credentials(Credentials(token='new'))
+    service = registry.get('tasks', 'v1')
+
+    assert service is not old_service
+    assert service._http.credentials is auth_server.credentials
+    assert all(cached is not old for cached, _ in registry._services.values())
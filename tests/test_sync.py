@@ -0,0 +1,128 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastmcp import Client
+from google.oauth2.credentials import Credentials
+
+import tools.google_tasks
+from benchmarks.fake_google import FakeGoogle, timestamp
+from sync.store import SyncStore
+from tools.executor import execute
+from tools.google_tasks import register_google_tasks_tools
+from tools.metrics import MeteredFastMCP
+from tools.shared import ServiceRegistry, credential_manager
+from tools.sync import SyncEngine
+
+RANGE = ('2025-01-01T00:00:00Z', '2026-01-01T00:00:00Z')
+
+
+@pytest.fixture
+def google():
+    """A small account of its own, since these tests delete and hide things"""
+    fake = FakeGoogle(latency=0, calendars=0, events=10, tasklists=1, tasks=6)
+    registry = ServiceRegistry(credential_manager, root_url=fake.start())
+    yield fake, registry
+    fake.stop()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return SyncEngine(SyncStore(str(tmp_path / 'sync.db')))
+
+
+def stored_ids(engine, calendar_id='primary'):
+    return [event['id'] for event in engine.store.events(calendar_id, *RANGE)]
+
+
+def test_deleted_event_disappears(google, engine):
+    fake, registry = google
+    service = registry.get('calendar', 'v3', Credentials(token='sync-delete'))
+
+    async def scenario():
+        await engine.sync_calendar(service, 'primary')
+        before = stored_ids(engine)
+        await execute(service.events().delete(calendarId='primary', eventId='0e3'))
+        await engine.sync_calendar(service, 'primary', force=True)
+        return before, stored_ids(engine)
+
+    before, after = asyncio.run(scenario())
+    assert '0e3' in before
+    assert after == [event_id for event_id in before if event_id != '0e3']
+
+
+def test_expired_sync_token_falls_back_to_a_full_resync(google, engine):
+    fake, registry = google
+    service = registry.get('calendar', 'v3', Credentials(token='sync-gone'))
+
+    async def scenario():
+        await engine.sync_calendar(service, 'primary')
+        ghost = dict(fake.calendars['primary']['events'][0], id='ghost')
+        engine.store.apply_events('primary', [ghost])
+        engine.store.set_state('calendar:primary', 'expired')
+        await engine.sync_calendar(service, 'primary', force=True)
+
+    asyncio.run(scenario())
+    assert stored_ids(engine) == sorted(event['id'] for event in fake.calendars['primary']['events'])
+    token, _ = engine.store.get_state('calendar:primary')
+    assert token in fake.calendars['primary']['synced_events']
+
+
+def test_task_deltas_apply_updates_deletes_and_hidden_tasks(google, engine):
+    fake, registry = google
+    service = registry.get('tasks', 'v1', Credentials(token='sync-tasks'))
+    tasks = fake.tasklists['list0']['tasks']
+
+    async def scenario():
+        await engine.sync_tasks(service)
+        full_sync = [task['id'] for task in engine.store.tasks('list0')]
+        await execute(service.tasks().patch(tasklist='list0', task='list0t1', body={'title': 'Renamed'}))
+        await execute(service.tasks().delete(tasklist='list0', task='list0t2'))
+        tasks[3].update(hidden=True, updated=timestamp(datetime.now(timezone.utc)))
+        await engine.sync_tasks(service, force=True)
+        return full_sync
+
+    full_sync = asyncio.run(scenario())
+    assert full_sync == [task['id'] for task in tasks]
+    stored = {task['id']: task for task in engine.store.tasks('list0')}
+    assert stored['list0t1']['title'] == 'Renamed'
+    assert 'list0t2' not in stored
+    assert 'list0t3' not in stored
+    assert 'list0t3' in [task['id'] for task in engine.store.tasks('list0', include_hidden=True)]
+
+
+def test_hidden_completed_tasks_are_returned_in_both_modes(google, engine, monkeypatch):
+    fake, registry = google
+    # Completed in Google's own apps before the first sync
+    fake.tasklists['list0']['tasks'][0]['hidden'] = True
+    monkeypatch.setattr(credential_manager.get(), 'credentials', Credentials(token='sync-hidden'))
+    monkeypatch.setattr(tools.google_tasks, 'services', registry)
+    monkeypatch.setattr(tools.google_tasks, 'sync_engine_for', lambda auth_server: engine)
+    mcp = MeteredFastMCP('sync-test')
+    register_google_tasks_tools(mcp)
+
+    async def completed_ids():
+        async with Client(mcp) as client:
+            result = await client.call_tool('get_tasks', {'status': 'completed', 'output_format': 'json'})
+        return [task['id'] for task in json.loads(result[0].text)['tasks']]
+
+    api = asyncio.run(completed_ids())
+    monkeypatch.setattr(tools.google_tasks, 'SYNC_ENABLED', True)
+    synced = asyncio.run(completed_ids())
+
+    assert api == synced == ['list0t0', 'list0t3']
+
+
+def test_older_store_syncs_its_task_lists_afresh(tmp_path):
+    path = str(tmp_path / 'sync.db')
+    store = SyncStore(path)
+    for resource in ('calendar:primary', 'tasks', 'tasks:list0'):
+        store.set_state(resource, 'token')
+    store.connection.execute("PRAGMA user_version = 0")
+    store.connection.close()
+
+    store = SyncStore(path)
+    assert store.get_state('calendar:primary')[0] == 'token'
+    assert store.get_state('tasks') == (None, None)
+    assert store.get_state('tasks:list0') == (None, None)
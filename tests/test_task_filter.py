@@ -0,0 +1,69 @@
+from datetime import date
+
+import pytest
+
+from tools.google_tasks import TaskFilter
+
+
+def task(status='needsAction', due=None, updated='2025-01-10T12:00:00.000Z', title='Pay invoice', notes=None):
+    task = {'status': status, 'updated': updated, 'title': title}
+    if due:
+        task['due'] = due
+    if notes:
+        task['notes'] = notes
+    return task
+
+
+@pytest.mark.parametrize('criteria, params', [
+    ({}, {}),
+    ({'status': 'needsAction'}, {'showCompleted': False}),
+    ({'status': 'completed'}, {'showHidden': True}),
+    ({'due_after': date(2025, 1, 6)}, {'dueMin': '2025-01-07T00:00:00Z'}),
+    ({'due_before': date(2025, 1, 6)}, {'dueMax': '2025-01-06T00:00:00Z'}),
+    ({'updated_since': '2025-01-01T00:00:00Z'}, {'updatedMin': '2025-01-01T00:00:00Z'}),
+    ({'query': 'invoice'}, {}),
+])
+def test_api_params(criteria, params):
+    assert TaskFilter(**criteria).api_params() == params
+
+
+@pytest.mark.parametrize('criteria, exact, required', [
+    ({}, True, []),
+    ({'status': 'needsAction'}, True, ['status']),
+    ({'status': 'completed'}, False, ['status']),
+    ({'due_before': date(2025, 1, 6), 'updated_since': '2025-01-01T00:00:00Z'}, True, ['due', 'updated']),
+    ({'query': 'invoice'}, False, ['title', 'notes']),
+])
+def test_exactness_and_required_fields(criteria, exact, required):
+    task_filter = TaskFilter(**criteria)
+    assert task_filter.is_exact() == exact
+    assert task_filter.required_fields() == required
+
+
+@pytest.mark.parametrize('criteria, candidate, expected', [
+    ({}, task(), True),
+    ({'status': 'completed'}, task(status='completed'), True),
+    ({'status': 'completed'}, task(), False),
+    ({'status': 'needsAction'}, task(status='completed'), False),
+    # due_after is exclusive of its own day, due_before of its own day too
+    ({'due_after': date(2025, 1, 6)}, task(due='2025-01-06T00:00:00.000Z'), False),
+    ({'due_after': date(2025, 1, 6)}, task(due='2025-01-07T00:00:00.000Z'), True),
+    ({'due_before': date(2025, 1, 6)}, task(due='2025-01-05T00:00:00.000Z'), True),
+    ({'due_before': date(2025, 1, 6)}, task(due='2025-01-06T00:00:00.000Z'), False),
+    ({'due_before': date(2025, 1, 6)}, task(), False),
+    ({'updated_since': '2025-01-10T12:00:00Z'}, task(), True),
+    ({'updated_since': '2025-01-10T12:00:01Z'}, task(), False),
+    ({'updated_since': '2025-01-10T13:00:00+01:00'}, task(), True),
+    # Every word must appear in the title or notes, in any case
+    ({'query': 'INVOICE pay'}, task(), True),
+    ({'query': 'invoice march'}, task(notes='For March'), True),
+    ({'query': 'invoice march'}, task(), False),
+    ({'status': 'needsAction', 'query': 'invoice', 'due_after': date(2025, 1, 1)}, task(due='2025-01-02T00:00:00.000Z'), True),
+])
+def test_matches(criteria, candidate, expected):
+    assert TaskFilter(**criteria).matches(candidate) == expected
+
+
+def test_unknown_status():
+    with pytest.raises(Exception, match="Unknown status 'done'"):
+        TaskFilter(status='done')
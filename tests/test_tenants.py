@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+import auth.manager
+from auth.manager import DEFAULT_TENANT, CredentialManager
+
+
+def manager(monkeypatch, header, request_headers):
+    monkeypatch.delenv('TENANT_HEADER', raising=False)
+    monkeypatch.setattr(auth.manager, 'get_http_headers', lambda include_all: request_headers)
+    return CredentialManager(token_file='token.json', header=header)
+
+
+@pytest.mark.parametrize('header, request_headers, expected', [
+    (None, {}, DEFAULT_TENANT),
+    (None, {'mcp-session-id': 'abc'}, DEFAULT_TENANT),
+    (None, {'x-user': 'alice'}, DEFAULT_TENANT),
+    ('x-user', {'x-user': 'alice'}, 'alice'),
+    ('X-User', {'x-user': 'alice'}, 'alice'),
+    ('mcp-session-id', {'mcp-session-id': 'abc', 'x-user': 'alice'}, 'abc'),
+])
+def test_tenant(monkeypatch, header, request_headers, expected):
+    assert manager(monkeypatch, header, request_headers).tenant() == expected
+
+
+@pytest.mark.parametrize('request_headers', [{}, {'x-user': ''}, {'mcp-session-id': 'abc'}])
+def test_request_without_tenant_header_is_refused(monkeypatch, request_headers):
+    with pytest.raises(Exception, match='Missing the x-user header'):
+        manager(monkeypatch, 'x-user', request_headers).tenant()
+
+
+def test_no_tenant_gets_the_default_token_when_serving_several_accounts(monkeypatch):
+    assert manager(monkeypatch, None, {}).token_path(DEFAULT_TENANT) == 'token.json'
+    path = manager(monkeypatch, 'x-user', {}).token_path(DEFAULT_TENANT)
+    assert path != 'token.json'
+    assert path.startswith(os.path.join('tenants', ''))
@@ -0,0 +1,56 @@
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from google.oauth2.credentials import Credentials
+
+import auth.server
+from auth.server import AuthServer
+
+
+def expiring_credentials(token='old'):
+    credentials = Credentials(token=token, refresh_token='refresh', client_id='client', client_secret='secret')
+    credentials.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=30)
+    return credentials
+
+
+def test_concurrent_callers_share_one_refresh(monkeypatch, tmp_path):
+    auth_server = AuthServer(token_file=str(tmp_path / 'token.json'))
+    auth_server.credentials = expiring_credentials()
+    refreshes = []
+
+    def refresh(request):
+        refreshes.append(threading.get_ident())
+        # Long enough for every caller to be waiting on the refresh in progress
+        time.sleep(0.1)
+        auth_server.credentials.token = 'new'
+        auth_server.credentials.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+
+    monkeypatch.setattr(auth_server.credentials, 'refresh', refresh)
+
+    async def callers():
+        return await asyncio.gather(*(auth_server.get_valid_credentials() for _ in range(10)))
+
+    results = asyncio.run(callers())
+    assert len(refreshes) == 1
+    assert {credentials.token for credentials in results} == {'new'}
+    assert AuthServer(token_file=auth_server.token_file).read_saved_credentials().token == 'new'
+
+
+def test_failed_save_keeps_the_saved_token(monkeypatch, tmp_path):
+    auth_server = AuthServer(token_file=str(tmp_path / 'token.json'))
+    auth_server.save_credentials(expiring_credentials())
+    saved = (tmp_path / 'token.json').read_text()
+
+    def fail(fd):
+        raise OSError('No space left on device')
+
+    monkeypatch.setattr(auth.server.os, 'fsync', fail)
+    with pytest.raises(OSError):
+        auth_server.save_credentials(expiring_credentials('new'))
+
+    assert (tmp_path / 'token.json').read_text() == saved
+    assert os.listdir(tmp_path) == ['token.json']
@@ -0,0 +1,47 @@
+import asyncio
+import json
+import re
+
+from fastmcp import Client
+from google.oauth2.credentials import Credentials
+
+from tools.google_tasks import register_google_tasks_tools
+from tools.metrics import MeteredFastMCP
+from tools.shared import credential_manager
+
+
+def call(mcp, *calls):
+    async def scenario():
+        async with Client(mcp) as client:
+            return [(await client.call_tool(tool, arguments))[0].text for tool, arguments in calls]
+    return asyncio.run(scenario())
+
+
+def test_etag_from_get_tasks_guards_update_task(fake_google, monkeypatch):
+    monkeypatch.setattr(credential_manager.get(), 'credentials', Credentials(token='update-task'))
+    mcp = MeteredFastMCP('tasks-test')
+    register_google_tasks_tools(mcp)
+
+    [listed] = call(mcp, ('get_tasks', {'tasklist_ids': ['list1'], 'limit': 1, 'output_format': 'json'}))
+    [task] = json.loads(listed)['tasks']
+    update = {'task_id': task['id'], 'tasklist_id': 'list1', 'etag': task['etag'], 'output_format': 'json'}
+
+    first, second = call(mcp, ('update_task', dict(update, title='Renamed')), ('update_task', dict(update, title='Again')))
+
+    assert json.loads(first)['title'] == 'Renamed'
+    assert 'changed since' in second
+    [text] = call(mcp, ('get_tasks', {'tasklist_ids': ['list1'], 'limit': 1}))
+    assert f"Etag: {json.loads(first)['etag']}" in text
+
+
+def test_text_output_carries_what_update_task_needs(fake_google, monkeypatch):
+    monkeypatch.setattr(credential_manager.get(), 'credentials', Credentials(token='update-task-text'))
+    mcp = MeteredFastMCP('tasks-test')
+    register_google_tasks_tools(mcp)
+
+    [listed] = call(mcp, ('get_tasks', {'tasklist_ids': ['list2'], 'limit': 1}))
+    task_id, tasklist_id, etag = re.search(r'ID: (\S+), List: (\S+), Etag: (.+)\)$', listed, re.M).groups()
+    [updated] = call(mcp, ('update_task', {'task_id': task_id, 'tasklist_id': tasklist_id, 'etag': etag, 'title': 'Renamed'}))
+
+    assert 'changed since' not in updated
+    assert fake_google.tasklists['list2']['tasks'][0]['title'] == 'Renamed'
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import time
+
+import pytest
+from google.oauth2.credentials import Credentials
+from starlette.middleware import Middleware
+from starlette.testclient import TestClient
+
+import tools.watch
+from auth.manager import DEFAULT_TENANT
+from benchmarks.fake_google import PRIMARY_ADDRESS
+from tools.metrics import MeteredFastMCP
+from tools.shared import credential_manager
+from tools.watch import WatchManager, WatchStartup, register_watch_tools
+
+
+def test_channel_is_not_created_for_a_signed_out_tenant(fake_google, monkeypatch, tmp_path):
+    monkeypatch.setattr(tools.watch, 'WEBHOOK_URL', 'http://127.0.0.1:9/notifications')
+    # The tenant of the current request is signed in, the channel's is not
+    monkeypatch.setattr(credential_manager.get(), 'credentials', Credentials(token='signed-in'))
+    manager = WatchManager(str(tmp_path / 'channels.json'))
+
+    async def scenario():
+        try:
+            await manager.watch('signed-out', 'primary')
+        finally:
+            manager._task.cancel()
+
+    with pytest.raises(Exception, match='not signed in'):
+        asyncio.run(scenario())
+    assert not fake_google.channels
+    assert not manager.channels
+
+
+def test_saved_channels_are_renewed_when_the_server_starts(fake_google, monkeypatch, tmp_path):
+    monkeypatch.setattr(tools.watch, 'WEBHOOK_URL', 'http://127.0.0.1:9/notifications')
+    monkeypatch.setattr(credential_manager.get(), 'credentials', Credentials(token='signed-in'))
+    saved = tmp_path / 'channels.json'
+    saved.write_text(json.dumps([{
+        'id': 'saved', 'token': 'token', 'resource_id': 'resource', 'tenant': DEFAULT_TENANT,
+        'calendar_id': 'primary', 'expiration': time.time() + 60,
+    }]))
+    manager = WatchManager(str(saved))
+    monkeypatch.setattr(tools.watch, 'watch_manager', manager)
+
+    mcp = MeteredFastMCP('watch-test')
+    register_watch_tools(mcp)
+    app = mcp.http_app(path='/mcp', middleware=[Middleware(WatchStartup)])
+    with TestClient(app):
+        deadline = time.monotonic() + 5
+        while 'saved' in manager.channels and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    [channel] = manager.channels.values()
+    assert channel['id'] != 'saved'
+    assert channel['calendar_id'] == 'primary'
+    assert channel['id'] in fake_google.channels
+
+
+def test_channels_of_different_calendars_are_created_concurrently(monkeypatch, tmp_path):
+    manager = WatchManager(str(tmp_path / 'channels.json'))
+    creating = set()
+    overlaps = []
+
+    async def create(tenant, calendar_id):
+        creating.add(calendar_id)
+        await asyncio.sleep(0.01)
+        overlaps.append(sorted(creating))
+        creating.discard(calendar_id)
+        channel = {'id': calendar_id, 'tenant': tenant, 'calendar_id': calendar_id, 'expiration': time.time() + 86400}
+        manager.channels[channel['id']] = channel
+        return channel
+
+    monkeypatch.setattr(manager, '_create', create)
+
+    async def scenario():
+        try:
+            return await asyncio.gather(
+                manager.watch(DEFAULT_TENANT, 'a'), manager.watch(DEFAULT_TENANT, 'b'), manager.watch(DEFAULT_TENANT, 'a')
+            )
+        finally:
+            manager._task.cancel()
+
+    first, second, again = asyncio.run(scenario())
+    assert overlaps == [['a', 'b'], ['b']]
+    # The second watch of a calendar waited for the first and kept its channel
+    assert again is first
+    assert second['calendar_id'] == 'b'
+
+
+def test_notifications_refresh_every_id_of_the_watched_calendar(fake_google, monkeypatch, tmp_path):
+    monkeypatch.setattr(tools.watch, 'WEBHOOK_URL', 'http://127.0.0.1:9/notifications')
+    monkeypatch.setattr(credential_manager.get(), 'credentials', Credentials(token='signed-in'))
+    invalidated = []
+    monkeypatch.setattr(tools.watch, 'invalidate_cache', lambda credentials, *namespaces, resource: invalidated.append(resource))
+    manager = WatchManager(str(tmp_path / 'channels.json'))
+
+    async def scenario():
+        try:
+            channels = [await manager.watch(DEFAULT_TENANT, calendar_id) for calendar_id in (PRIMARY_ADDRESS, 'calendar0@example.com')]
+            for channel in channels:
+                await tools.watch.refresh_calendar(channel['tenant'], tools.watch.channel_calendar_ids(channel))
+            return channels
+        finally:
+            manager._task.cancel()
+            await manager.unwatch(DEFAULT_TENANT, PRIMARY_ADDRESS)
+            await manager.unwatch(DEFAULT_TENANT, 'calendar0@example.com')
+
+    by_address, other = asyncio.run(scenario())
+    assert by_address['calendar_ids'] == [PRIMARY_ADDRESS, 'primary']
+    assert other['calendar_ids'] == ['calendar0@example.com']
+    assert '/calendars/primary/events' in invalidated
+    assert f"/calendars/{PRIMARY_ADDRESS.replace('@', '%40')}/events" in invalidated
+    assert '/calendars/calendar0%40example.com/events' in invalidated
@@ -1,4 +1,4 @@
-from .shared import auth_server
+from .shared import credential_manager
 
 def register_auth_tools(mcp):
     """Register authentication tools with the MCP server"""
@@ -6,6 +6,7 @@ def register_auth_tools(mcp):
     @mcp.tool()
     def test_auth_status() -> str:
         """Check current authentication status"""
+        auth_server = credential_manager.get()
         if auth_server.is_authenticated():
             creds = auth_server.get_credentials()
             if creds and creds.valid:
@@ -14,17 +15,31 @@ def register_auth_tools(mcp):
                 return "⚠️ Authenticated but credentials are expired"
             else:
                 return "❓ Authentication status unclear"
+        elif auth_server.auth_url:
+            return f"⏳ Waiting for sign-in to complete. Open this URL to continue: {auth_server.auth_url}"
+        elif auth_server.auth_error:
+            return f"❌ Not authenticated. Last sign-in failed: {auth_server.auth_error}"
         else:
             return "❌ Not authenticated"
 
     @mcp.tool()
     def authenticate() -> str:
-        """Authenticate with Google Calendar API"""
+        """Authenticate with Google Calendar API
+        
+        Returns immediately with a sign-in URL when consent is needed; use
+        test_auth_status to check when sign-in has completed.
+        """
+        auth_server = credential_manager.get()
         try:
             success = auth_server.authenticate()
             if success:
                 return "✅ Authentication successful! You can now access Google Calendar."
+            elif auth_server.auth_url:
+                return (
+                    f"🔗 Open this URL to sign in with Google: {auth_server.auth_url}\n"
+                    "Then run test_auth_status() to confirm authentication completed."
+                )
             else:
-                return "❌ Authentication failed. Please check your credentials file."
+                return f"❌ Authentication failed. {auth_server.auth_error or 'Please check your credentials file.'}"
         except Exception as e:
             return f"❌ Authentication error: {str(e)}"
\ No newline at end of file
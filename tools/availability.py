@@ -0,0 +1,78 @@
+from datetime import datetime, time, timedelta, timezone
+
+
+def parse_time(value):
+    """Parse an RFC3339 timestamp into an aware datetime"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def merge_intervals(intervals):
+    """Merge overlapping or touching (start, end) intervals into a sorted disjoint list"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def working_windows(start, end, zone, work_start=None, work_end=None, include_weekends=True):
+    """Split a time range into the working-hour windows of each local day in `zone`
+
+    Without working hours the whole range is a single window. Windows are
+    returned in UTC, since subtracting two times in the same zone ignores a
+    DST change between them.
+    """
+    if work_start is None or work_end is None:
+        return [(start, end)]
+
+    windows = []
+    day = start.astimezone(zone).date()
+    if work_end <= work_start:
+        # The range may start inside a window that opened the evening before
+        day -= timedelta(days=1)
+    last_day = end.astimezone(zone).date()
+    while day <= last_day:
+        if include_weekends or day.weekday() < 5:
+            window_start = datetime.combine(day, work_start, tzinfo=zone)
+            window_end = datetime.combine(day, work_end, tzinfo=zone)
+            if work_end <= work_start:
+                window_end += timedelta(days=1)
+            window_start = max(window_start.astimezone(timezone.utc), start)
+            window_end = min(window_end.astimezone(timezone.utc), end)
+            if window_start < window_end:
+                windows.append((window_start, window_end))
+        day += timedelta(days=1)
+    return windows
+
+
+def free_slots(busy, windows, duration):
+    """Find the gaps of at least `duration` between busy intervals within each window
+
+    Both lists must be sorted and disjoint, as returned by merge_intervals and
+    working_windows, so one sweep over the busy list covers every window.
+    """
+    slots = []
+    busy_index = 0
+    for window_start, window_end in windows:
+        while busy_index < len(busy) and busy[busy_index][1] <= window_start:
+            busy_index += 1
+
+        cursor = window_start
+        index = busy_index
+        while index < len(busy) and busy[index][0] < window_end:
+            busy_start, busy_end = busy[index]
+            if busy_start - cursor >= duration:
+                slots.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            index += 1
+        if window_end - cursor >= duration:
+            slots.append((cursor, window_end))
+    return slots
+
+
+def parse_clock(value):
+    """Parse an 'HH:MM' wall clock time"""
+    return time.fromisoformat(value) if value else None
@@ -0,0 +1,46 @@
+import asyncio
+import os
+
+from .executor import backoff_delay, execute_batch, is_retryable
+from .metrics import current_tool, metrics
+
+# Calendar accepts at most 50 calls per batch request; Tasks uses the same limit here.
+BATCH_SIZE = 50
+MAX_ATTEMPTS = int(os.getenv("BATCH_MAX_ATTEMPTS", "4"))
+
+
+async def execute_bulk(service, request_factories):
+    """Run many calls as Google batch requests of up to BATCH_SIZE calls each
+
+    Each factory builds the request for one item; it is called again when that
+    item is retried. Items failing with a retryable error (see is_retryable) are
+    re-sent with exponential backoff, up to MAX_ATTEMPTS times in total.
+    Returns a (response, error) pair per item.
+    """
+    results = [None] * len(request_factories)
+    pending = list(range(len(request_factories)))
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        if attempt > 1:
+            await asyncio.sleep(backoff_delay(attempt - 1))
+
+        retry = []
+        for start in range(0, len(pending), BATCH_SIZE):
+            chunk = pending[start:start + BATCH_SIZE]
+            requests = [request_factories[index]() for index in chunk]
+            try:
+                chunk_results = await execute_batch(service, requests)
+            except Exception as e:
+                chunk_results = [(None, e)] * len(chunk)
+            for index, request, result in zip(chunk, requests, chunk_results):
+                results[index] = result
+                if is_retryable(result[1], request.method != 'POST'):
+                    retry.append(index)
+                    if attempt < MAX_ATTEMPTS:
+                        metrics.inc('google_api_retries_total', tool=current_tool.get(), method=request.methodId)
+
+        pending = retry
+        if not pending:
+            break
+
+    return results
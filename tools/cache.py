@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after being set"""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Get a live entry, marking it as recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store an entry, evicting the least recently used one when full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove an entry and return its value"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ResponseCache:
+    """LRU cache of Google API read responses with per-namespace TTLs
+
+    Keys are (account, namespace, request) tuples. Expired or invalidated entries
+    are kept until evicted so they can be revalidated with their ETag; a 304 Not
+    Modified then costs no response body.
+    """
+
+    def __init__(self, maxsize=512, ttls=None):
+        self.maxsize = maxsize
+        self.ttls = ttls or {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Get (body, etag, fresh) for a cached response, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        body, etag, fresh_until = entry
+        return body, etag, fresh_until > time.monotonic()
+
+    def set(self, key, body, etag=None):
+        """Store a response, fresh for its namespace's TTL"""
+        fresh_until = time.monotonic() + self.ttls.get(key[1], 0)
+        with self._lock:
+            self._entries[key] = (body, etag, fresh_until)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def refresh(self, key):
+        """Mark a revalidated response as fresh again"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], entry[1], time.monotonic() + self.ttls.get(key[1], 0))
+
+    def invalidate(self, account, namespace, resource=None):
+        """Mark every response of an account in a namespace as stale
+
+        With a `resource`, only responses whose request URI contains it are marked,
+        e.g. '/calendars/primary/events' for the events of one calendar.
+        """
+        with self._lock:
+            for key, (body, etag, _) in self._entries.items():
+                if key[0] == account and key[1] == namespace and (resource is None or resource in key[2]):
+                    self._entries[key] = (body, etag, 0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,267 @@
+import asyncio
+import os
+import random
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from googleapiclient.errors import HttpError
+
+from .cache import ResponseCache
+from .metrics import current_tool, error_class, measure_bytes, metrics
+from .ratelimit import RateLimiter
+from .shared import account_key, services
+
+MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "16"))
+FANOUT_CONCURRENCY = int(os.getenv("API_FANOUT_CONCURRENCY", "8"))
+MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "4"))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 16
+# 403 reasons that mean a rate limit, compared as error_reasons() normalizes them
+RATE_LIMIT_REASONS = {'ratelimitexceeded', 'userratelimitexceeded'}
+
+# Seconds a cached read stays fresh, per response cache namespace
+CACHE_TTLS = {
+    'calendars': float(os.getenv("CACHE_TTL_CALENDARS", "300")),
+    'events': float(os.getenv("CACHE_TTL_EVENTS", "30")),
+    'tasklists': float(os.getenv("CACHE_TTL_TASKLISTS", "120")),
+    'tasks': float(os.getenv("CACHE_TTL_TASKS", "30")),
+}
+
+_pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="google-api")
+response_cache = ResponseCache(maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", "512")), ttls=CACHE_TTLS)
+rate_limiter = RateLimiter(
+    api_rate=float(os.getenv("API_RATE_LIMIT", "50")),
+    user_rate=float(os.getenv("API_USER_RATE_LIMIT", "10"))
+)
+_in_flight = {}
+
+
+async def run_blocking(fn, *args, timeout=None):
+    """Run a blocking function on the bounded worker pool without stalling the event loop
+
+    At most API_MAX_CONCURRENCY calls run at once; the rest wait for a free worker.
+    The timeout covers both the wait and the call itself.
+    """
+    if timeout is None:
+        timeout = services.timeout
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(loop.run_in_executor(_pool, fn, *args), timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"Google API call timed out after {timeout:g} seconds") from None
+
+
+async def execute(request, timeout=None, cache=None, idempotent=None):
+    """Execute a googleapiclient request through the central request executor
+
+    Every call is rate limited per API and per user and retried with backoff
+    when Google pushes back (see send()). Identical reads already in flight are
+    coalesced into a single round trip. `idempotent` overrides whether a call
+    is safe to repeat, e.g. for a read sent as a POST.
+
+    Reads can name a response cache namespace (see CACHE_TTLS). A fresh cached
+    response is returned without a round trip; a stale one is revalidated with
+    If-None-Match and reused when Google answers 304 Not Modified.
+    """
+    if request.method != 'GET':
+        return await send(request, timeout=timeout, idempotent=idempotent)
+
+    key = (account_key(request.http.credentials), cache, normalize_uri(request.uri))
+    cached = response_cache.get(key) if cache else None
+    if cached and cached[2]:
+        metrics.inc('response_cache_requests_total', tool=current_tool.get(), namespace=cache, result='hit')
+        return cached[0]
+
+    task = _in_flight.get(key)
+    if task is not None:
+        metrics.inc('google_api_coalesced_total', tool=current_tool.get(), method=request.methodId)
+    else:
+        task = asyncio.ensure_future(_read(request, key, cached, timeout))
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def _read(request, key, cached, timeout):
+    if cached and cached[1]:
+        request.headers['If-None-Match'] = cached[1]
+
+    # Partial responses drop the etag from the body unless the field mask
+    # names it, so the ETag response header is kept as well
+    headers = {}
+    postproc = request.postproc
+
+    def keep_etag(resp, content):
+        headers['etag'] = resp.get('etag')
+        return postproc(resp, content)
+
+    request.postproc = keep_etag
+
+    try:
+        body = await send(request, timeout=timeout)
+    except HttpError as e:
+        if e.resp.status == 304 and cached:
+            metrics.inc('response_cache_requests_total', tool=current_tool.get(), namespace=key[1], result='revalidated')
+            response_cache.refresh(key)
+            return cached[0]
+        raise
+
+    if key[1]:
+        metrics.inc('response_cache_requests_total', tool=current_tool.get(), namespace=key[1], result='miss')
+        response_cache.set(key, body, etag=body.get('etag') or headers.get('etag'))
+    return body
+
+
+async def send(request, timeout=None, idempotent=None):
+    """Send one request on the worker pool, rate limited and retried
+
+    The request is re-bound to the worker thread's own HTTP session for the same
+    credentials, since httplib2 sessions cannot be shared between threads.
+    Rate-limit errors are retried for every call; server errors only for calls
+    that are safe to repeat, so an insert is never duplicated. Calls other than
+    POST are safe to repeat unless `idempotent` says otherwise.
+    """
+    credentials = request.http.credentials
+    account = account_key(credentials)
+    api = request.methodId.split('.')[0]
+    if idempotent is None:
+        idempotent = request.method != 'POST'
+    tool = current_tool.get()
+    measure_bytes(request, request.methodId)
+
+    def call():
+        return request.execute(http=services.http(credentials))
+
+    for attempt in range(1, MAX_RETRIES + 2):
+        await rate_limiter.acquire(api, account)
+        metrics.inc('google_api_calls_total', tool=tool, method=request.methodId)
+        start = time.perf_counter()
+        try:
+            return await run_blocking(call, timeout=timeout)
+        except Exception as e:
+            if attempt > MAX_RETRIES or not is_retryable(e, idempotent):
+                if not (isinstance(e, HttpError) and e.resp.status == 304):
+                    metrics.inc('google_api_errors_total', tool=tool, method=request.methodId, error=error_class(e))
+                raise
+            metrics.inc('google_api_retries_total', tool=tool, method=request.methodId)
+            await asyncio.sleep(retry_delay(e, attempt))
+        finally:
+            metrics.observe('google_api_duration_seconds', time.perf_counter() - start, method=request.methodId)
+
+
+def invalidate_cache(credentials, *namespaces, resource=None):
+    """Mark cached responses of an account as stale after a write, optionally only those of one resource"""
+    account = account_key(credentials)
+    for namespace in namespaces:
+        response_cache.invalidate(account, namespace, resource)
+
+
+def normalize_uri(uri):
+    """Order query parameters so equivalent requests share a cache key"""
+    parsed = urllib.parse.urlsplit(uri)
+    query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parsed.query)))
+    return urllib.parse.urlunsplit(parsed._replace(query=query))
+
+
+async def gather_bounded(calls, limit=None):
+    """Await coroutines concurrently, at most `limit` at a time
+
+    Results come back in input order; a call that fails yields its exception
+    instead of cancelling the others, so callers can report partial failures.
+    """
+    semaphore = asyncio.Semaphore(limit or FANOUT_CONCURRENCY)
+
+    async def bounded(call):
+        async with semaphore:
+            return await call
+
+    return await asyncio.gather(*(bounded(call) for call in calls), return_exceptions=True)
+
+
+async def execute_batch(service, requests, timeout=None):
+    """Send requests as one Google batch HTTP request
+
+    Returns a (response, error) pair per request, in input order.
+    """
+    results = [None] * len(requests)
+
+    def callback(request_id, response, exception):
+        results[int(request_id)] = (response, exception)
+
+    batch = service.new_batch_http_request(callback=callback)
+    for index, request in enumerate(requests):
+        measure_bytes(request, request.methodId)
+        batch.add(request, request_id=str(index))
+
+    credentials = requests[0].http.credentials
+
+    def call():
+        batch.execute(http=services.http(credentials))
+
+    await rate_limiter.acquire(requests[0].methodId.split('.')[0], account_key(credentials), len(requests))
+    tool = current_tool.get()
+    metrics.inc('google_api_calls_total', tool=tool, method='batch')
+    start = time.perf_counter()
+    try:
+        await run_blocking(call, timeout=timeout)
+    except Exception as e:
+        metrics.inc('google_api_errors_total', tool=tool, method='batch', error=error_class(e))
+        raise
+    finally:
+        metrics.observe('google_api_duration_seconds', time.perf_counter() - start, method='batch')
+
+    for request, (_, error) in zip(requests, results):
+        if error is not None:
+            metrics.inc('google_api_errors_total', tool=tool, method=request.methodId, error=error_class(error))
+    return results
+
+
+def is_retryable(error, idempotent=True):
+    """Whether a failed call may succeed if retried later
+
+    Rate-limit responses mean the call was rejected before doing anything.
+    Server and connection errors leave it unknown whether the call took effect,
+    so they only count when the call is idempotent.
+    """
+    if isinstance(error, ConnectionError):
+        return idempotent
+    if not isinstance(error, HttpError):
+        return False
+    status = error.resp.status
+    if status == 429:
+        return True
+    if status >= 500:
+        return idempotent
+    if status == 403:
+        return bool(error_reasons(error) & RATE_LIMIT_REASONS)
+    return False
+
+
+def error_reasons(error):
+    """Reasons given in an HttpError, lowercased and without underscores
+
+    Google names them in camelCase in the legacy `errors` list
+    (rateLimitExceeded) and in upper snake case in the ErrorInfo of `details`
+    (RATE_LIMIT_EXCEEDED), which HttpError.error_details prefers when present.
+    """
+    details = error.error_details if isinstance(error.error_details, list) else []
+    return {
+        str(detail.get('reason', '')).replace('_', '').lower()
+        for detail in details if isinstance(detail, dict)
+    }
+
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter for the given retry attempt (1-based)"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+def retry_delay(error, attempt):
+    """Backoff delay for a retry, never shorter than a Retry-After the server asked for"""
+    delay = backoff_delay(attempt)
+    retry_after = error.resp.get('retry-after') if isinstance(error, HttpError) else None
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, float(retry_after))
+    return delay
@@ -1,21 +1,276 @@
-from googleapiclient.discovery import build
-from .shared import auth_server
+import itertools
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, Union
+from zoneinfo import ZoneInfo
+
+from dateutil.rrule import rruleset, rrulestr
+from fastmcp import Context
+from pydantic import BaseModel
+
+from sync.store import normalize_time
+from .availability import free_slots, merge_intervals, parse_clock, parse_time, working_windows
+from .batch import execute_bulk
+from .executor import execute, gather_bounded, invalidate_cache
+from .output import field_mask, json_output, select_fields, to_json
+from .pagination import Pager, SortedMerge, decode_cursor, encode_cursor, page_items
+from .shared import credential_manager, services
+from .sync import SYNC_ENABLED, sync_engine_for
+
+# Calendars a single freebusy query may cover
+FREEBUSY_MAX_CALENDARS = 50
+
+# Fields returned in JSON output unless a call asks for others
+CALENDAR_FIELDS = ['id', 'summary']
+EVENT_FIELDS = ['id', 'summary', 'start', 'end']
+# Fields the summary of recurring series needs
+SERIES_FIELDS = ['id', 'status', 'start', 'end', 'recurrence', 'recurringEventId', 'originalStartTime']
+
+RECURRING_MODES = ('expand', 'series')
+# Events read from one calendar in recurring='series' mode before the call fails
+SERIES_MAX_EVENTS = int(os.getenv("SERIES_MAX_EVENTS", "10000"))
+# Occurrences of one series counted in a range before the count is reported as a lower bound
+MAX_COUNTED = 10000
+# Finer rules would be walked minute by minute from the first occurrence
+SERIES_FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+
+
+class NewEvent(BaseModel):
+    summary: str
+    description: str
+    start_date: str
+    end_date: str
+
+
+def event_start(event):
+    """Sortable UTC start time of an event, for merging events across calendars
+
+    A summarized recurring series sorts by its first occurrence in range.
+    """
+    instances = event.get('instances')
+    if instances and instances['starts']:
+        return normalize_time(instances['starts'][0])
+    start = event.get('start', {})
+    return normalize_time(start.get('dateTime', start.get('date'))) or ''
+
+
+def format_series(event):
+    """Describe a summarized recurring series on one line"""
+    instances = event['instances']
+    rules = '; '.join(event['recurrence'])
+    if instances['count'] is None:
+        return f"repeats {rules} (could not expand: {instances['error']})"
+    count = f"{instances['count']}+" if instances.get('count_is_lower_bound') else instances['count']
+    starts = ', '.join(instances['starts'])
+    more = instances['count'] - len(instances['starts'])
+    if more > 0:
+        starts += f" and {more}{'+' if instances.get('count_is_lower_bound') else ''} more"
+    return f"repeats {rules}, {count} occurrences in range: {starts}"
+
+
+def ical_time(value, zone, dtstart, tzid=None):
+    """Parse an iCalendar DATE or DATE-TIME of a recurring event like its DTSTART
+
+    All-day events (no `zone`) get naive midnights. Timed events get aware
+    times: a DATE takes the time of day of `dtstart`, and a floating time is
+    read in `tzid` or else the event's zone.
+    """
+    if zone is None:
+        return datetime.strptime(value[:8], '%Y%m%d')
+    if len(value) == 8:
+        return datetime.combine(datetime.strptime(value, '%Y%m%d').date(), dtstart.timetz())
+    parsed = datetime.strptime(value.rstrip('Z'), '%Y%m%dT%H%M%S')
+    if value.endswith('Z'):
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.replace(tzinfo=ZoneInfo(tzid) if tzid else zone)
+
+
+def series_rules(event):
+    """Build the dateutil rule set of a recurring event and say whether it is all-day
+
+    Unlike dateutil, RFC 5545 always counts DTSTART as an occurrence, so it
+    is added as an RDATE. UNTIL, RDATE and EXDATE values are parsed here, as
+    dateutil rejects the TZID and VALUE=DATE forms Google writes and UNTIL
+    values whose type differs from DTSTART.
+    """
+    start = event['start']
+    if 'date' in start:
+        zone = None
+        dtstart = datetime.combine(date.fromisoformat(start['date']), datetime.min.time())
+    else:
+        zone = ZoneInfo(start['timeZone']) if start.get('timeZone') else parse_time(start['dateTime']).tzinfo
+        dtstart = parse_time(start['dateTime']).astimezone(zone)
+
+    rules = rruleset()
+    rules.rdate(dtstart)
+    for line in event.get('recurrence', []):
+        head, _, values = line.partition(':')
+        kind, *params = head.split(';')
+        kind = kind.upper()
+        params = {name.upper(): value for name, _, value in (param.partition('=') for param in params)}
+        if kind == 'RRULE':
+            parts = dict(part.partition('=')[::2] for part in values.upper().split(';'))
+            if parts.get('FREQ') not in SERIES_FREQUENCIES:
+                raise Exception(f"Unsupported recurrence frequency {parts.get('FREQ')}")
+            until = parts.pop('UNTIL', None)
+            rule = rrulestr(';'.join(f"{name}={value}" for name, value in parts.items()), dtstart=dtstart)
+            if until:
+                rule = rule.replace(until=ical_time(until, zone, dtstart))
+            rules.rrule(rule)
+        elif kind in ('RDATE', 'EXDATE'):
+            for value in values.split(','):
+                if value:
+                    (rules.rdate if kind == 'RDATE' else rules.exdate)(ical_time(value, zone, dtstart, params.get('TZID')))
+    return rules, zone is None
+
+
+def series_starts(event):
+    """Yield the start of every occurrence of a recurring event in order
+
+    Starts are dates for all-day events and aware times in the event's time
+    zone otherwise.
+    """
+    rules, all_day = series_rules(event)
+    for value in rules:
+        yield value.date() if all_day else value
+
+
+def instant(value):
+    """Aware datetime of a start or end, all-day dates taken at midnight UTC"""
+    if isinstance(value, datetime):
+        return value
+    return datetime(value.year, value.month, value.day, tzinfo=timezone.utc)
+
+
+def event_times(event):
+    """Parsed (start, end) of an event, as dates for all-day events"""
+    start, end = event['start'], event['end']
+    if 'date' in start:
+        return date.fromisoformat(start['date']), date.fromisoformat(end['date'])
+    return parse_time(start['dateTime']), parse_time(end['dateTime'])
+
+
+def expand_series(event, exceptions, range_start, range_end):
+    """Yield the (start, end) of each occurrence of a recurring event overlapping a time range
+
+    Occurrences are generated lazily and only up to the end of the range.
+    `exceptions` maps the normalized original start of modified or cancelled
+    occurrences to their event; matching occurrences are moved or skipped and
+    their entries removed from the dict.
+    """
+    start, end = event_times(event)
+    duration = end - start
+    for occurrence in series_starts(event):
+        if instant(occurrence) >= range_end:
+            return
+        if instant(occurrence + duration) <= range_start:
+            continue
+        exception = exceptions.pop(normalize_time(occurrence.isoformat()), None)
+        if exception is None:
+            times = (occurrence, occurrence + duration)
+        elif exception.get('status') == 'cancelled':
+            continue
+        else:
+            times = event_times(exception)
+        if instant(times[0]) < range_end and instant(times[1]) > range_start:
+            yield times
+
+
+def summarize_series(events, range_start, range_end, max_instances):
+    """Collapse the events of an unexpanded events.list into single events and series summaries
+
+    Each recurring event gets an `instances` entry with the number of its
+    occurrences in the range and the starts of the first `max_instances`.
+    Exceptions are folded into their series; those whose series is missing, or
+    whose original time lies outside the range, are kept as single events.
+    Series without occurrences in the range are dropped.
+    """
+    exceptions = {}
+    for event in events:
+        if event.get('recurringEventId') and event.get('originalStartTime'):
+            original = event['originalStartTime']
+            key = normalize_time(original.get('dateTime', original.get('date')))
+            exceptions.setdefault(event['recurringEventId'], {})[key] = event
+
+    items = []
+    for event in events:
+        if event.get('recurringEventId') or event.get('status') == 'cancelled':
+            continue
+        if not event.get('recurrence'):
+            items.append(event)
+            continue
+
+        try:
+            occurrences = expand_series(event, exceptions.get(event['id'], {}), range_start, range_end)
+            starts = []
+            count = 0
+            for start, _ in itertools.islice(occurrences, MAX_COUNTED):
+                if len(starts) < max_instances:
+                    starts.append(start.isoformat())
+                count += 1
+        except Exception as e:
+            items.append(dict(event, instances={'count': None, 'starts': [], 'error': str(e)}))
+            continue
+
+        if count:
+            instances = {'count': count, 'starts': starts}
+            if count == MAX_COUNTED:
+                instances['count_is_lower_bound'] = True
+            items.append(dict(event, instances=instances))
+
+    for series_exceptions in exceptions.values():
+        items.extend(event for event in series_exceptions.values() if event.get('status') != 'cancelled')
+    return items
+
+
+def event_body(summary, description, start_date, end_date):
+    """Build the request body for a new event"""
+    return {
+        'summary': summary,
+        'description': description,
+        'start': {
+            'dateTime': start_date,
+            'timeZone': 'Asia/Kolkata'
+        },
+        'end': {
+            'dateTime': end_date,
+            'timeZone': 'Asia/Kolkata'
+        }
+    }
+
 
 def register_google_calendar_tools(mcp):
     """Register Google Calendar tools with the MCP server"""
+
+    async def list_calendars(service, fields=None):
+        """Helper function to get every calendar in the user's calendar list"""
+        calendars = []
+        async for page in Pager(service.calendarList().list, page_size=250, fields=fields, cache='calendars').pages():
+            calendars.extend(page)
+        return calendars
     
     @mcp.tool()
-    def get_all_calendars() -> str:
-        """Get all calendars from the Google Calendar API"""
+    async def get_all_calendars(output_format: Optional[str] = None, fields: Optional[list[str]] = None) -> str:
+        """Get all calendars from the Google Calendar API
+        
+        Args:
+            output_format: 'text' or 'json' for compact structured output
+                    (default set by the server, normally 'text')
+            fields: Calendar fields to return in JSON output (default id and summary)
+        """
+        auth_server = credential_manager.get()
         if not auth_server.is_authenticated():
             return "Not authenticated. Please run authenticate() first."
         
         try:
-            credentials = auth_server.get_credentials()
-            service = build('calendar', 'v3', credentials=credentials)
-            calendars_result = service.calendarList().list().execute()
-            calendars = calendars_result.get('items', [])
+            as_json = json_output(output_format)
+            fields = fields or CALENDAR_FIELDS
+            credentials = await auth_server.get_valid_credentials()
+            service = services.get('calendar', 'v3', credentials)
+            calendars = await list_calendars(service, field_mask(fields if as_json else CALENDAR_FIELDS))
 
+            if as_json:
+                return to_json({'calendars': [select_fields(calendar, fields) for calendar in calendars]})
             if not calendars:
                 return "No calendars found"
             calendar_list = []
@@ -27,7 +282,19 @@ def register_google_calendar_tools(mcp):
             return f"Error fetching calendars: {str(e)}"
 
     @mcp.tool()
-    def get_events(start_date: str, end_date: str) -> str:
+    async def get_events(
+        start_date: str,
+        end_date: str,
+        calendar_ids: Union[list[str], str] = 'primary',
+        max_results: Optional[int] = None,
+        limit: int = 250,
+        page_token: Optional[str] = None,
+        output_format: Optional[str] = None,
+        fields: Optional[list[str]] = None,
+        recurring: str = 'expand',
+        max_instances: int = 5,
+        ctx: Optional[Context] = None
+    ) -> str:
         """Get events from the Google Calendar API
         
         Args:
@@ -38,40 +305,203 @@ def register_google_calendar_tools(mcp):
                     Must be an RFC3339 timestamp with mandatory time zone offset.
                     Examples: '2011-06-03T10:00:00-07:00', '2011-06-03T10:00:00Z'
                     Must be greater than start_date.
+            calendar_ids: Calendar ID or list of IDs to read from, or 'all' for every
+                    calendar in get_all_calendars (default 'primary'). Events from
+                    several calendars are merged in start time order.
+            max_results: Number of events fetched per page and calendar, up to 2500 (optional).
+            limit: Maximum number of events to return in this call (default 250).
+            page_token: Cursor returned by a previous call with the same dates and
+                    calendars, to continue where it stopped (optional).
+            output_format: 'text' or 'json' for compact structured output
+                    (default set by the server, normally 'text')
+            fields: Event fields to return in JSON output, e.g. ['id', 'summary',
+                    'location'] (default id, summary, start and end)
+            recurring: 'expand' to return every occurrence of recurring events as its
+                    own event (default), or 'series' to return each recurring event once
+                    with its recurrence rules, the number of its occurrences in range and
+                    the start of the first few. 'series' is much smaller for long ranges.
+            max_instances: Occurrence starts listed per series with recurring='series' (default 5).
         
         Returns:
             String containing list of events or error message
         """
+        auth_server = credential_manager.get()
         if not auth_server.is_authenticated():
             return "Not authenticated. Please run authenticate() first."
         
+        merge = None
         try:
-            credentials = auth_server.get_credentials()
-            service = build('calendar', 'v3', credentials=credentials)
+            as_json = json_output(output_format)
+            fields = fields or EVENT_FIELDS
+            credentials = await auth_server.get_valid_credentials()
+            sync_engine = sync_engine_for(auth_server)
+            service = services.get('calendar', 'v3', credentials)
 
-            events_result = service.events().list(
-                calendarId='primary',
-                timeMin=start_date,
-                timeMax=end_date,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            events = events_result.get('items', [])
-
-            if not events:
-                return "No events found"
+            if calendar_ids == 'all' or calendar_ids == ['all']:
+                calendar_ids = [calendar['id'] for calendar in await list_calendars(service, 'id')]
+            elif isinstance(calendar_ids, str):
+                calendar_ids = [calendar_ids]
+
+            # The cursor records, for every calendar not yet exhausted, the page
+            # holding its next event and that event's index in the page.
+            if page_token:
+                cursor = decode_cursor(page_token)
+                page_size = cursor['page_size']
+                positions = cursor['positions']
+                recurring = cursor.get('recurring', 'expand')
+            else:
+                page_size = max_results or min(limit, 250)
+                positions = {calendar_id: [None, 0] for calendar_id in calendar_ids}
+            calendar_ids = list(positions)
+            if recurring not in RECURRING_MODES:
+                raise Exception(f"Unknown recurring mode '{recurring}', expected 'expand' or 'series'")
+            if limit < 1:
+                raise Exception("limit must be at least 1")
+            if max_results is not None and max_results < 1:
+                raise Exception("max_results must be at least 1")
+            if max_instances < 1:
+                raise Exception("max_instances must be at least 1")
+            series = recurring == 'series'
+
+            failures = {}
+            if SYNC_ENABLED and not series:
+                results = await gather_bounded(
+                    sync_engine.sync_calendar(service, calendar_id) for calendar_id in calendar_ids
+                )
+                failures = {
+                    calendar_id: result
+                    for calendar_id, result in zip(calendar_ids, results)
+                    if isinstance(result, Exception)
+                }
+                calendar_ids = [calendar_id for calendar_id in calendar_ids if calendar_id not in failures]
+
+            async def series_items(calendar_id, skip):
+                # Series are summarized and sorted once every page of the calendar is in,
+                # so the cursor only records how many items were already returned.
+                # Continuations read the range again, which the response cache mostly
+                # answers, and ranges too busy to hold in memory are refused.
+                events = []
+                pager = Pager(
+                    service.events().list,
+                    limit=SERIES_MAX_EVENTS + 1,
+                    page_size=2500,
+                    fields=field_mask(fields if as_json else ['summary'], required=SERIES_FIELDS),
+                    cache='events',
+                    calendarId=calendar_id,
+                    timeMin=start_date,
+                    timeMax=end_date,
+                    singleEvents=False
+                )
+                async for page in pager.pages():
+                    events.extend(page)
+                if len(events) > SERIES_MAX_EVENTS:
+                    raise Exception(
+                        f"More than {SERIES_MAX_EVENTS} events in range, too many to summarize; "
+                        "narrow the date range or use recurring='expand'"
+                    )
+                items = summarize_series(events, parse_time(start_date), parse_time(end_date), max_instances)
+                items.sort(key=event_start)
+                for index in range(skip, len(items)):
+                    yield items[index], None, index
+
+            def events_pager(calendar_id):
+                if SYNC_ENABLED:
+                    return sync_engine.events_pager(
+                        calendar_id,
+                        start_date,
+                        end_date,
+                        page_size=page_size,
+                        page_token=positions[calendar_id][0]
+                    )
+                return Pager(
+                    service.events().list,
+                    page_size=page_size,
+                    page_token=positions[calendar_id][0],
+                    fields=field_mask(fields, required=['start']) if as_json else 'summary,start',
+                    cache='events',
+                    calendarId=calendar_id,
+                    timeMin=start_date,
+                    timeMax=end_date,
+                    singleEvents=True,
+                    orderBy='startTime'
+                )
+
+            merge = SortedMerge(
+                (
+                    series_items(calendar_id, positions[calendar_id][1]) if series
+                    else page_items(events_pager(calendar_id), skip=positions[calendar_id][1])
+                    for calendar_id in calendar_ids
+                ),
+                key=lambda entry: event_start(entry[0])
+            )
             event_list = []
-            for event in events:
-                start = event['start'].get('dateTime', event['start'].get('date'))
-                summary = event.get('summary', 'No title')
-                event_list.append(f"• {summary} - {start}")
-            
-            return f"Found {len(events)} events:\n" + "\n".join(event_list)
+            next_positions = {}
+            async for index, (event, event_page_token, event_index) in merge.items():
+                if len(event_list) == limit:
+                    next_positions[calendar_ids[index]] = [event_page_token, event_index]
+                    for head_index, (_, head_page_token, head_event_index) in merge.heads():
+                        next_positions[calendar_ids[head_index]] = [head_page_token, head_event_index]
+                    break
+
+                instances = event.get('instances')
+                if as_json:
+                    selected = select_fields(event, fields)
+                    if instances:
+                        selected['recurrence'] = event['recurrence']
+                        selected['instances'] = instances
+                    if len(positions) > 1:
+                        selected['calendar_id'] = calendar_ids[index]
+                    event_list.append(selected)
+                else:
+                    start = event['start'].get('dateTime', event['start'].get('date'))
+                    summary = event.get('summary', 'No title')
+                    line = f"• {summary} - {start}"
+                    if instances:
+                        line = f"• {summary} - {format_series(event)}"
+                    if len(positions) > 1:
+                        line += f" [{calendar_ids[index]}]"
+                    event_list.append(line)
+                if ctx and len(event_list) % page_size == 0:
+                    await ctx.report_progress(len(event_list), limit)
+
+            for index, error in merge.failures.items():
+                failures[calendar_ids[index]] = error
+
+            next_page_token = None
+            if next_positions:
+                next_page_token = encode_cursor({'page_size': page_size, 'positions': next_positions, 'recurring': recurring})
+
+            if as_json:
+                return to_json({
+                    'events': event_list,
+                    'next_page_token': next_page_token,
+                    'failures': {calendar_id: str(error) for calendar_id, error in failures.items()}
+                })
+
+            if not event_list and not failures:
+                return "No events found"
+
+            response = f"Found {len(event_list)} events:\n" + "\n".join(event_list)
+            if next_page_token:
+                response += f"\n\nMore events available. Call again with page_token='{next_page_token}' to continue."
+            if failures:
+                failed_calendars = [f"• {calendar_id}: {str(error)}" for calendar_id, error in failures.items()]
+                response += f"\n\n⚠️ Could not fetch {len(failures)} calendars:\n" + "\n".join(failed_calendars)
+            return response
         except Exception as e:
             return f"Error fetching events: {str(e)}"
+        finally:
+            if merge:
+                await merge.aclose()
 
     @mcp.tool()
-    def create_event(summary: str, description: str, start_date: str, end_date: str) -> str:
+    async def create_event(
+        summary: str,
+        description: str,
+        start_date: str,
+        end_date: str,
+        output_format: Optional[str] = None
+    ) -> str:
         """Create an event in the Google Calendar API
         
         Args:
@@ -79,27 +509,211 @@ def register_google_calendar_tools(mcp):
             description: The description of the event
             start_date: The start date of the event
             end_date: The end date of the event
+            output_format: 'text' or 'json' to return the created event's ID and times
         """
+        auth_server = credential_manager.get()
         if not auth_server.is_authenticated():
             return "Not authenticated. Please run authenticate() first."
         
         try:
-            credentials = auth_server.get_credentials()
-            service = build('calendar', 'v3', credentials=credentials)
+            as_json = json_output(output_format)
+            credentials = await auth_server.get_valid_credentials()
+            sync_engine = sync_engine_for(auth_server)
+            service = services.get('calendar', 'v3', credentials)
             
-            event = service.events().insert(calendarId='primary', body={
-                'summary': summary,
-                'description': description,
-                'start': {
-                    'dateTime': start_date,
-                    'timeZone': 'Asia/Kolkata'
-                },
-                'end': {
-                    'dateTime': end_date,
-                    'timeZone': 'Asia/Kolkata'
-                }
-            }).execute()
+            event = await execute(service.events().insert(
+                calendarId='primary',
+                body=event_body(summary, description, start_date, end_date)
+            ))
+            invalidate_cache(credentials, 'events')
+            await sync_engine.record_event('primary', event)
 
+            if as_json:
+                return to_json(select_fields(event, EVENT_FIELDS))
             return f"Event created: {event['summary']}"
         except Exception as e:
             return f"Error creating event: {str(e)}"
+
+    @mcp.tool()
+    async def create_events_bulk(events: list[NewEvent], output_format: Optional[str] = None) -> str:
+        """Create many events in the Google Calendar API using batch requests
+        
+        Args:
+            events: The events to create, each with a summary, description,
+                    start_date and end_date as for create_event
+            output_format: 'text' or 'json' for a result per event, in input order
+        """
+        auth_server = credential_manager.get()
+        if not auth_server.is_authenticated():
+            return "Not authenticated. Please run authenticate() first."
+
+        if not events:
+            return "No events provided."
+
+        try:
+            as_json = json_output(output_format)
+            credentials = await auth_server.get_valid_credentials()
+            sync_engine = sync_engine_for(auth_server)
+            service = services.get('calendar', 'v3', credentials)
+
+            results = await execute_bulk(service, [
+                lambda event=event: service.events().insert(
+                    calendarId='primary',
+                    body=event_body(event.summary, event.description, event.start_date, event.end_date)
+                )
+                for event in events
+            ])
+
+            invalidate_cache(credentials, 'events')
+
+            created = 0
+            event_list = []
+            for index, (event, (created_event, error)) in enumerate(zip(events, results), start=1):
+                if error:
+                    if as_json:
+                        event_list.append({'error': str(error)})
+                    else:
+                        event_list.append(f"{index}. ❌ {event.summary}: {str(error)}")
+                    continue
+                created += 1
+                await sync_engine.record_event('primary', created_event)
+                if as_json:
+                    event_list.append(select_fields(created_event, EVENT_FIELDS))
+                else:
+                    event_list.append(f"{index}. ✅ {created_event['summary']} (ID: {created_event['id']})")
+
+            if as_json:
+                return to_json({'created': created, 'results': event_list})
+            return f"Created {created} of {len(events)} events:\n" + "\n".join(event_list)
+        except Exception as e:
+            return f"Error creating events: {str(e)}"
+
+    @mcp.tool()
+    async def find_free_slots(
+        start_date: str,
+        end_date: str,
+        duration_minutes: int = 30,
+        calendar_ids: Union[list[str], str] = 'primary',
+        working_hours_start: Optional[str] = '09:00',
+        working_hours_end: Optional[str] = '18:00',
+        include_weekends: bool = False,
+        time_zone: str = 'Asia/Kolkata',
+        limit: int = 20,
+        output_format: Optional[str] = None
+    ) -> str:
+        """Find free time slots across calendars using the Google Calendar free/busy API
+        
+        Args:
+            start_date: Start of the range to search, as an RFC3339 timestamp
+                    with time zone offset, e.g. '2011-06-03T10:00:00Z'
+            end_date: End of the range to search, as an RFC3339 timestamp
+                    with time zone offset. Must be greater than start_date.
+            duration_minutes: Minimum length of a free slot in minutes (default 30)
+            calendar_ids: Calendar ID or list of IDs that must all be free, or 'all'
+                    for every calendar in get_all_calendars (default 'primary')
+            working_hours_start: Earliest local time of day for a slot as 'HH:MM'
+                    (default '09:00'). Set both working hours to null to search all day.
+            working_hours_end: Latest local time of day for a slot as 'HH:MM' (default '18:00').
+                    An end before the start means working hours that run overnight.
+            include_weekends: Whether slots may fall on Saturday or Sunday (default False)
+            time_zone: IANA time zone for working hours and the returned slots
+                    (default 'Asia/Kolkata')
+            limit: Maximum number of slots to return (default 20)
+            output_format: 'text' or 'json' for compact structured output
+                    (default set by the server, normally 'text')
+        
+        Returns:
+            String containing list of free slots or error message
+        """
+        auth_server = credential_manager.get()
+        if not auth_server.is_authenticated():
+            return "Not authenticated. Please run authenticate() first."
+        
+        try:
+            as_json = json_output(output_format)
+            zone = ZoneInfo(time_zone)
+            range_start = parse_time(start_date)
+            range_end = parse_time(end_date)
+            duration = timedelta(minutes=duration_minutes)
+            work_start = parse_clock(working_hours_start)
+            work_end = parse_clock(working_hours_end)
+            if (work_start is None) != (work_end is None):
+                raise Exception("Set both working_hours_start and working_hours_end, or both to null to search all day")
+            if work_start is not None and work_start == work_end:
+                raise Exception("working_hours_start and working_hours_end must differ")
+
+            credentials = await auth_server.get_valid_credentials()
+            service = services.get('calendar', 'v3', credentials)
+
+            if calendar_ids == 'all' or calendar_ids == ['all']:
+                calendar_ids = [calendar['id'] for calendar in await list_calendars(service)]
+            elif isinstance(calendar_ids, str):
+                calendar_ids = [calendar_ids]
+
+            # One query covers up to FREEBUSY_MAX_CALENDARS calendars; larger
+            # sets are split into queries sent concurrently. A query is a read
+            # sent as a POST, so it is safe to retry.
+            responses = await gather_bounded(
+                execute(service.freebusy().query(body={
+                    'timeMin': start_date,
+                    'timeMax': end_date,
+                    'timeZone': 'UTC',
+                    'items': [{'id': calendar_id} for calendar_id in calendar_ids[start:start + FREEBUSY_MAX_CALENDARS]]
+                }), idempotent=True)
+                for start in range(0, len(calendar_ids), FREEBUSY_MAX_CALENDARS)
+            )
+
+            busy = []
+            failures = {}
+            for start, response in zip(range(0, len(calendar_ids), FREEBUSY_MAX_CALENDARS), responses):
+                if isinstance(response, Exception):
+                    for calendar_id in calendar_ids[start:start + FREEBUSY_MAX_CALENDARS]:
+                        failures[calendar_id] = str(response)
+                    continue
+                for calendar_id, calendar in response.get('calendars', {}).items():
+                    if calendar.get('errors'):
+                        failures[calendar_id] = ', '.join(error.get('reason', 'unknown') for error in calendar['errors'])
+                        continue
+                    busy.extend((parse_time(block['start']), parse_time(block['end'])) for block in calendar.get('busy', []))
+
+            if len(failures) == len(calendar_ids):
+                failed_calendars = [f"• {calendar_id}: {reason}" for calendar_id, reason in failures.items()]
+                return "Error fetching availability:\n" + "\n".join(failed_calendars)
+
+            windows = working_windows(range_start, range_end, zone, work_start, work_end, include_weekends)
+            slots = free_slots(merge_intervals(busy), windows, duration)
+
+            if as_json:
+                return to_json({
+                    'slots': [
+                        {
+                            'start': slot_start.astimezone(zone).isoformat(),
+                            'end': slot_end.astimezone(zone).isoformat(),
+                            'minutes': int((slot_end - slot_start).total_seconds() // 60)
+                        }
+                        for slot_start, slot_end in slots[:limit]
+                    ],
+                    'more': max(0, len(slots) - limit),
+                    'failures': failures
+                })
+
+            if not slots:
+                response = f"No free slots of {duration_minutes} minutes found"
+            else:
+                slot_list = []
+                for slot_start, slot_end in slots[:limit]:
+                    minutes = int((slot_end - slot_start).total_seconds() // 60)
+                    slot_start = slot_start.astimezone(zone)
+                    slot_end = slot_end.astimezone(zone)
+                    slot_list.append(
+                        f"• {slot_start.isoformat()} - {slot_end.isoformat()} ({minutes} min)"
+                    )
+                response = f"Found {len(slots)} free slots ({time_zone}):\n" + "\n".join(slot_list)
+                if len(slots) > limit:
+                    response += f"\n\n{len(slots) - limit} more slots not shown."
+            if failures:
+                failed_calendars = [f"• {calendar_id}: {reason}" for calendar_id, reason in failures.items()]
+                response += f"\n\n⚠️ Could not check {len(failures)} calendars, slots ignore them:\n" + "\n".join(failed_calendars)
+            return response
+        except Exception as e:
+            return f"Error fetching availability: {str(e)}"
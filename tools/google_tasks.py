@@ -1,24 +1,217 @@
-from googleapiclient.discovery import build
-from .shared import auth_server
+from googleapiclient.errors import HttpError
+from pydantic import BaseModel
+from .batch import execute_bulk
+from .cache import TTLCache
+from .executor import execute, invalidate_cache
+from .output import field_mask, json_output, select_fields, to_json
+from .pagination import Pager, SortedMerge, decode_cursor, encode_cursor, page_items
+from .shared import account_key, credential_manager, services
+from sync.store import normalize_time
+from .sync import SYNC_ENABLED, sync_engine_for
+from fastmcp import Context
 from typing import Optional
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
+import os
+
+default_tasklists = TTLCache(ttl=float(os.getenv("TASKLIST_CACHE_TTL", "300")))
+
+# Fields returned in JSON output unless a call asks for others
+TASK_FIELDS = ['id', 'title', 'notes', 'due', 'status']
+# get_tasks also returns the etag, which update_task can pass back as a precondition
+READ_TASK_FIELDS = TASK_FIELDS + ['etag']
+
+
+class NewTask(BaseModel):
+    title: str
+    notes: Optional[str] = None
+    due_date: Optional[date] = None
+
+
+class TaskUpdate(BaseModel):
+    task_id: str
+    tasklist_id: Optional[str] = None
+    title: Optional[str] = None
+    notes: Optional[str] = None
+    due_date: Optional[date] = None
+    status: Optional[str] = None
+    etag: Optional[str] = None
+
+
+def due_string(due_date):
+    """Convert a date object to the RFC 3339 string format the Tasks API expects"""
+    return datetime.combine(due_date, datetime.min.time()).isoformat() + "Z"
+
+
+def new_task_body(title, notes=None, due_date=None):
+    """Build the request body for a new task"""
+    task_body = {
+        'title': title,
+    }
+
+    if notes:
+        task_body['notes'] = notes
+
+    if due_date:
+        task_body['due'] = due_string(due_date)
+
+    return task_body
+
+
+def task_patch_body(title=None, notes=None, due_date=None, status=None):
+    """Build a patch body holding only the fields being changed"""
+    task_body = {}
+
+    if title is not None:
+        task_body['title'] = title
+
+    if notes is not None:
+        task_body['notes'] = notes
+
+    if due_date is not None:
+        task_body['due'] = due_string(due_date)
+
+    if status is not None:
+        task_body['status'] = status
+        if status == 'needsAction':
+            # A patch keeps the completion time unless it is cleared explicitly
+            task_body['completed'] = None
+
+    return task_body
+
+
+def is_conflict(error):
+    """Whether a conditional write failed because the task changed since its ETag was read"""
+    return isinstance(error, HttpError) and error.resp.status == 412
+
+
+class TaskFilter:
+    """Criteria for selecting tasks in get_tasks
+
+    Whatever the Tasks API can filter on is sent with the list request:
+    showCompleted, dueMin, dueMax and updatedMin. Every fetched task is also
+    checked locally, which covers status 'completed', text search, tasks read
+    from the local sync store and the exact bounds of each criterion. Tasks are
+    checked one at a time as their pages arrive rather than indexed, since a
+    call reads each task once.
+    """
+
+    STATUSES = ('all', 'needsAction', 'completed')
+
+    def __init__(self, status='all', due_after=None, due_before=None, updated_since=None, query=None):
+        if status not in self.STATUSES:
+            raise Exception(f"Unknown status '{status}', expected one of {', '.join(self.STATUSES)}")
+        self.status = status
+        self.due_min = due_string(due_after + timedelta(days=1)) if due_after else None
+        self.due_max = due_string(due_before) if due_before else None
+        self.updated_min = updated_since
+        self.terms = query.lower().split() if query else []
+
+    def api_params(self):
+        """List parameters that let the Tasks API drop non-matching tasks"""
+        params = {}
+        if self.status == 'needsAction':
+            params['showCompleted'] = False
+        if self.include_hidden():
+            params['showHidden'] = True
+        if self.due_min:
+            params['dueMin'] = self.due_min
+        if self.due_max:
+            params['dueMax'] = self.due_max
+        if self.updated_min:
+            params['updatedMin'] = self.updated_min
+        return params
+
+    def include_hidden(self):
+        """Whether hidden tasks are listed; tasks completed in Google's own apps are hidden"""
+        return self.status == 'completed'
+
+    def required_fields(self):
+        """Task fields the local checks read"""
+        fields = []
+        if self.status != 'all':
+            fields.append('status')
+        if self.due_min or self.due_max:
+            fields.append('due')
+        if self.updated_min:
+            fields.append('updated')
+        if self.terms:
+            fields.extend(['title', 'notes'])
+        return fields
+
+    def is_exact(self):
+        """Whether the API alone returns exactly the matching tasks"""
+        return self.status != 'completed' and not self.terms
+
+    def matches(self, task):
+        """Check a task against every criterion"""
+        if self.status != 'all' and task.get('status') != self.status:
+            return False
+        if self.due_min or self.due_max:
+            due = normalize_time(task.get('due'))
+            if due is None:
+                return False
+            if self.due_min and due < normalize_time(self.due_min):
+                return False
+            if self.due_max and due >= normalize_time(self.due_max):
+                return False
+        if self.updated_min and (normalize_time(task.get('updated')) or '') < normalize_time(self.updated_min):
+            return False
+        if self.terms:
+            text = f"{task.get('title', '')} {task.get('notes', '')}".lower()
+            if not all(term in text for term in self.terms):
+                return False
+        return True
+
 
 def register_google_tasks_tools(mcp):
     """Register Google Tasks tools with the MCP server"""
     
-    def get_default_tasklist_id(service):
-        """Helper function to get the first available task list ID"""
+    async def get_default_tasklist_id(service, credentials):
+        """Helper function to get the first available task list ID, cached per account"""
+        key = account_key(credentials)
+        tasklist_id = default_tasklists.get(key)
+        if tasklist_id is not None:
+            return tasklist_id
+
         try:
-            task_lists_result = service.tasklists().list().execute()
+            task_lists_result = await execute(service.tasklists().list(maxResults=1, fields='items(id)'))
             task_lists = task_lists_result.get('items', [])
             if not task_lists:
                 raise Exception("No task lists found")
-            return task_lists[0]['id']
         except Exception as e:
             raise Exception(f"Error getting task lists: {str(e)}")
+
+        tasklist_id = task_lists[0]['id']
+        default_tasklists.set(key, tasklist_id)
+        return tasklist_id
+
+    async def run_on_default_tasklist(service, credentials, call):
+        """
+        Run call(tasklist_id) against the default task list.
+
+        A 404 may mean the cached default list was deleted, so the cached ID is
+        dropped and the call is retried once if a fresh lookup finds another list.
+        Returns the task list ID used and the call's result.
+        """
+        tasklist_id = await get_default_tasklist_id(service, credentials)
+        try:
+            return tasklist_id, await call(tasklist_id)
+        except HttpError as e:
+            if e.resp.status != 404:
+                raise
+            default_tasklists.pop(account_key(credentials))
+            fresh_tasklist_id = await get_default_tasklist_id(service, credentials)
+            if fresh_tasklist_id == tasklist_id:
+                raise
+            return fresh_tasklist_id, await call(fresh_tasklist_id)
     
     @mcp.tool()
-    def add_task(title: str, notes: Optional[str] = None, due_date: Optional[date] = None) -> str:
+    async def add_task(
+        title: str,
+        notes: Optional[str] = None,
+        due_date: Optional[date] = None,
+        output_format: Optional[str] = None
+    ) -> str:
         """
         Adds a task to the default Google Tasks list with proper date handling.
         
@@ -26,78 +219,292 @@ def register_google_tasks_tools(mcp):
             title: The title of the task.
             notes: The notes or description for the task (optional).
             due_date: A Python datetime.date object for the due date (optional).
+            output_format: 'text' or 'json' to return the new task with its ID and list ID (optional).
         """
+        auth_server = credential_manager.get()
         if not auth_server.is_authenticated():
             return "Not authenticated. Please run authenticate() first."
 
         try:
-            credentials = auth_server.get_credentials()
-            service = build('tasks', 'v1', credentials=credentials)
-
-            tasklist_id = get_default_tasklist_id(service)
+            as_json = json_output(output_format)
+            credentials = await auth_server.get_valid_credentials()
+            sync_engine = sync_engine_for(auth_server)
+            service = services.get('tasks', 'v1', credentials)
 
-            task_body = {
-                'title': title,
-            }
+            task_body = new_task_body(title, notes, due_date)
 
-            if notes:
-                task_body['notes'] = notes
+            async def insert(tasklist_id):
+                return await execute(service.tasks().insert(
+                    tasklist=tasklist_id,
+                    body=task_body
+                ))
 
-            if due_date:
-                # Convert the date object to the required RFC 3339 string format
-                due_string = datetime.combine(due_date, datetime.min.time()).isoformat() + "Z"
-                task_body['due'] = due_string
-
-            task = service.tasks().insert(
-                tasklist=tasklist_id,
-                body=task_body
-            ).execute()
+            tasklist_id, task = await run_on_default_tasklist(service, credentials, insert)
+            invalidate_cache(credentials, 'tasks')
+            await sync_engine.record_task(tasklist_id, task)
             
+            if as_json:
+                return to_json(dict(select_fields(task, TASK_FIELDS), tasklist_id=tasklist_id))
             return f"Task added: {task['title']}"
         except Exception as e:
             return f"Error adding task: {str(e)}"
 
     @mcp.tool()
-    def get_tasks() -> str:
-        """Get all tasks from the Google Tasks API"""
+    async def add_tasks_bulk(
+        tasks: list[NewTask],
+        tasklist_id: Optional[str] = None,
+        output_format: Optional[str] = None
+    ) -> str:
+        """
+        Adds many tasks at once using Google batch requests.
+
+        Args:
+            tasks: The tasks to add, each with a title and optional notes and due_date.
+            tasklist_id: The ID of the list to add them to. If None, uses the default list.
+            output_format: 'text' or 'json' for a result per task, in input order (optional).
+        """
+        auth_server = credential_manager.get()
         if not auth_server.is_authenticated():
             return "Not authenticated. Please run authenticate() first."
 
+        if not tasks:
+            return "No tasks provided."
+
         try:
-            credentials = auth_server.get_credentials()
-            service = build('tasks', 'v1', credentials=credentials)
+            as_json = json_output(output_format)
+            credentials = await auth_server.get_valid_credentials()
+            sync_engine = sync_engine_for(auth_server)
+            service = services.get('tasks', 'v1', credentials)
 
-            task_lists_result = service.tasklists().list().execute()
-            task_lists = task_lists_result.get('items', [])
-            all_tasks = []
-            all_task_presentable = []
-            if not task_lists:
-                return "No tasks found"
-            for task_list in task_lists:
-                tasks_result = service.tasks().list(tasklist=task_list['id']).execute()
-                tasks = tasks_result.get('items', [])
-                if not tasks:
+            use_default = tasklist_id is None
+            if use_default:
+                tasklist_id = await get_default_tasklist_id(service, credentials)
+
+            results = await execute_bulk(service, [
+                lambda task=task: service.tasks().insert(
+                    tasklist=tasklist_id,
+                    body=new_task_body(task.title, task.notes, task.due_date)
+                )
+                for task in tasks
+            ])
+
+            invalidate_cache(credentials, 'tasks')
+
+            added = 0
+            task_list = []
+            for index, (task, (added_task, error)) in enumerate(zip(tasks, results), start=1):
+                if error:
+                    if use_default and isinstance(error, HttpError) and error.resp.status == 404:
+                        default_tasklists.pop(account_key(credentials))
+                    if as_json:
+                        task_list.append({'error': str(error)})
+                    else:
+                        task_list.append(f"{index}. ❌ {task.title}: {str(error)}")
                     continue
-                all_tasks.extend(tasks)
-                
-            for task in all_tasks:
-                title = task.get('title', 'No title')
-                description = task.get('notes', 'No description')
-                due = task.get('due', 'No due date')
-                all_task_presentable.append(f"• {title} (Description: {description}, Due: {due})")
+                added += 1
+                await sync_engine.record_task(tasklist_id, added_task)
+                if as_json:
+                    task_list.append(select_fields(added_task, TASK_FIELDS))
+                else:
+                    task_list.append(f"{index}. ✅ {added_task['title']} (ID: {added_task['id']})")
+
+            if as_json:
+                return to_json({'tasklist_id': tasklist_id, 'added': added, 'results': task_list})
+            return f"Added {added} of {len(tasks)} tasks:\n" + "\n".join(task_list)
+        except Exception as e:
+            return f"Error adding tasks: {str(e)}"
+
+    @mcp.tool()
+    async def get_tasks(
+        max_results: Optional[int] = None,
+        limit: int = 100,
+        page_token: Optional[str] = None,
+        tasklist_ids: Optional[list[str]] = None,
+        status: str = 'all',
+        due_after: Optional[date] = None,
+        due_before: Optional[date] = None,
+        updated_since: Optional[str] = None,
+        query: Optional[str] = None,
+        output_format: Optional[str] = None,
+        fields: Optional[list[str]] = None,
+        ctx: Optional[Context] = None
+    ) -> str:
+        """
+        Get tasks from the Google Tasks API, optionally filtered
+
+        Args:
+            max_results: Number of tasks fetched per page, up to 100 (optional).
+            limit: Maximum number of matching tasks to return in this call, across all
+                    task lists (default 100). Lists are returned one after the other.
+            page_token: Cursor returned by a previous call with the same filters,
+                    to continue where it stopped (optional).
+            tasklist_ids: Only read these task lists (optional, default all lists).
+            status: 'needsAction', 'completed' or 'all' (default 'all').
+            due_after: Only tasks due after this date (optional).
+            due_before: Only tasks due before this date (optional).
+            updated_since: Only tasks modified since this RFC3339 timestamp,
+                    e.g. '2024-06-03T10:00:00Z' (optional).
+            query: Only tasks whose title or notes contain every word of this text (optional).
+            output_format: 'text' or 'json' for compact structured output, where each
+                    task carries its ID and tasklist_id for update_task (optional).
+            fields: Task fields to return in JSON output (default id, title, notes, due,
+                    status and etag).
+        """
+        auth_server = credential_manager.get()
+        if not auth_server.is_authenticated():
+            return "Not authenticated. Please run authenticate() first."
+
+        try:
+            as_json = json_output(output_format)
+            fields = fields or READ_TASK_FIELDS
+            if limit < 1:
+                raise Exception("limit must be at least 1")
+            if max_results is not None and max_results < 1:
+                raise Exception("max_results must be at least 1")
+            task_filter = TaskFilter(status, due_after, due_before, updated_since, query)
+            credentials = await auth_server.get_valid_credentials()
+            sync_engine = sync_engine_for(auth_server)
+            service = services.get('tasks', 'v1', credentials)
+
+            sync_failures = {}
+            if SYNC_ENABLED:
+                task_lists, sync_failures = await sync_engine.sync_tasks(service)
+            else:
+                task_lists = []
+                async for page in Pager(service.tasklists().list, page_size=100, fields='id,title', cache='tasklists').pages():
+                    task_lists.extend(page)
+
+            failures = {}
+            failed_lists = []
+            if tasklist_ids:
+                known_ids = {task_list['id'] for task_list in task_lists}
+                for tasklist_id in tasklist_ids:
+                    if tasklist_id not in known_ids:
+                        failures[tasklist_id] = "Task list not found"
+                        failed_lists.append(f"• {tasklist_id}: Task list not found")
+                task_lists = [task_list for task_list in task_lists if task_list['id'] in tasklist_ids]
+
+            # The cursor records, for every list not yet exhausted, the page
+            # holding its next matching task and that task's index in the page.
+            cursor = {}
+            if page_token:
+                cursor = decode_cursor(page_token)
+                task_lists = [task_list for task_list in task_lists if task_list['id'] in cursor]
+
+            all_task_presentable = []
+            next_page_tokens = {}
+            if not task_lists and not failures:
+                return to_json({'tasks': [], 'next_page_token': None, 'failures': {}}) if as_json else "No tasks found"
+
+            page_size = max_results or min(limit, 100)
+            # When the API filters exactly, a list's pager can stop at the limit;
+            # otherwise pages are read until enough tasks have matched.
+            exact = task_filter.is_exact()
+
+            async def list_items(position, task_list):
+                """Yield (position, task, page token, index) for the matching tasks of a list
+
+                A pager stopped by its limit with tasks left ends the list with a
+                None task whose page token and index resume after it.
+                """
+                if task_list['id'] in sync_failures:
+                    raise sync_failures[task_list['id']]
+
+                list_page_token, skip = cursor.get(task_list['id'], [None, 0])
+                pager_limit = limit + skip if exact else None
+                if SYNC_ENABLED:
+                    pager = sync_engine.tasks_pager(
+                        task_list['id'],
+                        limit=pager_limit,
+                        page_size=page_size,
+                        page_token=list_page_token,
+                        include_hidden=task_filter.include_hidden()
+                    )
+                else:
+                    pager = Pager(
+                        service.tasks().list,
+                        limit=pager_limit,
+                        page_size=page_size,
+                        page_token=list_page_token,
+                        fields=field_mask(fields if as_json else ['id', 'title', 'notes', 'due', 'etag'], task_filter.required_fields()),
+                        cache='tasks',
+                        tasklist=task_list['id'],
+                        **task_filter.api_params()
+                    )
+                items = page_items(pager, skip=skip)
+                try:
+                    async for task, task_page_token, index in items:
+                        if task_filter.matches(task):
+                            yield position, task, task_page_token, index
+                finally:
+                    await items.aclose()
+                if pager_limit is not None and pager.next_page_token:
+                    yield position, None, pager.next_page_token, 0
+
+            # Lists are read concurrently but returned one after the other, in
+            # list order, until `limit` tasks have been returned in total.
+            merge = SortedMerge(
+                (list_items(position, task_list) for position, task_list in enumerate(task_lists)),
+                key=lambda entry: entry[0]
+            )
+            try:
+                async for _, (position, task, task_page_token, index) in merge.items():
+                    tasklist_id = task_lists[position]['id']
+                    if len(all_task_presentable) == limit:
+                        next_page_tokens[tasklist_id] = [task_page_token, index]
+                        for _, (head_position, _, head_page_token, head_index) in merge.heads():
+                            next_page_tokens[task_lists[head_position]['id']] = [head_page_token, head_index]
+                        break
+                    if task is None:
+                        next_page_tokens[tasklist_id] = [task_page_token, index]
+                        continue
+                    if as_json:
+                        all_task_presentable.append(dict(select_fields(task, fields), tasklist_id=tasklist_id))
+                    else:
+                        title = task.get('title', 'No title')
+                        description = task.get('notes', 'No description')
+                        due = task.get('due', 'No due date')
+                        etag = task.get('etag', 'None')
+                        all_task_presentable.append(
+                            f"• {title} (Description: {description}, Due: {due}, "
+                            f"ID: {task['id']}, List: {tasklist_id}, Etag: {etag})"
+                        )
+                    if ctx and len(all_task_presentable) % page_size == 0:
+                        await ctx.report_progress(len(all_task_presentable), limit)
+            finally:
+                await merge.aclose()
+
+            for position, error in merge.failures.items():
+                task_list = task_lists[position]
+                failures[task_list['id']] = str(error)
+                failed_lists.append(f"• {task_list.get('title', task_list['id'])}: {str(error)}")
+
+            if as_json:
+                return to_json({
+                    'tasks': all_task_presentable,
+                    'next_page_token': encode_cursor(next_page_tokens) if next_page_tokens else None,
+                    'failures': failures
+                })
             
-            return f"Found {len(all_task_presentable)} tasks:\n" + "\n".join(all_task_presentable)
+            response = f"Found {len(all_task_presentable)} tasks:\n" + "\n".join(all_task_presentable)
+            if next_page_tokens:
+                response += f"\n\nMore tasks available. Call again with page_token='{encode_cursor(next_page_tokens)}' to continue."
+            if failed_lists:
+                response += f"\n\n⚠️ Could not fetch {len(failed_lists)} task lists:\n" + "\n".join(failed_lists)
+            return response
         except Exception as e:
             return f"Error fetching tasks: {str(e)}"
 
     @mcp.tool()
-    def update_task(
+    async def update_task(
         task_id: str,
         tasklist_id: Optional[str] = None,
         title: Optional[str] = None,
         notes: Optional[str] = None,
         due_date: Optional[date] = None,
-        status: Optional[str] = None
+        status: Optional[str] = None,
+        etag: Optional[str] = None,
+        output_format: Optional[str] = None
     ) -> str:
         """
         Updates an existing task in a specified Google Tasks list.
@@ -110,41 +517,132 @@ def register_google_tasks_tools(mcp):
             notes: The new notes/description for the task (optional).
             due_date: The new due date as a datetime.date object (optional).
             status: The new status, e.g., 'completed' or 'needsAction' (optional).
+            etag: The task's etag from get_tasks; the update is refused if the task
+                    has changed since (optional).
+            output_format: 'text' or 'json' to return the updated task (optional).
         """
+        auth_server = credential_manager.get()
         if not auth_server.is_authenticated():
             return "Not authenticated. Please run authenticate() first."
 
         try:
-            credentials = auth_server.get_credentials()
-            service = build('tasks', 'v1', credentials=credentials)
+            as_json = json_output(output_format)
+            credentials = await auth_server.get_valid_credentials()
+            sync_engine = sync_engine_for(auth_server)
+            service = services.get('tasks', 'v1', credentials)
+
+            task_body = task_patch_body(title, notes, due_date, status)
+            if not task_body:
+                return "No update information provided."
+
+            async def update(tasklist_id):
+                request = service.tasks().patch(
+                    tasklist=tasklist_id,
+                    task=task_id,
+                    body=task_body
+                )
+                if etag:
+                    request.headers['If-Match'] = etag
+                return await execute(request)
 
             if tasklist_id is None:
-                tasklist_id = get_default_tasklist_id(service)
+                tasklist_id, updated_task = await run_on_default_tasklist(service, credentials, update)
+            else:
+                updated_task = await update(tasklist_id)
+            invalidate_cache(credentials, 'tasks')
+            await sync_engine.record_task(tasklist_id, updated_task)
 
-            task_body = {}
+            if as_json:
+                return to_json(dict(select_fields(updated_task, TASK_FIELDS + ['etag']), tasklist_id=tasklist_id))
+            return f"Task updated: {updated_task.get('title')}"
+        except Exception as e:
+            if is_conflict(e):
+                return f"Error updating task: task {task_id} has changed since it was read, fetch it again before updating"
+            return f"Error updating task: {str(e)}"
 
-            if title is not None:
-                task_body['title'] = title
-            
-            if notes is not None:
-                task_body['notes'] = notes
-            
-            if due_date is not None:
-                due_string = datetime.combine(due_date, datetime.min.time()).isoformat() + "Z"
-                task_body['due'] = due_string
-                
-            if status is not None:
-                task_body['status'] = status
+    @mcp.tool()
+    async def update_tasks_bulk(
+        updates: list[TaskUpdate],
+        tasklist_id: Optional[str] = None,
+        output_format: Optional[str] = None
+    ) -> str:
+        """
+        Updates or completes many tasks at once using Google batch requests.
+        Only the provided fields of each task are changed.
 
-            if not task_body:
-                return "No update information provided."
+        Args:
+            updates: The changes, each with a task_id and any of title, notes, due_date and
+                    status ('completed' or 'needsAction'). An update may name its own
+                    tasklist_id, and with an etag from get_tasks it is refused if the task
+                    has changed since.
+            tasklist_id: The ID of the list holding tasks whose update names none. If None, uses the default list.
+            output_format: 'text' or 'json' for a result per task, in input order (optional).
+        """
+        auth_server = credential_manager.get()
+        if not auth_server.is_authenticated():
+            return "Not authenticated. Please run authenticate() first."
 
-            updated_task = service.tasks().update(
-                tasklist=tasklist_id,
-                task=task_id,
-                body=task_body
-            ).execute()
+        if not updates:
+            return "No updates provided."
 
-            return f"Task updated: {updated_task.get('title')}"
+        try:
+            as_json = json_output(output_format)
+            credentials = await auth_server.get_valid_credentials()
+            sync_engine = sync_engine_for(auth_server)
+            service = services.get('tasks', 'v1', credentials)
+
+            tasklist_ids = [update.tasklist_id or tasklist_id for update in updates]
+            if None in tasklist_ids:
+                default_id = await get_default_tasklist_id(service, credentials)
+                tasklist_ids = [list_id or default_id for list_id in tasklist_ids]
+            bodies = [task_patch_body(update.title, update.notes, update.due_date, update.status) for update in updates]
+
+            def patch(index):
+                request = service.tasks().patch(
+                    tasklist=tasklist_ids[index],
+                    task=updates[index].task_id,
+                    body=bodies[index]
+                )
+                if updates[index].etag:
+                    request.headers['If-Match'] = updates[index].etag
+                return request
+
+            # Sorting by list keeps each list's patches together in the batches
+            sent = sorted((index for index, body in enumerate(bodies) if body), key=lambda index: tasklist_ids[index])
+            results = [(None, Exception("No update information provided"))] * len(updates)
+            if sent:
+                responses = await execute_bulk(service, [lambda index=index: patch(index) for index in sent])
+                for index, result in zip(sent, responses):
+                    results[index] = result
+                invalidate_cache(credentials, 'tasks')
+
+            updated = 0
+            conflicts = 0
+            task_list = []
+            for index, (update, list_id, (updated_task, error)) in enumerate(zip(updates, tasklist_ids, results), start=1):
+                if error:
+                    on_default = update.tasklist_id is None and tasklist_id is None
+                    if on_default and isinstance(error, HttpError) and error.resp.status == 404:
+                        default_tasklists.pop(account_key(credentials))
+                    message = "changed since it was read, fetch it again before updating" if is_conflict(error) else str(error)
+                    conflicts += is_conflict(error)
+                    if as_json:
+                        task_list.append({'id': update.task_id, 'tasklist_id': list_id, 'conflict': is_conflict(error), 'error': message})
+                    else:
+                        task_list.append(f"{index}. {'⚠️' if is_conflict(error) else '❌'} {update.task_id}: {message}")
+                    continue
+                updated += 1
+                await sync_engine.record_task(list_id, updated_task)
+                if as_json:
+                    task_list.append(dict(select_fields(updated_task, TASK_FIELDS + ['etag']), tasklist_id=list_id))
+                else:
+                    task_list.append(f"{index}. ✅ {updated_task.get('title')} (ID: {updated_task['id']}, {updated_task.get('status')})")
+
+            if as_json:
+                return to_json({'updated': updated, 'conflicts': conflicts, 'results': task_list})
+            summary = f"Updated {updated} of {len(updates)} tasks"
+            if conflicts:
+                summary += f", {conflicts} changed since they were read"
+            return summary + ":\n" + "\n".join(task_list)
         except Exception as e:
-            return f"Error updating task: {str(e)}"
\ No newline at end of file
+            return f"Error updating tasks: {str(e)}"
@@ -0,0 +1,263 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from typing import Optional
+
+from fastmcp import FastMCP
+from googleapiclient.errors import HttpError
+from starlette.responses import PlainTextResponse
+
+from .output import json_output, to_json
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Name, type and help text of every metric, in exposition order
+METRICS = {
+    'mcp_tool_calls_total': ('counter', 'Tool calls by outcome'),
+    'mcp_tool_duration_seconds': ('histogram', 'Tool call latency'),
+    'google_api_calls_total': ('counter', 'HTTP calls to Google APIs, including retries'),
+    'google_api_duration_seconds': ('histogram', 'Google API call latency, including worker pool wait'),
+    'google_api_retries_total': ('counter', 'Google API calls retried after a retryable error'),
+    'google_api_errors_total': ('counter', 'Google API calls that failed, by error class'),
+    'google_api_request_bytes_total': ('counter', 'Request body bytes sent to Google APIs'),
+    'google_api_response_bytes_total': ('counter', 'Response body bytes received from Google APIs'),
+    'google_api_coalesced_total': ('counter', 'Reads served by an identical read already in flight'),
+    'response_cache_requests_total': ('counter', 'Cacheable reads by result: hit, revalidated or miss'),
+    'watch_notifications_total': ('counter', 'Calendar push notifications received, by resource state and result'),
+}
+
+# Tool call being served, so API calls made on its behalf are labelled with it
+current_tool = contextvars.ContextVar('current_tool', default='')
+
+
+class Metrics:
+    """Thread-safe counters and histograms rendered in the Prometheus text format"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        """Add to a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """Record a value in a histogram"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][bisect.bisect_left(self.buckets, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def counters(self, name):
+        """Get {labels: value} for a counter"""
+        with self._lock:
+            return {labels: value for (counter, labels), value in self._counters.items() if counter == name}
+
+    def histograms(self, name):
+        """Get {labels: (bucket counts, sum, count)} for a histogram"""
+        with self._lock:
+            return {
+                labels: (list(counts), total, count)
+                for (histogram, labels), (counts, total, count) in self._histograms.items()
+                if histogram == name
+            }
+
+    def quantile(self, counts, q):
+        """Estimate a quantile from bucket counts as the upper bound of its bucket
+
+        Returns None when the quantile falls beyond the largest bucket.
+        """
+        target = q * sum(counts)
+        seen = 0
+        for bound, count in zip(self.buckets, counts):
+            seen += count
+            if count and seen >= target:
+                return bound
+        return None
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'counter':
+                for labels, value in sorted(self.counters(name).items()):
+                    lines.append(f"{name}{format_labels(labels)} {value:g}")
+                continue
+            for labels, (counts, total, count) in sorted(self.histograms(name).items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                    lines.append(f"{name}_bucket{format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(labels)} {total:g}")
+                lines.append(f"{name}_count{format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def error_class(error):
+    """Short label for an error: the HTTP status for API errors, else the exception type"""
+    if isinstance(error, HttpError):
+        return f"http_{error.resp.status}"
+    return type(error).__name__
+
+
+def is_error_result(result):
+    """Whether a tool's result is one of the error messages tools return instead of raising"""
+    text = getattr(result[0], 'text', '') if result else ''
+    return text.startswith(('Error', 'Not authenticated', '❌'))
+
+
+def measure_bytes(request, method):
+    """Count the request body and, once received, the response body of a request"""
+    body = request.body or b''
+    if isinstance(body, str):
+        body = body.encode()
+    metrics.inc('google_api_request_bytes_total', len(body), tool=current_tool.get(), method=method)
+    postproc = request.postproc
+    if getattr(postproc, 'measured', False):
+        return
+
+    tool = current_tool.get()
+
+    def measured(resp, content):
+        metrics.inc('google_api_response_bytes_total', len(content or b''), tool=tool, method=method)
+        return postproc(resp, content)
+
+    measured.measured = True
+    request.postproc = measured
+
+
+metrics = Metrics()
+
+
+class MeteredFastMCP(FastMCP):
+    """FastMCP server recording the latency and outcome of every tool call"""
+
+    async def _call_tool(self, key, arguments):
+        token = current_tool.set(key)
+        start = time.perf_counter()
+        outcome = 'exception'
+        try:
+            result = await super()._call_tool(key, arguments)
+            outcome = 'error' if is_error_result(result) else 'ok'
+            return result
+        finally:
+            metrics.observe('mcp_tool_duration_seconds', time.perf_counter() - start, tool=key)
+            metrics.inc('mcp_tool_calls_total', tool=key, outcome=outcome)
+            current_tool.reset(token)
+
+
+def register_metrics(mcp):
+    """Expose metrics at /metrics and, unless SERVER_STATS_TOOL is false, as a tool"""
+
+    @mcp.custom_route('/metrics', methods=['GET'])
+    async def metrics_endpoint(request):
+        return PlainTextResponse(metrics.render(), media_type='text/plain; version=0.0.4')
+
+    if os.getenv("SERVER_STATS_TOOL", "true").lower() != "true":
+        return
+
+    @mcp.tool()
+    def server_stats(output_format: Optional[str] = None) -> str:
+        """
+        Get per-tool call counts, latency and Google API usage since the server started
+
+        Args:
+            output_format: 'text' or 'json' for compact structured output (optional).
+        """
+        try:
+            as_json = json_output(output_format)
+
+            tools = {}
+            for labels, (counts, total, count) in metrics.histograms('mcp_tool_duration_seconds').items():
+                tools[dict(labels)['tool']] = {
+                    'calls': count,
+                    'errors': 0,
+                    'mean_seconds': round(total / count, 4),
+                    'p50_seconds': metrics.quantile(counts, 0.5),
+                    'p99_seconds': metrics.quantile(counts, 0.99),
+                    'api_calls': 0,
+                    'retries': 0,
+                    'response_bytes': 0,
+                    'cache_hits': 0,
+                    'cache_misses': 0,
+                }
+            totals = {
+                'google_api_calls_total': 'api_calls',
+                'google_api_retries_total': 'retries',
+                'google_api_response_bytes_total': 'response_bytes',
+            }
+            for name, field in totals.items():
+                for labels, value in metrics.counters(name).items():
+                    stats = tools.get(dict(labels)['tool'])
+                    if stats:
+                        stats[field] += value
+            for labels, value in metrics.counters('mcp_tool_calls_total').items():
+                labels = dict(labels)
+                if labels['outcome'] != 'ok' and labels['tool'] in tools:
+                    tools[labels['tool']]['errors'] += value
+            for labels, value in metrics.counters('response_cache_requests_total').items():
+                labels = dict(labels)
+                stats = tools.get(labels['tool'])
+                if stats:
+                    stats['cache_misses' if labels['result'] == 'miss' else 'cache_hits'] += value
+            errors = {}
+            for labels, value in metrics.counters('google_api_errors_total').items():
+                labels = dict(labels)
+                errors.setdefault(labels['tool'] or 'background', {})[labels['error']] = value
+
+            if as_json:
+                return to_json({'tools': tools, 'api_errors': errors})
+            if not tools:
+                return "No tool calls recorded yet"
+
+            def milliseconds(seconds):
+                return f"≤ {seconds * 1000:g} ms" if seconds is not None else f"> {LATENCY_BUCKETS[-1]:g} s"
+
+            tool_list = []
+            for tool, stats in sorted(tools.items()):
+                tool_list.append(
+                    f"• {tool}: {stats['calls']} calls, {stats['errors']} errors, "
+                    f"mean {stats['mean_seconds'] * 1000:.0f} ms, p50 {milliseconds(stats['p50_seconds'])}, "
+                    f"p99 {milliseconds(stats['p99_seconds'])}, {stats['api_calls']} API calls, "
+                    f"{stats['retries']} retries, {stats['response_bytes']} bytes, "
+                    f"cache {stats['cache_hits']} hits / {stats['cache_misses']} misses"
+                )
+            response = "Tool statistics:\n" + "\n".join(tool_list)
+            if errors:
+                error_list = [
+                    f"• {tool}: " + ", ".join(f"{error} × {count}" for error, count in sorted(classes.items()))
+                    for tool, classes in sorted(errors.items())
+                ]
+                response += "\n\nGoogle API errors:\n" + "\n".join(error_list)
+            return response
+        except Exception as e:
+            return f"Error fetching server stats: {str(e)}"
@@ -0,0 +1,28 @@
+import json
+import os
+
+OUTPUT_FORMATS = ('text', 'json')
+OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "text")
+
+
+def json_output(output_format=None):
+    """Whether a tool call returns JSON, as asked by the call or else server-wide"""
+    output_format = output_format or OUTPUT_FORMAT
+    if output_format not in OUTPUT_FORMATS:
+        raise Exception(f"Unknown output_format '{output_format}', expected 'text' or 'json'")
+    return output_format == 'json'
+
+
+def to_json(data):
+    """Serialize a structured tool result as compact JSON"""
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+
+
+def select_fields(resource, fields):
+    """Keep only the requested top-level fields of an API resource"""
+    return {field: resource[field] for field in fields if field in resource}
+
+
+def field_mask(fields, required=()):
+    """Partial-response selector for the requested fields plus those a tool needs itself"""
+    return ','.join(dict.fromkeys([*fields, *required]))
@@ -0,0 +1,148 @@
+import asyncio
+import base64
+import heapq
+import json
+
+from .executor import execute
+
+
+class Pager:
+    """Iterate over a paginated Google API list method one page at a time
+
+    Follows nextPageToken until there are no more pages or `limit` items have been
+    returned. Only the current page is held in memory. When iteration stops early,
+    `next_page_token` holds the cursor a caller can pass back to resume. After the
+    last page of a sync-capable list, `next_sync_token` holds its nextSyncToken.
+
+    Args:
+        list_method: The bound list method, e.g. service.events().list
+        limit: Maximum number of items to return across all pages (optional).
+        page_size: Number of items requested per page, sent as maxResults (optional).
+        page_token: Cursor returned by a previous call to resume from (optional).
+        fields: Comma-separated item fields to request, e.g. 'summary,start' (optional).
+        cache: Response cache namespace for the pages, see execute() (optional).
+        **params: Any other parameters for the list method.
+    """
+
+    def __init__(self, list_method, limit=None, page_size=None, page_token=None, fields=None, cache=None, **params):
+        self.list_method = list_method
+        self.limit = limit
+        self.page_size = page_size
+        self.page_token = page_token
+        # The page's etag is kept so a cached page can be revalidated
+        self.fields = f"etag,nextPageToken,items({fields})" if fields else None
+        self.cache = cache
+        self.params = params
+        self.next_page_token = None
+        self.next_sync_token = None
+        self.count = 0
+
+    async def pages(self):
+        """Yield the items of each page in order"""
+        page_token = self.page_token
+        while True:
+            page_size = self.page_size
+            if self.limit is not None:
+                remaining = self.limit - self.count
+                page_size = remaining if page_size is None else min(page_size, remaining)
+
+            response = await execute(self.list_method(
+                pageToken=page_token,
+                maxResults=page_size,
+                fields=self.fields,
+                **self.params
+            ), cache=self.cache)
+            items = response.get('items', [])
+            self.count += len(items)
+            self.next_page_token = page_token = response.get('nextPageToken')
+            self.next_sync_token = response.get('nextSyncToken')
+
+            yield items
+
+            if not page_token or (self.limit is not None and self.count >= self.limit):
+                return
+
+
+def encode_cursor(page_tokens):
+    """Pack page tokens for several collections into one opaque cursor string"""
+    return base64.urlsafe_b64encode(json.dumps(page_tokens).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Unpack a cursor created by encode_cursor"""
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise Exception("Invalid page_token")
+
+
+async def page_items(pager, skip=0):
+    """Yield (item, page_token, index) for every item of a pager
+
+    page_token is the cursor of the page holding the item and index its position
+    in that page, so a consumer can later resume exactly at any item by creating
+    a pager with that page_token and passing skip=index. The next page is
+    fetched in the background while the current one is consumed.
+    """
+    pages = pager.pages()
+    page_token = pager.page_token
+    fetch = asyncio.ensure_future(anext(pages, None))
+    try:
+        while True:
+            page = await fetch
+            if page is None:
+                return
+            next_page_token = pager.next_page_token
+            fetch = asyncio.ensure_future(anext(pages, None)) if next_page_token else None
+
+            for index in range(skip, len(page)):
+                yield page[index], page_token, index
+            skip = 0
+
+            if fetch is None:
+                return
+            page_token = next_page_token
+    finally:
+        if fetch is not None and not fetch.done():
+            fetch.cancel()
+
+
+class SortedMerge:
+    """k-way merge of async streams that are each already sorted by `key`
+
+    Only the head item of every stream is held, so memory stays bounded however
+    long the streams are. A stream that raises is dropped and its error kept in
+    `failures`, keyed by the stream's position, so the others can carry on.
+    """
+
+    def __init__(self, streams, key):
+        self.streams = list(streams)
+        self.key = key
+        self.failures = {}
+        self._heap = []
+
+    async def _advance(self, index):
+        try:
+            item = await anext(self.streams[index])
+        except StopAsyncIteration:
+            return
+        except Exception as e:
+            self.failures[index] = e
+            return
+        heapq.heappush(self._heap, (self.key(item), index, item))
+
+    async def items(self):
+        """Yield (stream index, item) pairs in key order"""
+        await asyncio.gather(*(self._advance(index) for index in range(len(self.streams))))
+        while self._heap:
+            _, index, item = heapq.heappop(self._heap)
+            yield index, item
+            await self._advance(index)
+
+    def heads(self):
+        """Get the (stream index, item) pairs not yet yielded, one per live stream"""
+        return [(index, item) for _, index, item in self._heap]
+
+    async def aclose(self):
+        for stream in self.streams:
+            await stream.aclose()
@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second up to `capacity`
+
+    Tokens are reserved up front: a caller that finds the bucket empty takes its
+    tokens anyway, driving the balance negative, and is told how long to wait.
+    Callers are therefore served in arrival order. Only used from the event loop,
+    so no locking is needed.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, count=1):
+        """Take `count` tokens and return the seconds to wait before using them"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= count
+        return 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class RateLimiter:
+    """Token buckets per API, shared by all users, and per API and user"""
+
+    def __init__(self, api_rate, user_rate):
+        self.api_rate = api_rate
+        self.user_rate = user_rate
+        self._buckets = {}
+
+    def _bucket(self, key, rate):
+        if key not in self._buckets:
+            self._buckets[key] = TokenBucket(rate)
+        return self._buckets[key]
+
+    async def acquire(self, api, account, count=1):
+        """Wait until `count` calls to an API may be made on behalf of an account"""
+        delay = max(
+            self._bucket((api, None), self.api_rate).reserve(count),
+            self._bucket((api, account), self.user_rate).reserve(count)
+        )
+        if delay > 0:
+            await asyncio.sleep(delay)
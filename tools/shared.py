@@ -1,3 +1,152 @@
-from auth.server import AuthServer
+import hashlib
+import importlib
+import json
+import os
+import threading
+from collections import OrderedDict
 
-auth_server = AuthServer()
\ No newline at end of file
+from auth.manager import CredentialManager
+
+# Google client modules imported on first use rather than at startup, so tools
+# are listed without waiting for them; warm_up() imports them ahead of time
+GOOGLE_MODULES = (
+    'httplib2',
+    'google_auth_httplib2',
+    'googleapiclient.discovery',
+    'google.oauth2.credentials',
+    'google.auth.transport.requests',
+    'google_auth_oauthlib.flow',
+)
+# APIs whose discovery documents warm_up() parses ahead of time
+GOOGLE_APIS = (('calendar', 'v3'), ('tasks', 'v1'))
+
+
+class ServiceRegistry:
+    """Process-wide cache of Google API service objects
+
+    Each API service is built once per credentials object from the discovery
+    document bundled with google-api-python-client and reused across tool calls.
+    Tokens refreshed in place are picked up automatically since the authorized
+    HTTP session wraps the same credentials object. Services and sessions are
+    kept for the `maxsize` most recently used credentials.
+
+    A `root_url` replaces the Google endpoint of every API, batch requests
+    included, e.g. to point the server at a local stand-in for benchmarks.
+    """
+
+    def __init__(self, credential_manager, timeout=None, maxsize=64, root_url=None):
+        self.credential_manager = credential_manager
+        self.timeout = timeout
+        self.maxsize = maxsize
+        self.root_url = root_url.rstrip('/') + '/' if root_url else None
+        self._documents = {}
+        self._services = OrderedDict()
+        self._generation = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def discovery_document(self, api, version):
+        """Load the bundled discovery document for an API, parsing it only once"""
+        key = (api, version)
+        with self._lock:
+            if key not in self._documents:
+                from googleapiclient.discovery_cache import get_static_doc
+
+                document = get_static_doc(api, version)
+                if document is None:
+                    raise Exception(f"No bundled discovery document for {api} {version}")
+                document = json.loads(document)
+                if self.root_url:
+                    document['rootUrl'] = self.root_url
+                    document['baseUrl'] = self.root_url + document['servicePath']
+                self._documents[key] = document
+            return self._documents[key]
+
+    def http(self, credentials):
+        """Get the pooled HTTP session for the credentials
+
+        httplib2 connections are not thread-safe, so every thread keeps its own
+        session per credential and reuses its TLS connections across calls.
+        """
+        if getattr(self._local, 'generation', None) != self._generation:
+            self._local.sessions = OrderedDict()
+            self._local.generation = self._generation
+
+        sessions = self._local.sessions
+        session = sessions.get(id(credentials))
+        if session is None or session.credentials is not credentials:
+            import httplib2
+            from google_auth_httplib2 import AuthorizedHttp
+
+            session = AuthorizedHttp(credentials, http=httplib2.Http(timeout=self.timeout))
+            sessions[id(credentials)] = session
+            while len(sessions) > self.maxsize:
+                sessions.popitem(last=False)
+        sessions.move_to_end(id(credentials))
+        return session
+
+    def get(self, api, version, credentials=None):
+        """Get the service for an API and credentials, building it on first use
+
+        Without credentials, those of the current tenant are used.
+        """
+        if credentials is None:
+            credentials = self.credential_manager.get().get_credentials()
+
+        key = (api, version, id(credentials))
+        with self._lock:
+            cached = self._services.get(key)
+            if cached and cached[0] is credentials:
+                self._services.move_to_end(key)
+                return cached[1]
+
+        from googleapiclient.discovery import build_from_document
+
+        service = build_from_document(
+            self.discovery_document(api, version),
+            http=self.http(credentials)
+        )
+        with self._lock:
+            self._services[key] = (credentials, service)
+            while len(self._services) > self.maxsize:
+                self._services.popitem(last=False)
+        return service
+
+    def invalidate(self, credentials=None):
+        """Drop the cached services of replaced credentials, or every service and HTTP session
+
+        Sessions of replaced credentials are left to age out of the per-thread
+        LRUs, since http() never hands them to another credentials object.
+        """
+        with self._lock:
+            if credentials is None:
+                self._services.clear()
+                self._generation += 1
+                return
+            for key, (cached, _) in list(self._services.items()):
+                if cached is credentials:
+                    del self._services[key]
+
+    def warm_up(self):
+        """Import the Google client modules and parse the discovery documents"""
+        for module in GOOGLE_MODULES:
+            importlib.import_module(module)
+        for api, version in GOOGLE_APIS:
+            self.discovery_document(api, version)
+
+
+def account_key(credentials):
+    """Stable key identifying the Google account behind a set of credentials"""
+    secret = credentials.refresh_token or credentials.token or ''
+    return hashlib.sha256(f"{credentials.client_id}:{secret}".encode()).hexdigest()
+
+
+credential_manager = CredentialManager()
+services = ServiceRegistry(
+    credential_manager,
+    timeout=float(os.getenv("API_TIMEOUT", "30")),
+    maxsize=2 * credential_manager.maxsize,
+    root_url=os.getenv("GOOGLE_API_ROOT_URL")
+)
+# Services built for credentials that a sign-in replaced are never used again
+credential_manager.on_replace = services.invalidate
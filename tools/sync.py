@@ -0,0 +1,192 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from googleapiclient.errors import HttpError
+
+from sync.store import SyncStore
+from .executor import gather_bounded, run_blocking
+from .pagination import Pager
+
+SYNC_ENABLED = os.getenv("SYNC_ENABLED", "false").lower() == "true"
+SYNC_INTERVAL = float(os.getenv("SYNC_INTERVAL", "30"))
+# Resources kept current by push notifications are still synced this often, in case one was lost
+PUSHED_SYNC_INTERVAL = float(os.getenv("SYNC_PUSHED_INTERVAL", "3600"))
+
+# Tasks has no sync tokens; updatedMin is taken a little before each sync starts
+# so that clock skew between us and Google cannot hide a change.
+UPDATED_MIN_MARGIN = timedelta(minutes=1)
+
+
+class LocalPager:
+    """Page through rows of the local store with the same interface as Pager
+
+    The cursor is the row offset of the next page.
+    """
+
+    def __init__(self, fetch, limit=None, page_size=None, page_token=None):
+        self.fetch = fetch
+        self.limit = limit
+        self.page_size = page_size or 250
+        self.page_token = page_token
+        self.next_page_token = None
+        self.count = 0
+
+    async def pages(self):
+        """Yield the rows of each page in order"""
+        offset = int(self.page_token or 0)
+        while True:
+            page_size = self.page_size
+            if self.limit is not None:
+                page_size = min(page_size, self.limit - self.count)
+
+            items = await run_blocking(self.fetch, page_size + 1, offset)
+            has_more = len(items) > page_size
+            items = items[:page_size]
+            offset += len(items)
+            self.count += len(items)
+            self.next_page_token = str(offset) if has_more else None
+
+            yield items
+
+            if not has_more or (self.limit is not None and self.count >= self.limit):
+                return
+
+
+class SyncEngine:
+    """Keep the local store current with incremental syncs
+
+    Calendars use the events.list syncToken and fall back to a full resync when
+    Google answers 410 Gone. Task lists use updatedMin with deleted and hidden
+    tasks included. A resource synced less than `interval` seconds ago is served
+    from the store without contacting Google. Resources in `pushed` are kept
+    current by push notifications (see tools/watch.py) and are only synced when
+    a notification arrives or every `pushed_interval` seconds.
+    """
+
+    def __init__(self, store, interval=SYNC_INTERVAL, pushed_interval=PUSHED_SYNC_INTERVAL):
+        self.store = store
+        self.interval = interval
+        self.pushed_interval = pushed_interval
+        self.pushed = set()
+        self._locks = {}
+
+    def _lock(self, resource):
+        if resource not in self._locks:
+            self._locks[resource] = asyncio.Lock()
+        return self._locks[resource]
+
+    async def _is_fresh(self, resource):
+        _, synced_at = await run_blocking(self.store.get_state, resource)
+        interval = self.pushed_interval if resource in self.pushed else self.interval
+        return synced_at is not None and time.time() - synced_at < interval
+
+    async def sync_calendar(self, service, calendar_id, force=False):
+        """Bring the stored events of a calendar up to date"""
+        resource = f'calendar:{calendar_id}'
+        async with self._lock(resource):
+            if not force and await self._is_fresh(resource):
+                return
+
+            sync_token, _ = await run_blocking(self.store.get_state, resource)
+            try:
+                await self._sync_calendar(service, calendar_id, sync_token)
+            except HttpError as e:
+                if e.resp.status != 410 or sync_token is None:
+                    raise
+                await self._sync_calendar(service, calendar_id, None)
+
+    async def _sync_calendar(self, service, calendar_id, sync_token):
+        pager = Pager(
+            service.events().list,
+            page_size=2500,
+            calendarId=calendar_id,
+            singleEvents=True,
+            syncToken=sync_token
+        )
+        replace = sync_token is None
+        async for events in pager.pages():
+            await run_blocking(self.store.apply_events, calendar_id, events, replace)
+            replace = False
+        await run_blocking(self.store.set_state, f'calendar:{calendar_id}', pager.next_sync_token)
+
+    async def sync_tasks(self, service, force=False):
+        """Bring every stored task list up to date
+
+        Returns the task lists and a dict of the lists that failed to sync,
+        mapped to their error.
+        """
+        async with self._lock('tasks'):
+            if not force and await self._is_fresh('tasks'):
+                return await run_blocking(self.store.tasklists), {}
+
+            task_lists = []
+            async for page in Pager(service.tasklists().list, page_size=100).pages():
+                task_lists.extend(page)
+            await run_blocking(self.store.set_tasklists, task_lists)
+
+            results = await gather_bounded(
+                self._sync_tasklist(service, task_list['id']) for task_list in task_lists
+            )
+            failures = {
+                task_list['id']: result
+                for task_list, result in zip(task_lists, results)
+                if isinstance(result, Exception)
+            }
+            if not failures:
+                await run_blocking(self.store.set_state, 'tasks', None)
+            return task_lists, failures
+
+    async def _sync_tasklist(self, service, tasklist_id):
+        resource = f'tasks:{tasklist_id}'
+        updated_min, _ = await run_blocking(self.store.get_state, resource)
+        started = datetime.now(timezone.utc) - UPDATED_MIN_MARGIN
+
+        pager = Pager(
+            service.tasks().list,
+            page_size=100,
+            tasklist=tasklist_id,
+            showCompleted=True,
+            showDeleted=updated_min is not None,
+            showHidden=True,
+            updatedMin=updated_min
+        )
+        replace = updated_min is None
+        async for tasks in pager.pages():
+            await run_blocking(self.store.apply_tasks, tasklist_id, tasks, replace)
+            replace = False
+        await run_blocking(self.store.set_state, resource, started.strftime('%Y-%m-%dT%H:%M:%S.000Z'))
+
+    def events_pager(self, calendar_id, start_date, end_date, limit=None, page_size=None, page_token=None):
+        """Page through stored events overlapping a time range"""
+        def fetch(count, offset):
+            return self.store.events(calendar_id, start_date, end_date, count, offset)
+        return LocalPager(fetch, limit=limit, page_size=page_size, page_token=page_token)
+
+    def tasks_pager(self, tasklist_id, limit=None, page_size=None, page_token=None, include_hidden=False):
+        """Page through the stored tasks of a list, hidden ones only with include_hidden"""
+        def fetch(count, offset):
+            return self.store.tasks(tasklist_id, count, offset, include_hidden)
+        return LocalPager(fetch, limit=limit, page_size=page_size, page_token=page_token)
+
+    async def record_event(self, calendar_id, event):
+        """Write an event we just created straight into the store"""
+        if SYNC_ENABLED:
+            await run_blocking(self.store.apply_events, calendar_id, [event])
+
+    async def record_task(self, tasklist_id, task):
+        """Write a task we just created or updated straight into the store"""
+        if SYNC_ENABLED:
+            await run_blocking(self.store.apply_tasks, tasklist_id, [task])
+
+
+_sync_engines = {}
+
+
+def sync_engine_for(auth_server):
+    """Sync engine of a tenant, whose store lives next to the tenant's token file"""
+    path = os.path.join(os.path.dirname(auth_server.token_file) or ".", "sync.db")
+    if path not in _sync_engines:
+        _sync_engines[path] = SyncEngine(SyncStore(path))
+    return _sync_engines[path]
@@ -0,0 +1,475 @@
+import asyncio
+import json
+import os
+import secrets
+import tempfile
+import time
+import urllib.parse
+import uuid
+from datetime import datetime, timezone
+from typing import Optional, Union
+
+from googleapiclient.errors import HttpError
+from starlette.responses import Response
+
+from .executor import execute, gather_bounded, invalidate_cache, run_blocking
+from .metrics import current_tool, metrics
+from .output import json_output, to_json
+from .pagination import Pager
+from .shared import credential_manager, services
+from .sync import SYNC_ENABLED, sync_engine_for
+
+# Public HTTPS address Google posts notifications to, e.g. https://mcp.example.com/notifications
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+# Path of the notification receiver on this server
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/notifications")
+# Lifetime asked for new channels, in seconds; Google may grant less
+WATCH_TTL = int(os.getenv("WATCH_TTL", "604800"))
+# Channels are replaced this many seconds before they expire
+WATCH_RENEW_MARGIN = float(os.getenv("WATCH_RENEW_MARGIN", "3600"))
+# Seconds before a failed renewal is tried again
+WATCH_RETRY_INTERVAL = 60
+
+RESOURCE_STATES = ('sync', 'exists', 'not_exists')
+
+
+def format_expiration(expiration):
+    return datetime.fromtimestamp(expiration, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+async def tenant_credentials(tenant):
+    """Valid credentials of a tenant
+
+    Raises when the tenant is not signed in, rather than letting the service
+    registry fall back to the credentials of the current request.
+    """
+    auth_server = credential_manager.get(tenant)
+    if not auth_server.is_authenticated():
+        raise Exception("The account that owns this channel is not signed in")
+    return await auth_server.get_valid_credentials()
+
+
+def channel_calendar_ids(channel):
+    """Every ID the calendar of a channel is read by, e.g. 'primary' and the account's address
+
+    Channels saved before these were recorded only know the ID they were created with.
+    """
+    return channel.get('calendar_ids') or [channel['calendar_id']]
+
+
+async def calendar_aliases(service, calendar_id):
+    """The ID a calendar was named by, its own ID and 'primary' for the primary calendar"""
+    try:
+        entry = await execute(service.calendarList().get(calendarId=calendar_id, fields='id,primary'))
+    except HttpError as e:
+        # Calendars that are not in the user's list can still be watched by their own ID
+        if e.resp.status != 404:
+            raise
+        return [calendar_id]
+    aliases = [calendar_id, entry['id']] + (['primary'] if entry.get('primary') else [])
+    return list(dict.fromkeys(aliases))
+
+
+async def refresh_calendar(tenant, calendar_ids):
+    """Make the next read of a calendar's events see its latest changes
+
+    Cached event lists of the calendar are marked stale under each of its IDs,
+    to be revalidated with their ETag, and with SYNC_ENABLED the local copies
+    made under any of them are synced incrementally.
+    """
+    auth_server = credential_manager.get(tenant)
+    if not auth_server.is_authenticated():
+        return
+    credentials = await auth_server.get_valid_credentials()
+    for calendar_id in calendar_ids:
+        invalidate_cache(credentials, 'events', resource=f"/calendars/{urllib.parse.quote(calendar_id, safe='')}/events")
+    if SYNC_ENABLED:
+        service = services.get('calendar', 'v3', credentials)
+        sync_engine = sync_engine_for(auth_server)
+        for calendar_id in calendar_ids:
+            # A calendar that was never read under this ID is synced in full on its first read
+            sync_token, _ = await run_blocking(sync_engine.store.get_state, f'calendar:{calendar_id}')
+            if sync_token is not None or calendar_id == calendar_ids[0]:
+                await sync_engine.sync_calendar(service, calendar_id, force=True)
+
+
+class WatchManager:
+    """Calendar push notification channels: created, renewed, stopped and acted on
+
+    Channels are saved to `path` so they can still be renewed and stopped after
+    a restart. A background task on the server's event loop replaces each
+    channel WATCH_RENEW_MARGIN seconds before it expires and only then stops
+    the old one, so no change goes unnoticed in between. It starts with the
+    HTTP server (see WatchStartup), or else with the first watch tool call or
+    notification.
+
+    A notification refreshes the calendar of its channel (see
+    refresh_calendar()); notifications arriving while that refresh runs are
+    folded into a single follow-up refresh.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._channels = None
+        self._task = None
+        self._wake = None
+        self._locks = {}
+        self._retry_at = {}
+        self._dirty = set()
+        self._refreshing = {}
+
+    @property
+    def channels(self):
+        """Channels by ID, read from `path` on first use"""
+        if self._channels is None:
+            self._channels = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path) as saved:
+                        self._channels = {channel['id']: channel for channel in json.load(saved)}
+                except Exception as e:
+                    print(f"⚠️ Error reading saved watch channels: {e}")
+        return self._channels
+
+    def save(self):
+        """Write the channels to `path` through a temporary file, so it is never left partial"""
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.channels-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as output:
+                json.dump(list(self.channels.values()), output)
+            os.replace(temp_path, self.path)
+        except Exception:
+            os.unlink(temp_path)
+            raise
+
+    def find(self, tenant, calendar_id=None):
+        """Channels of a tenant, optionally only those on one calendar"""
+        return [
+            channel for channel in self.channels.values()
+            if channel['tenant'] == tenant and calendar_id in (None, channel['calendar_id'])
+        ]
+
+    def start(self):
+        """Start the renewal task on the running event loop unless it already runs"""
+        if self._task is not None and not self._task.done():
+            return
+        self._wake = asyncio.Event()
+        self._locks = {}
+        self._task = asyncio.ensure_future(self._renew_loop())
+        # Changes made while no one was listening would otherwise go unnoticed
+        for channel in self.channels.values():
+            self._activate(channel)
+
+    def _lock(self, tenant, calendar_id):
+        # Channels of different calendars are created and stopped concurrently
+        key = (tenant, calendar_id)
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    def _activate(self, channel):
+        if SYNC_ENABLED:
+            pushed = sync_engine_for(credential_manager.get(channel['tenant'])).pushed
+            pushed.update(f"calendar:{calendar_id}" for calendar_id in channel_calendar_ids(channel))
+        self._schedule_refresh(channel['id'])
+
+    def _deactivate(self, channel):
+        if not SYNC_ENABLED:
+            return
+        still_watched = {
+            calendar_id
+            for other in self.find(channel['tenant'])
+            for calendar_id in channel_calendar_ids(other)
+        }
+        pushed = sync_engine_for(credential_manager.get(channel['tenant'])).pushed
+        for calendar_id in channel_calendar_ids(channel):
+            if calendar_id not in still_watched:
+                pushed.discard(f"calendar:{calendar_id}")
+
+    async def watch(self, tenant, calendar_id):
+        """Watch a calendar, keeping its current channel unless that is about to expire"""
+        self.start()
+        async with self._lock(tenant, calendar_id):
+            current = self.find(tenant, calendar_id)
+            if current and current[0]['expiration'] - time.time() > WATCH_RENEW_MARGIN:
+                return current[0]
+            channel = await self._create(tenant, calendar_id)
+            for old in current:
+                await self._stop_quietly(old)
+        self._wake.set()
+        return channel
+
+    async def unwatch(self, tenant, calendar_id):
+        """Stop watching a calendar; returns whether it was watched"""
+        self.start()
+        async with self._lock(tenant, calendar_id):
+            current = self.find(tenant, calendar_id)
+            for channel in current:
+                await self._stop(channel)
+        return bool(current)
+
+    async def renew(self, channel):
+        """Replace a channel with a new one on the same calendar, then stop the old one"""
+        async with self._lock(channel['tenant'], channel['calendar_id']):
+            if channel['id'] not in self.channels:
+                return
+            await self._create(channel['tenant'], channel['calendar_id'])
+            await self._stop_quietly(channel)
+
+    async def _create(self, tenant, calendar_id):
+        if not WEBHOOK_URL:
+            raise Exception("Set WEBHOOK_URL to the public HTTPS address of this server's notification receiver")
+
+        credentials = await tenant_credentials(tenant)
+        service = services.get('calendar', 'v3', credentials)
+        body = {
+            'id': uuid.uuid4().hex,
+            'type': 'web_hook',
+            'address': WEBHOOK_URL,
+            'token': secrets.token_urlsafe(32),
+            'params': {'ttl': str(WATCH_TTL)}
+        }
+        channel = {
+            'id': body['id'],
+            'token': body['token'],
+            'resource_id': None,
+            'tenant': tenant,
+            'calendar_id': calendar_id,
+            'calendar_ids': await calendar_aliases(service, calendar_id),
+            'expiration': time.time() + WATCH_TTL,
+        }
+        # Known before Google answers, since its first notification can arrive sooner
+        self.channels[channel['id']] = channel
+        try:
+            response = await execute(service.events().watch(calendarId=calendar_id, body=body))
+        except Exception:
+            self.channels.pop(channel['id'], None)
+            raise
+        channel['resource_id'] = response['resourceId']
+        if response.get('expiration'):
+            channel['expiration'] = int(response['expiration']) / 1000
+        self.save()
+        self._activate(channel)
+        return channel
+
+    async def _stop(self, channel):
+        """Forget a channel and stop it at Google, which may already have dropped it"""
+        self._forget(channel)
+        credentials = await tenant_credentials(channel['tenant'])
+        service = services.get('calendar', 'v3', credentials)
+        try:
+            await execute(service.channels().stop(body={'id': channel['id'], 'resourceId': channel['resource_id']}))
+        except HttpError as e:
+            if e.resp.status != 404:
+                raise
+
+    async def _stop_quietly(self, channel):
+        # A replaced channel that cannot be stopped still expires on its own
+        try:
+            await self._stop(channel)
+        except Exception as e:
+            print(f"⚠️ Error stopping watch channel {channel['id']}: {e}")
+
+    def _forget(self, channel):
+        self.channels.pop(channel['id'], None)
+        self._retry_at.pop(channel['id'], None)
+        self.save()
+        self._deactivate(channel)
+
+    def _due(self, channel):
+        return max(channel['expiration'] - WATCH_RENEW_MARGIN, self._retry_at.get(channel['id'], 0))
+
+    async def _renew_loop(self):
+        # Background work is not on behalf of the tool call that started it
+        current_tool.set('')
+        while True:
+            for channel in list(self.channels.values()):
+                if self._due(channel) > time.time():
+                    continue
+                try:
+                    await self.renew(channel)
+                except Exception as e:
+                    if channel['expiration'] <= time.time():
+                        print(f"⚠️ Watch channel for {channel['calendar_id']} expired, could not renew it: {e}")
+                        self._forget(channel)
+                        continue
+                    print(f"⚠️ Error renewing watch channel for {channel['calendar_id']}: {e}")
+                    self._retry_at[channel['id']] = time.time() + WATCH_RETRY_INTERVAL
+
+            due = [self._due(channel) for channel in self.channels.values()]
+            timeout = max(min(due) - time.time(), 0) if due else None
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def notify(self, headers):
+        """Handle a push notification from Google and return the HTTP status to answer with
+
+        The refresh it triggers runs in the background, since Google expects a
+        quick answer and retries notifications that are not acknowledged.
+        """
+        state = headers.get('x-goog-resource-state', '')
+        state = state if state in RESOURCE_STATES else 'other'
+        channel = self.channels.get(headers.get('x-goog-channel-id', ''))
+        if channel is None:
+            metrics.inc('watch_notifications_total', state=state, result='unknown_channel')
+            return 404
+        if not secrets.compare_digest(headers.get('x-goog-channel-token', ''), channel['token']):
+            metrics.inc('watch_notifications_total', state=state, result='bad_token')
+            return 403
+
+        self.start()
+        # The first notification of a channel only confirms it was created
+        if state != 'sync':
+            self._schedule_refresh(channel['id'])
+        metrics.inc('watch_notifications_total', state=state, result='accepted')
+        return 200
+
+    def _schedule_refresh(self, channel_id):
+        self._dirty.add(channel_id)
+        if channel_id not in self._refreshing:
+            self._refreshing[channel_id] = asyncio.ensure_future(self._refresh(channel_id))
+
+    async def _refresh(self, channel_id):
+        current_tool.set('')
+        try:
+            while channel_id in self._dirty:
+                self._dirty.discard(channel_id)
+                channel = self.channels.get(channel_id)
+                if channel is None:
+                    return
+                try:
+                    await refresh_calendar(channel['tenant'], channel_calendar_ids(channel))
+                except Exception as e:
+                    print(f"⚠️ Error refreshing calendar {channel['calendar_id']} after a notification: {e}")
+        finally:
+            self._refreshing.pop(channel_id, None)
+
+
+class WatchStartup:
+    """ASGI middleware starting the channel renewal task when the HTTP server starts
+
+    Channels saved before a restart would otherwise expire unnoticed until
+    the next watch tool call or notification.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            watch_manager.start()
+        await self.app(scope, receive, send)
+
+
+watch_manager = WatchManager(os.path.join(os.path.dirname(credential_manager.token_file or '') or '.', 'channels.json'))
+
+
+def register_watch_tools(mcp):
+    """Register the push notification receiver and the calendar watch tools"""
+
+    @mcp.custom_route(WEBHOOK_PATH, methods=['POST'])
+    async def receive_notification(request):
+        return Response(status_code=watch_manager.notify(request.headers))
+
+    @mcp.tool()
+    async def watch_calendars(
+        calendar_ids: Union[list[str], str] = 'primary',
+        output_format: Optional[str] = None
+    ) -> str:
+        """
+        Get push notifications for changes to calendars, so their events are refreshed
+        as soon as they change instead of by polling. Channels are renewed automatically.
+
+        Args:
+            calendar_ids: Calendar ID or list of IDs to watch, or 'all' for every calendar (default 'primary').
+            output_format: 'text' or 'json' for compact structured output (optional).
+        """
+        auth_server = credential_manager.get()
+        if not auth_server.is_authenticated():
+            return "Not authenticated. Please run authenticate() first."
+
+        try:
+            as_json = json_output(output_format)
+            tenant = credential_manager.tenant()
+            if calendar_ids == 'all' or calendar_ids == ['all']:
+                credentials = await auth_server.get_valid_credentials()
+                service = services.get('calendar', 'v3', credentials)
+                calendar_ids = []
+                async for page in Pager(service.calendarList().list, page_size=250, fields='id', cache='calendars').pages():
+                    calendar_ids.extend(calendar['id'] for calendar in page)
+            elif isinstance(calendar_ids, str):
+                calendar_ids = [calendar_ids]
+
+            results = await gather_bounded(watch_manager.watch(tenant, calendar_id) for calendar_id in calendar_ids)
+            channels = [result for result in results if not isinstance(result, Exception)]
+            failures = {
+                calendar_id: result
+                for calendar_id, result in zip(calendar_ids, results)
+                if isinstance(result, Exception)
+            }
+
+            if as_json:
+                return to_json({
+                    'channels': [
+                        {'calendar_id': channel['calendar_id'], 'expiration': format_expiration(channel['expiration'])}
+                        for channel in channels
+                    ],
+                    'failures': {calendar_id: str(error) for calendar_id, error in failures.items()}
+                })
+            if not channels:
+                failed_calendars = [f"• {calendar_id}: {str(error)}" for calendar_id, error in failures.items()]
+                return "Error watching calendars:\n" + "\n".join(failed_calendars)
+
+            channel_list = [
+                f"• {channel['calendar_id']} - until {format_expiration(channel['expiration'])}"
+                for channel in channels
+            ]
+            response = f"👀 Watching {len(channels)} calendars:\n" + "\n".join(channel_list)
+            if failures:
+                failed_calendars = [f"• {calendar_id}: {str(error)}" for calendar_id, error in failures.items()]
+                response += f"\n\n⚠️ Could not watch {len(failures)} calendars:\n" + "\n".join(failed_calendars)
+            return response
+        except Exception as e:
+            return f"Error watching calendars: {str(e)}"
+
+    @mcp.tool()
+    async def stop_watching(calendar_ids: Union[list[str], str] = 'all') -> str:
+        """
+        Stop push notifications for calendars watched with watch_calendars
+
+        Args:
+            calendar_ids: Calendar ID or list of IDs, or 'all' for every watched calendar (default 'all').
+        """
+        auth_server = credential_manager.get()
+        if not auth_server.is_authenticated():
+            return "Not authenticated. Please run authenticate() first."
+
+        try:
+            tenant = credential_manager.tenant()
+            if calendar_ids == 'all' or calendar_ids == ['all']:
+                calendar_ids = list(dict.fromkeys(channel['calendar_id'] for channel in watch_manager.find(tenant)))
+            elif isinstance(calendar_ids, str):
+                calendar_ids = [calendar_ids]
+
+            results = await gather_bounded(watch_manager.unwatch(tenant, calendar_id) for calendar_id in calendar_ids)
+            stopped = [calendar_id for calendar_id, result in zip(calendar_ids, results) if result is True]
+            failures = {
+                calendar_id: result
+                for calendar_id, result in zip(calendar_ids, results)
+                if isinstance(result, Exception)
+            }
+
+            response = f"Stopped watching {len(stopped)} calendars"
+            if stopped:
+                response += ":\n" + "\n".join(f"• {calendar_id}" for calendar_id in stopped)
+            if failures:
+                failed_calendars = [f"• {calendar_id}: {str(error)}" for calendar_id, error in failures.items()]
+                response += f"\n\n⚠️ Could not stop {len(failures)} channels:\n" + "\n".join(failed_calendars)
+            return response
+        except Exception as e:
+            return f"Error stopping watches: {str(e)}"